@@ -0,0 +1,209 @@
+"""
+Cancellation benchmark: proves that stopped and superseded generations stop consuming compute.
+
+Runs each scenario against the mock Ollama and measures, from the moment a
+generation is cancelled, how long the server keeps generating for it (abort
+latency) and how many tokens it still produces. A generation that is still
+running on the server --deadline-ms after nobody wants it anymore is an
+orphan; the script exits with status 1 if any scenario leaves one.
+
+- async stop: Stop in the window (cancel token and task of AsyncLLMClient)
+- async supersede: 20 different sends in a row, each replacing the last
+- identical supersede: the same request sent again while it streams must
+  take over the running generation instead of starting a second one
+- chunked stop: Stop during a long input transformed in concurrent chunks
+- sync stop: a batch worker thread blocked reading LLMClient.stream, stopped
+  from another thread
+- sync stop before first byte: the same while the server has not answered
+  yet; the socket is only reachable once the headers arrive, so the worker
+  stops then
+
+Usage (from the repository root):
+    python -m benchmarks.bench_cancellation [--token-delay-ms 5] [--deadline-ms 1000]
+"""
+import argparse
+import asyncio
+import sys
+import threading
+import time
+from benchmarks.mock_ollama import MockOllama
+from src.core import config
+from src.core.async_llm_client import AsyncLLMClient
+from src.core.cancellation import CancelToken, GenerationCancelled
+from src.core.chunking import ChunkedTransform
+from src.core.llm_client import LLMClient
+
+MODEL = "mock-small:latest"
+LOOP = asyncio.new_event_loop()
+
+def wait_idle(mock, deadline):
+    """Seconds until the mock has no active stream, None if it still has one after deadline seconds"""
+    start = time.perf_counter()
+    while mock.stats["active"]:
+        if time.perf_counter() - start > deadline:
+            return None
+        time.sleep(0.001)
+    return time.perf_counter() - start
+
+def outcome(mock, deadline, tokens_before):
+    """Abort latency in ms (None for an orphan) and tokens generated after the cancellation"""
+    idle = wait_idle(mock, deadline)
+    return (None if idle is None else idle * 1000), mock.stats["tokens"] - tokens_before
+
+def run_async(coro):
+    """Run coro on the benchmark event loop thread"""
+    return asyncio.run_coroutine_threadsafe(coro, LOOP).result()
+
+async def read_tokens(stream, count, started=None):
+    """Read count tokens of a stream, then keep reading until cancelled"""
+    received = 0
+    async for data in stream:
+        if data.get("response"):
+            received += 1
+            if received == count and started is not None:
+                started.set()
+
+async def stop_after(mock, make_stream, tokens=10):
+    """Start a stream, cancel its token and task after some tokens; returns the token count at cancellation"""
+    token = CancelToken()
+    started = asyncio.Event()
+    task = asyncio.ensure_future(read_tokens(make_stream(token), tokens, started))
+    await started.wait()
+    before = mock.stats["tokens"]
+    token.cancel()
+    task.cancel()
+    return before
+
+def scenario_async_stop(mock, client, deadline):
+    before = run_async(stop_after(mock, lambda token: client.generate_stream(MODEL, "stop", cancel_token=token)))
+    return outcome(mock, deadline, before)
+
+def scenario_async_supersede(mock, client, deadline):
+    async def sends():
+        previous = None
+        for index in range(20):
+            token = CancelToken()
+            started = asyncio.Event()
+            task = asyncio.ensure_future(read_tokens(
+                client.generate_stream(MODEL, f"send {index}", cancel_token=token), 3, started))
+            if previous is not None:
+                previous[0].cancel()
+                previous[1].cancel()
+            previous = (token, task)
+            await started.wait()
+        before = mock.stats["tokens"]
+        previous[0].cancel()
+        previous[1].cancel()
+        return before
+
+    return outcome(mock, deadline, run_async(sends()))
+
+def scenario_identical_supersede(mock, client, deadline):
+    async def sends():
+        requests = mock.stats["requests"]
+        first = asyncio.ensure_future(read_tokens(client.generate_stream(MODEL, "same"), 0))
+        await asyncio.sleep(mock.token_delay * 10)
+        first.cancel()  # Superseded without cancelling its token, like an identical Send
+        second = CancelToken()
+        started = asyncio.Event()
+        task = asyncio.ensure_future(read_tokens(client.generate_stream(MODEL, "same", cancel_token=second), 1,
+                                                 started))
+        await started.wait()
+        shared = mock.stats["requests"] - requests == 1
+        before = mock.stats["tokens"]
+        second.cancel()
+        task.cancel()
+        return before, shared
+
+    before, shared = run_async(sends())
+    latency, tokens = outcome(mock, deadline, before)
+    if not shared:
+        print("  the identical request started a second generation")
+        return None, tokens
+    return latency, tokens
+
+def scenario_chunked_stop(mock, client, deadline):
+    text = "\n\n".join(f"Paragraph {index}. " + "word " * 200 for index in range(8))
+
+    def make_stream(token):
+        return ChunkedTransform(client, MODEL, "{}", max_tokens=300, concurrency=3, cancel_token=token).stream(text)
+
+    return outcome(mock, deadline, run_async(stop_after(mock, make_stream)))
+
+def sync_stop(mock, deadline, tokens):
+    token = CancelToken()
+    progress = threading.Event()
+    result = {}
+
+    def worker():
+        received = 0
+        try:
+            for data in LLMClient.stream(MODEL, "sync stop", token):
+                if data.get("response"):
+                    received += 1
+                    if received == tokens:
+                        progress.set()
+        except GenerationCancelled:
+            result["cancelled"] = time.perf_counter()
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    if tokens:
+        progress.wait()
+    else:
+        time.sleep(mock.latency / 2)  # The worker is waiting for the response headers
+    before = mock.stats["tokens"]
+    cancelled_at = time.perf_counter()
+    token.cancel()
+    thread.join(deadline)
+    if thread.is_alive() or "cancelled" not in result:
+        print("  the worker thread did not stop")
+        return None, mock.stats["tokens"] - before
+    print(f"  worker thread stopped after {(result['cancelled'] - cancelled_at) * 1000:.1f} ms")
+    return outcome(mock, deadline, before)
+
+def scenario_sync_stop(mock, client, deadline):
+    return sync_stop(mock, deadline, 10)
+
+def scenario_sync_stop_before_first_byte(mock, client, deadline):
+    mock.latency = 0.3
+    try:
+        return sync_stop(mock, deadline, 0)
+    finally:
+        mock.latency = 0.0
+
+SCENARIOS = (("async stop", scenario_async_stop), ("async supersede", scenario_async_supersede),
+             ("identical supersede", scenario_identical_supersede), ("chunked stop", scenario_chunked_stop),
+             ("sync stop", scenario_sync_stop), ("sync stop before first byte", scenario_sync_stop_before_first_byte))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--token-delay-ms", type=float, default=5.0)
+    parser.add_argument("--deadline-ms", type=float, default=1000.0,
+                        help="time after which a generation nobody wants is an orphan")
+    args = parser.parse_args()
+
+    threading.Thread(target=LOOP.run_forever, name="bench-loop", daemon=True).start()
+    mock = MockOllama(tokens=100000, token_delay=args.token_delay_ms / 1000)
+    config.OLLAMA_URL = mock.start_in_thread()
+    client = AsyncLLMClient()
+    deadline = args.deadline_ms / 1000
+
+    orphans = 0
+    print(f"{'scenario':<30} {'abort ms':>9} {'tokens after':>13}")
+    for name, scenario in SCENARIOS:
+        latency, tokens = scenario(mock, client, deadline)
+        if latency is None:
+            orphans += 1
+            wait_idle(mock, 60)
+        print(f"{name:<30} {'ORPHAN' if latency is None else f'{latency:.1f}':>9} {tokens:>13}")
+
+    run_async(client.close())
+    LLMClient.close_session()
+    mock.stop_in_thread()
+    print(f"{orphans} orphaned generation(s), {mock.stats['abandoned']} abandoned streams, "
+          f"{mock.stats['requests']} requests")
+    return 1 if orphans else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
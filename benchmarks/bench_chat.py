@@ -0,0 +1,95 @@
+"""
+Chat Mode benchmark: how much of each follow-up turn Ollama has to evaluate.
+
+Holds the same conversation of --turns messages against the mock Ollama,
+which simulates Ollama's prompt cache (only the part of a prompt that does
+not repeat the previous prompt and answer is evaluated), and prints for
+each way of keeping the conversation within --budget tokens:
+
+- the prompt tokens the server evaluated per turn, summaries included, and
+  the median prompt evaluation time reported for a follow-up turn
+- how many earlier turns the model still sees at the end
+
+Strategies:
+- stateless generate: the previous Chat Mode, every message sent alone
+- sliding window: the oldest turn dropped as soon as the budget is
+  exceeded, which changes the start of the prompt, and so misses the cache,
+  on every turn once the budget is reached
+- ChatSession: older turns dropped in blocks (down to CHAT_TRIM_TARGET of
+  the budget), without and with a summary of the dropped turns
+
+Usage (from the repository root):
+    python -m benchmarks.bench_chat [--turns 30] [--budget 1500] [--prompt-eval-delay-ms 0.2]
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import threading
+from benchmarks.mock_ollama import MockOllama
+from src.core import config
+from src.core.async_llm_client import AsyncLLMClient
+from src.core.chat import ChatSession
+
+MODEL = "mock-small:latest"
+STATELESS_PROMPT = '"{}"'  # The Chat Mode entry of prompts.json
+LOOP = asyncio.new_event_loop()
+WORDS = ("what", "about", "the", "meeting", "notes", "from", "yesterday", "and", "can", "you", "explain",
+         "this", "part", "again", "please", "shorter", "list", "names", "decisions")
+
+def make_messages(turns, seed=0):
+    rng = random.Random(seed)
+    return [f"Message {index}: " + " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 60)))
+            for index in range(turns)]
+
+async def stateless(client, messages):
+    durations = []
+    for text in messages:
+        async for data in client.generate_stream(MODEL, STATELESS_PROMPT.format(text)):
+            if data.get("done", False):
+                durations.append(data["prompt_eval_duration"])
+    return 0, durations
+
+async def converse(client, session, messages):
+    durations = []
+    for text in messages:
+        async for data in session.stream(client, MODEL, text):
+            if data.get("done", False):
+                durations.append(data["prompt_eval_duration"])
+    return len(session), durations
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--budget", type=int, default=1500, help="estimated tokens of conversation per turn")
+    parser.add_argument("--prompt-eval-delay-ms", type=float, default=0.2, help="per prompt token")
+    args = parser.parse_args()
+
+    threading.Thread(target=LOOP.run_forever, name="bench-loop", daemon=True).start()
+    mock = MockOllama(tokens=40, token_delay=0.0, prompt_eval_delay=args.prompt_eval_delay_ms / 1000)
+    config.OLLAMA_URL = mock.start_in_thread()
+    client = AsyncLLMClient()
+    messages = make_messages(args.turns)
+    strategies = (
+        ("stateless generate", lambda: stateless(client, messages)),
+        ("sliding window", lambda: converse(
+            client, ChatSession(args.budget, keep_tokens=args.budget, summarize=False), messages)),
+        ("ChatSession, trimming", lambda: converse(client, ChatSession(args.budget, summarize=False), messages)),
+        ("ChatSession, summaries", lambda: converse(client, ChatSession(args.budget, summarize=True), messages)),
+    )
+
+    print(f"{args.turns} turns, budget {args.budget} tokens")
+    print(f"{'strategy':<24} {'prompt tok/turn':>16} {'turn eval ms p50':>17} {'turns seen':>11}")
+    for label, run in strategies:
+        mock.prompt_cache.clear()
+        before = mock.stats["prompt_tokens"]
+        remembered, durations = asyncio.run_coroutine_threadsafe(run(), LOOP).result()
+        per_turn = (mock.stats["prompt_tokens"] - before) / args.turns
+        median = statistics.median(durations[1:]) / 1e6
+        print(f"{label:<24} {per_turn:>16.0f} {median:>17.1f} {remembered:>11}")
+
+    asyncio.run_coroutine_threadsafe(client.close(), LOOP).result()
+    mock.stop_in_thread()
+
+if __name__ == "__main__":
+    main()
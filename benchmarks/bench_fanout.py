@@ -0,0 +1,86 @@
+"""
+Fan-out benchmark: one input sent to several models and transformations at once.
+
+Runs the same fan-out against the mock Ollama with every concurrency limit
+from 1 to the number of streams and prints the wall time, the number of
+streams the server saw at the same time (it must never exceed the limit),
+and the first-token latency and speed of each stream as the panes show
+them. Then stops a fan-out halfway and checks that no stream keeps
+generating on the server. Exits with status 1 if the limit was exceeded,
+a stream failed, or a stopped stream kept running.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_fanout [--models 2] [--transforms 2] [--tokens 100] [--token-delay-ms 5]
+"""
+import argparse
+import asyncio
+import sys
+import threading
+import time
+from benchmarks.mock_ollama import MockOllama
+from src.core import config
+from src.core.async_llm_client import AsyncLLMClient
+from src.core.fanout import FanOut, FanOutStream, combinations
+
+LOOP = asyncio.new_event_loop()
+
+def run_fanout(mock, client, pairs, concurrency):
+    """Run a fan-out to the end; returns it with its wall time and the peak of concurrent server streams"""
+    mock.stats["peak_active"] = 0
+    prompts = {transform: transform + ": {}" for _, transform in pairs}
+    fanout = FanOut.from_selection(client, "Benchmark input text.", pairs, prompts, {}, concurrency=concurrency)
+    start = time.perf_counter()
+    asyncio.run_coroutine_threadsafe(fanout.run(), LOOP).result()
+    return fanout, time.perf_counter() - start, mock.stats["peak_active"]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", type=int, default=2)
+    parser.add_argument("--transforms", type=int, default=2)
+    parser.add_argument("--tokens", type=int, default=100)
+    parser.add_argument("--token-delay-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    threading.Thread(target=LOOP.run_forever, name="bench-loop", daemon=True).start()
+    models = [f"mock-{index}:latest" for index in range(args.models)]
+    mock = MockOllama(tokens=args.tokens, token_delay=args.token_delay_ms / 1000, models=models)
+    config.OLLAMA_URL = mock.start_in_thread()
+    client = AsyncLLMClient()
+    pairs = combinations(models, [f"Transform {index}" for index in range(args.transforms)])
+    failures = 0
+
+    print(f"{len(pairs)} streams of {args.tokens} tokens")
+    print(f"{'concurrency':>11} {'wall ms':>9} {'peak':>5}")
+    for concurrency in range(1, len(pairs) + 1):
+        fanout, wall, peak = run_fanout(mock, client, pairs, concurrency)
+        failed = [stream for stream in fanout.streams if stream.state != FanOutStream.DONE]
+        if peak > concurrency or failed:
+            failures += 1
+        print(f"{concurrency:>11} {wall * 1000:>9.0f} {peak:>5}"
+              f"{'  LIMIT EXCEEDED' if peak > concurrency else ''}{f'  {len(failed)} FAILED' if failed else ''}")
+    for stream in fanout.streams:
+        print(f"  {stream.model} - {stream.transform}: {stream.metrics.summary()}")
+
+    # Stop halfway: the running streams must end on the server, the queued ones must never start
+    prompts = {transform: transform + ": {}" for _, transform in pairs}
+    fanout = FanOut.from_selection(client, "Stop me.", pairs, prompts, {}, concurrency=max(1, len(pairs) // 2))
+    requests = mock.stats["requests"]
+    fanout.future = asyncio.run_coroutine_threadsafe(fanout.run(), LOOP)
+    time.sleep(args.tokens * args.token_delay_ms / 2000)
+    fanout.cancel()
+    start = time.perf_counter()
+    while mock.stats["active"] and time.perf_counter() - start < 1:
+        time.sleep(0.001)
+    sent = mock.stats["requests"] - requests
+    stopped = all(stream.state == FanOutStream.STOPPED for stream in fanout.streams)
+    print(f"stop: {sent} of {len(pairs)} streams sent, all stopped: {stopped}, "
+          f"still generating after {(time.perf_counter() - start) * 1000:.1f} ms: {mock.stats['active']}")
+    if mock.stats["active"] or not stopped:
+        failures += 1
+
+    asyncio.run_coroutine_threadsafe(client.close(), LOOP).result()
+    mock.stop_in_thread()
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+Transformation history benchmark.
+
+Fills a temporary history with --entries transformations of realistic size
+and prints:
+
+- add: time spent by the caller per add() (the UI thread), and how fast the
+  background writer stores the queued entries
+- the queries behind the history window, median of --repeat runs: the first
+  page, a page deep in the history (keyset on id, so it should cost the same
+  as the first), the same page read with OFFSET for comparison, searches for
+  a common and a rare word, and get() of one full entry
+
+Usage (from the repository root):
+    python -m benchmarks.bench_history [--entries 50000] [--page-size 100] [--repeat 20]
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from src.core.history import HistoryStore
+
+WORDS = ("the", "clipboard", "model", "local", "text", "summary", "meeting", "notes", "email", "draft",
+         "project", "report", "python", "function", "error", "review", "customer", "invoice", "travel")
+
+def make_text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+def median_ms(repeat, query):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        query()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=50000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="clipai-history-")
+    store = HistoryStore(os.path.join(directory, "history.sqlite3"))
+    try:
+        rng = random.Random(0)
+        entries = []
+        for index in range(args.entries):
+            text = make_text(rng, rng.randint(20, 300))
+            if index % 1000 == 0:
+                text += " zanzibar"  # The rare search term
+            entries.append(("llama3.2:latest", "Rephrase", "Rephrase: {}", text, make_text(rng, rng.randint(20, 200))))
+
+        add_times = []
+        start = time.perf_counter()
+        for entry in entries:
+            before = time.perf_counter()
+            store.add(*entry, metrics={"ttft_ms": 120.0, "total_ms": 2400.0})
+            add_times.append(time.perf_counter() - before)
+        queued = time.perf_counter() - start
+        store.flush()
+        written = time.perf_counter() - start
+        print(f"{store.count()} entries, FTS5 {'on' if store.fts else 'off (LIKE)'}")
+        print(f"  add() caller time        {statistics.mean(add_times) * 1e6:8.1f} us mean "
+              f"{max(add_times) * 1e6:8.1f} us max ({queued:.2f} s to queue)")
+        print(f"  background writes        {args.entries / written:8.0f} entries/s")
+
+        first = store.page(limit=args.page_size)
+        deep_id = first[0][0] - args.entries * 9 // 10
+        offset = args.entries * 9 // 10
+        with store._lock:
+            reader = store._connect()
+        queries = (
+            ("first page", lambda: store.page(limit=args.page_size)),
+            ("deep page (keyset)", lambda: store.page(before_id=deep_id, limit=args.page_size)),
+            ("deep page (OFFSET)", lambda: reader.execute(
+                "SELECT id FROM history ORDER BY id DESC LIMIT ? OFFSET ?", (args.page_size, offset)).fetchall()),
+            ("search common word", lambda: store.page("meeting notes", limit=args.page_size)),
+            ("search rare word", lambda: store.page("zanzib", limit=args.page_size)),
+            ("search no match", lambda: store.page("qwertyuiop", limit=args.page_size)),
+            ("get entry", lambda: store.get(deep_id)),
+        )
+        for label, query in queries:
+            print(f"  {label:<24} {median_ms(args.repeat, query):8.2f} ms")
+    finally:
+        store.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Markdown parser throughput benchmark.
+
+Parses large synthetic markdown documents (headings, lists, code fences and
+lines with several inline spans) with CustomMarkdownParser and prints the
+best time of several repeats together with the throughput.
+
+Then parses single lines made of many unmatched markers (e.g. "**a **a ...")
+of growing length: the time must grow linearly with the length of the line,
+a pattern that scans to the end of the line for every marker makes it grow
+quadratically.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_markdown [--lines 1000 10000 50000] [--repeat 5] [--line-chars 4000 16000 64000]
+"""
+import argparse
+import random
+import time
+from src.core.markdown_parser import CustomMarkdownParser
+
+WORDS = ["clipboard", "model", "token", "stream", "local", "prompt", "summary",
+         "answer", "text", "format", "widget", "latency", "memory", "output"]
+
+def make_document(lines, seed=0):
+    """Build a reproducible markdown document with the given number of lines"""
+    rng = random.Random(seed)
+
+    def sentence(n):
+        words = [rng.choice(WORDS) for _ in range(n)]
+        for i in range(0, n - 2, 5):
+            kind = rng.randrange(5)
+            if kind == 0:
+                words[i] = f"**{words[i]}**"
+            elif kind == 1:
+                words[i] = f"*{words[i]}*"
+            elif kind == 2:
+                words[i] = f"`{words[i]}()`"
+            elif kind == 3:
+                words[i] = f"[{words[i]}](https://example.com/{words[i]})"
+            else:
+                words[i] = f"***{words[i]}***"
+        return " ".join(words)
+
+    out = []
+    while len(out) < lines:
+        block = rng.randrange(10)
+        if block == 0:
+            out.append(f"{'#' * rng.randint(1, 4)} {sentence(4)}")
+        elif block in (1, 2):
+            out.extend(f"- {sentence(8)}" for _ in range(3))
+        elif block == 3:
+            out.extend(f"{i}. {sentence(8)}" for i in range(1, 4))
+        elif block == 4:
+            out.append("```python")
+            out.extend(f"value_{i} = compute({i}) * 2" for i in range(4))
+            out.append("```")
+        else:
+            out.append(sentence(rng.randint(10, 30)))
+    return "\n".join(out[:lines])
+
+PATHOLOGICAL_UNITS = ("**a ", "*a *", "***a ", "[a ", "`` a ")
+
+def bench(parser, text, repeat):
+    """Best wall-clock time of parser.parse(text) over repeat runs"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parser.parse(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--line-chars", type=int, nargs="+", default=[4000, 16000, 64000])
+    args = parser.parse_args()
+
+    markdown_parser = CustomMarkdownParser()
+    print(f"{'lines':>8} {'chars':>10} {'best ms':>10} {'MB/s':>8} {'klines/s':>10}")
+    for lines in args.lines:
+        text = make_document(lines)
+        seconds = bench(markdown_parser, text, args.repeat)
+        print(f"{lines:>8} {len(text):>10} {seconds * 1000:>10.1f} "
+              f"{len(text) / seconds / 1e6:>8.2f} {lines / seconds / 1000:>10.1f}")
+
+    print()
+    print(f"{'unmatched':>10} " + " ".join(f"{f'{chars} ch ms':>12}" for chars in args.line_chars))
+    for unit in PATHOLOGICAL_UNITS:
+        times = [bench(markdown_parser, unit * (chars // len(unit)), args.repeat) for chars in args.line_chars]
+        print(f"{repr(unit):>10} " + " ".join(f"{seconds * 1000:>12.2f}" for seconds in times))
+
+if __name__ == "__main__":
+    main()
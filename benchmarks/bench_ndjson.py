@@ -0,0 +1,124 @@
+"""
+NDJSON stream decoding benchmark.
+
+Decodes recorded Ollama streams with the loops used before src/core/ndjson.py
+and with the new decoder, checks that they all produce the same text, and
+prints the time per token:
+
+- iter_lines + json.loads: requests' iter_lines() with its default chunk
+  size, then json.loads on every line (previous batch loop)
+- readline + json.loads: one readline per token line (previous loop of
+  AsyncLLMClient)
+- NDJSONDecoder: the data fed in 64 KiB chunks, token lines sliced out by
+  the fast path
+- iter_ndjson(iter_content(None)): the new batch loop
+
+Without --record, synthetic streams in Ollama's format are used: mostly
+plain tokens, some non-ASCII text, and some tokens with quotes or newlines
+that need the full JSON parser. Real streams can be recorded with e.g.
+    curl -s http://localhost:11434/api/generate -d '{"model": "llama3.2", "prompt": "..."}' > stream.ndjson
+
+Usage (from the repository root):
+    python -m benchmarks.bench_ndjson [--tokens 20000] [--repeat 5] [--record stream.ndjson ...]
+"""
+import argparse
+import io
+import json
+import random
+import time
+import requests
+from src.core.ndjson import NDJSONDecoder, iter_ndjson
+
+WORDS = ["the", " clipboard", " model", " token", "s", " stream", " local", ",", ".", " résumé", " 東京",
+         " answer", "\n", " \"quoted\"", " **bold**", " `code`", " 🙂"]
+
+def record_stream(tokens, model="llama3.2:latest", seed=0):
+    """A synthetic /api/generate stream of the given number of tokens, as bytes"""
+    rng = random.Random(seed)
+    lines = []
+    for index in range(tokens):
+        created = f"2024-11-05T10:{index // 60000 % 60:02d}:{index // 1000 % 60:02d}.{index % 1000:03d}123456Z"
+        lines.append(json.dumps({"model": model, "created_at": created, "response": rng.choice(WORDS),
+                                 "done": False}, ensure_ascii=False, separators=(",", ":")))
+    lines.append(json.dumps({"model": model, "created_at": "2024-11-05T10:59:59.000000Z", "response": "",
+                             "done": True, "done_reason": "stop", "context": list(range(tokens)),
+                             "total_duration": 5000000000, "load_duration": 10000000,
+                             "prompt_eval_count": 26, "prompt_eval_duration": 130000000,
+                             "eval_count": tokens, "eval_duration": 4800000000}, separators=(",", ":")))
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+def make_response(data):
+    """A requests response reading data, like a streamed HTTP response"""
+    response = requests.models.Response()
+    response.status_code = 200
+    response.raw = io.BytesIO(data)
+    return response
+
+def decode_iter_lines(data):
+    parts = []
+    for line in make_response(data).iter_lines():
+        if line:
+            parts.append(json.loads(line).get("response", ""))
+    return "".join(parts)
+
+def decode_readline(data):
+    parts = []
+    stream = io.BytesIO(data)
+    while True:
+        line = stream.readline()
+        if not line:
+            break
+        line = line.strip()
+        if line:
+            parts.append(json.loads(line).get("response", ""))
+    return "".join(parts)
+
+def decode_decoder(data, chunk_size=65536):
+    parts = []
+    decoder = NDJSONDecoder()
+    for start in range(0, len(data), chunk_size):
+        for item in decoder.feed(data[start:start + chunk_size]):
+            parts.append(item.get("response", ""))
+    for item in decoder.close():
+        parts.append(item.get("response", ""))
+    return "".join(parts)
+
+def decode_iter_ndjson(data):
+    return "".join(item.get("response", "") for item in iter_ndjson(make_response(data).iter_content(None)))
+
+LOOPS = (("iter_lines + json.loads", decode_iter_lines), ("readline + json.loads", decode_readline),
+         ("NDJSONDecoder", decode_decoder), ("iter_ndjson(iter_content(None))", decode_iter_ndjson))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--record", nargs="+", metavar="PATH", help="recorded NDJSON streams")
+    args = parser.parse_args()
+
+    if args.record:
+        streams = []
+        for path in args.record:
+            with open(path, "rb") as file:
+                streams.append((path, file.read()))
+    else:
+        streams = [(f"synthetic, {args.tokens} tokens", record_stream(args.tokens))]
+
+    for name, data in streams:
+        lines = data.count(b"\n")
+        expected = decode_iter_lines(data)
+        print(f"{name} ({lines} lines, {len(data) / 1024:.0f} KiB), best of {args.repeat}")
+        baseline = None
+        for label, loop in LOOPS:
+            if loop(data) != expected:
+                raise SystemExit(f"{label} decoded a different text")
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                loop(data)
+                best = min(best, time.perf_counter() - start)
+            baseline = baseline or best
+            print(f"  {label:<34}{best * 1e9 / lines:>9.0f} ns/line {baseline / best:>6.2f}x")
+
+if __name__ == "__main__":
+    main()
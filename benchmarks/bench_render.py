@@ -0,0 +1,77 @@
+"""
+Formatted view rendering benchmark.
+
+Formats a large markdown response (10k lines by default) the way
+switch_to_html_view does and compares it with the previous approach:
+
+- per-tag: parse() with character offsets, one tag_add per tag using
+  "1.0+Nc" indexes that Tk resolves by walking the text from the start
+- batched: parse_indexed() with "line.column" indexes, one insert and one
+  tag_add per tag name
+
+Parsing is always measured; the Tk part needs a display and is skipped
+without one.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_render [--lines 10000] [--repeat 3]
+"""
+import argparse
+import time
+from src.core.markdown_parser import CustomMarkdownParser
+from benchmarks.bench_markdown import make_document
+
+def render_per_tag(widget, parser, text):
+    """Previous switch_to_html_view implementation"""
+    widget.delete("1.0", "end")
+    plain_text, tags = parser.parse(text)
+    widget.insert("end", plain_text)
+    for tag_name, start, end in sorted(tags, key=lambda x: x[1], reverse=True):
+        widget.tag_add(tag_name, f"1.0+{start}c", f"1.0+{end}c")
+
+def render_batched(widget, parser, text):
+    """Current switch_to_html_view implementation"""
+    widget.delete("1.0", "end")
+    plain_text, tag_ranges, _ = parser.parse_indexed(text)
+    widget.insert("1.0", plain_text, ())
+    for tag_name, indexes in tag_ranges.items():
+        widget.tag_add(tag_name, *indexes)
+
+def best_of(repeat, func, *args):
+    """Best wall-clock time of func(*args) in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    markdown_parser = CustomMarkdownParser()
+    text = make_document(args.lines)
+    print(f"Formatting {args.lines} lines ({len(text)} chars), best of {args.repeat} (ms)")
+    print(f"  {'parse (offsets)':<28}{best_of(args.repeat, markdown_parser.parse, text):>10.1f}")
+    print(f"  {'parse_indexed (line.col)':<28}{best_of(args.repeat, markdown_parser.parse_indexed, text):>10.1f}")
+
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:
+        print(f"  Tk rendering skipped: {e}")
+        return
+    root.withdraw()
+    widget = tk.Text(root)
+    for tag_name in ("bold", "italic", "bold_italic", "code", "code_block", "link", "bullet", "numbered"):
+        widget.tag_configure(tag_name, underline=True)
+
+    for name, func in (("per-tag tag_add", render_per_tag), ("batched tag_add", render_batched)):
+        ms = best_of(args.repeat, lambda: (func(widget, markdown_parser, text), root.update_idletasks()))
+        print(f"  {'render ' + name:<28}{ms:>10.1f}")
+    root.destroy()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+First-token latency with and without the model residency manager.
+
+Replays a user session against a mock Ollama that takes --load-delay-ms to
+load a model that is not in memory: the user selects a model, thinks for
+--think-ms, sends a request, then switches model, and later comes back after
+an idle period longer than keep_alive. Each request's time to first token is
+printed for both a session without preloading and one where the viewer's
+ModelResidency preloads on selection and renews the lease on activity.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_residency [--load-delay-ms 800] [--think-ms 1000] [--keep-alive 2]
+"""
+import argparse
+import asyncio
+import time
+from benchmarks.mock_ollama import MockOllama
+from src.core import config
+from src.core.async_llm_client import AsyncLLMClient
+from src.core.model_residency import ModelResidency
+
+async def first_token(client, model):
+    """Seconds until the first token of a request"""
+    start = time.perf_counter()
+    async for data in client.generate_stream(model, "hello"):
+        if data.get("response"):
+            elapsed = time.perf_counter() - start
+            break
+    return elapsed
+
+async def session(mock, preload, think, keep_alive):
+    """Run the scripted session and return [(step, ttft seconds)]"""
+    config.OLLAMA_URL = await mock.start()
+    config.MODEL_KEEP_ALIVE = keep_alive
+    mock.loaded.clear()
+    client = AsyncLLMClient()
+    residency = ModelResidency(client, asyncio.ensure_future, keep_alive=keep_alive, unload_previous=True)
+    results = []
+
+    async def step(name, model, wait, active=True):
+        if preload:
+            residency.select(model)
+        # The user is typing while waiting, which keeps the lease alive
+        for _ in range(int(wait / 0.25)):
+            await asyncio.sleep(0.25)
+            if preload and active:
+                residency.activity()
+        results.append((name, await first_token(client, model)))
+
+    await step("first send", "mock-small:latest", think)
+    await step("same model again", "mock-small:latest", think)
+    await step("after model switch", "mock-large:latest", think)
+    await step("active for 2x keep_alive", "mock-large:latest", keep_alive * 2)
+    await step("back after idle", "mock-large:latest", keep_alive * 2, active=False)
+    await client.close()
+    await mock.stop()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--load-delay-ms", type=float, default=800)
+    parser.add_argument("--think-ms", type=float, default=1000)
+    parser.add_argument("--keep-alive", type=float, default=2, help="seconds")
+    args = parser.parse_args()
+
+    runs = {}
+    for preload in (False, True):
+        mock = MockOllama(tokens=5, token_delay=0.001, load_delay=args.load_delay_ms / 1000)
+        runs[preload] = asyncio.run(session(mock, preload, args.think_ms / 1000, args.keep_alive))
+
+    print(f"{'step':<28} {'no preload ms':>14} {'residency ms':>13}")
+    for (name, cold), (_, warm) in zip(runs[False], runs[True]):
+        print(f"{name:<28} {cold * 1000:>14.1f} {warm * 1000:>13.1f}")
+
+if __name__ == "__main__":
+    main()
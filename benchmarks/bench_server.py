@@ -0,0 +1,106 @@
+"""
+Throughput benchmark of the local HTTP server (server.py).
+
+Starts a mock Ollama and a TransformServer in background threads, then
+sends --requests streaming /transform requests from --clients concurrent
+clients and prints requests/s, tokens/s and latency percentiles. The run is
+repeated with distinct texts (every request reaches the mock) and with a
+single repeated text (served from the shared cache).
+
+Usage (from the repository root):
+    python -m benchmarks.bench_server [--requests 200] [--clients 16] [--concurrency 4]
+                                      [--tokens 50] [--token-delay-ms 2]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+import aiohttp
+from aiohttp import web
+from benchmarks.mock_ollama import MockOllama
+from src.core import config
+from src.core.response_cache import ResponseCache
+from src.server import TransformServer
+
+def start_server(server):
+    """Serve a TransformServer from a background event loop and return its base url"""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="clipai-server", daemon=True).start()
+
+    async def start():
+        runner = web.AppRunner(server.app())
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        return f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/"
+
+    return asyncio.run_coroutine_threadsafe(start(), loop).result()
+
+async def run_load(url, requests, clients, same_text):
+    """Send the requests and return (wall seconds, latencies, first-token latencies, tokens)"""
+    latencies, first_tokens = [], []
+    tokens = 0
+    queue = asyncio.Queue()
+    for index in range(requests):
+        queue.put_nowait("the same text" if same_text else f"text number {index}")
+
+    async def client(session):
+        nonlocal tokens
+        while not queue.empty():
+            text = queue.get_nowait()
+            start = time.perf_counter()
+            first = None
+            async with session.post(url + "transform", json={"text": text, "transform": "Rephrase"}) as response:
+                async for line in response.content:
+                    data = json.loads(line)
+                    if data.get("response"):
+                        tokens += 1
+                        if first is None:
+                            first = time.perf_counter() - start
+            latencies.append(time.perf_counter() - start)
+            first_tokens.append(first or 0.0)
+
+    start = time.perf_counter()
+    async with aiohttp.ClientSession() as session:
+        await asyncio.gather(*(client(session) for _ in range(clients)))
+    return time.perf_counter() - start, latencies, first_tokens, tokens
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, default=4, help="server generation limit")
+    parser.add_argument("--tokens", type=int, default=50)
+    parser.add_argument("--token-delay-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    mock = MockOllama(args.tokens, args.token_delay_ms / 1000)
+    config.OLLAMA_URL = mock.start_in_thread()
+    config.TRANSFORMATION_PROMPTS = {"Rephrase": "Rephrase: \"{}\""}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = ResponseCache(os.path.join(tmp_dir, "cache.sqlite3"), 50 * 1024 * 1024, 64)
+        url = start_server(TransformServer(cache=cache, max_concurrency=args.concurrency))
+
+        print(f"{args.requests} requests, {args.clients} clients, server concurrency {args.concurrency}, "
+              f"{args.tokens} tokens every {args.token_delay_ms} ms")
+        print(f"{'run':<10} {'req/s':>8} {'tok/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'ttft p50':>9} {'ollama req':>11}")
+        for name, same_text in (("distinct", False), ("cached", True)):
+            before = mock.stats["requests"]
+            wall, latencies, first_tokens, tokens = asyncio.run(
+                run_load(url, args.requests, args.clients, same_text))
+            print(f"{name:<10} {args.requests / wall:>8.1f} {tokens / wall:>10.0f} "
+                  f"{statistics.median(latencies) * 1000:>8.1f} {percentile(latencies, 0.95) * 1000:>8.1f} "
+                  f"{statistics.median(first_tokens) * 1000:>9.1f} {mock.stats['requests'] - before:>11}")
+        print(f"peak concurrent generations at the mock: {mock.stats['peak_active']}")
+
+if __name__ == "__main__":
+    main()
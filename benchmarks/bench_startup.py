@@ -0,0 +1,74 @@
+"""
+Time-to-first-frame benchmark.
+
+Launches ClipAI several times with --exit-after-startup, collects the startup
+trace of each run and prints the median duration of every phase. The run
+fails (exit code 1) when the median time to first frame exceeds the budget,
+so it can guard against startup regressions. Needs a display.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_startup [--runs 5] [--budget-ms 800] [--eager]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+def run_once(eager):
+    """Start the application once and return its startup trace and the wall-clock time"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        trace_path = os.path.join(tmp_dir, "startup.json")
+        cmd = [sys.executable, "run.py", "--exit-after-startup", "--trace-output", trace_path]
+        if eager:
+            cmd.append("--eager-startup")
+        start = time.perf_counter()
+        subprocess.run(cmd, check=True)
+        wall = (time.perf_counter() - start) * 1000
+        with open(trace_path, "r", encoding="utf-8") as file:
+            trace = json.load(file)
+    return trace, wall
+
+def first_frame_ms(trace):
+    """Milliseconds from the first import until the first frame"""
+    total = 0.0
+    for name, ms in trace["phases"].items():
+        total += ms
+        if name == "first_frame":
+            break
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=800.0,
+                        help="maximum accepted median time to first frame")
+    parser.add_argument("--eager", action="store_true",
+                        help="measure the eager startup path (FAST_START disabled)")
+    args = parser.parse_args()
+
+    traces, walls = [], []
+    for _ in range(args.runs):
+        trace, wall = run_once(args.eager)
+        traces.append(trace)
+        walls.append(wall)
+
+    print(f"Startup benchmark ({'eager' if args.eager else 'fast start'}, {args.runs} runs, median ms)")
+    for name in traces[0]["phases"]:
+        print(f"  {name:<24}{statistics.median(t['phases'][name] for t in traces):>9.1f}")
+    for name in traces[0]["totals"]:
+        print(f"  {name + ' (total)':<24}{statistics.median(t['totals'].get(name, 0.0) for t in traces):>9.1f}")
+    first_frame = statistics.median(first_frame_ms(t) for t in traces)
+    print(f"  {'time to first frame':<24}{first_frame:>9.1f}")
+    print(f"  {'process wall time':<24}{statistics.median(walls):>9.1f}")
+
+    if first_frame > args.budget_ms:
+        print(f"FAIL: time to first frame {first_frame:.1f} ms exceeds the {args.budget_ms:.0f} ms budget")
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
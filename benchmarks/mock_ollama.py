@@ -0,0 +1,252 @@
+"""
+Minimal stand-in for the Ollama API, used by the benchmarks.
+
+Implements /api/tags, /api/generate and /api/chat with streamed NDJSON
+responses of a fixed number of tokens produced at a fixed rate, so that
+client-side overheads can be measured without a GPU. The response can be
+shaped further: `latency` delays the start of every response, `jitter`
+adds a random delay of up to that many seconds to each token, `token_chars`
+sets the size of each token and `text` replaces the generated tokens with
+a given text (split into tokens of token_chars characters), and `echo`
+answers every request with its own prompt instead. Failures are
+injected at random: `error_rate` of the requests get an HTTP 500 and
+`stream_error_rate` of the streams send an error line halfway through, like
+Ollama does. Random choices use `seed`, so runs are reproducible.
+
+Prompt evaluation is simulated like Ollama's prompt cache: each model
+remembers its last prompt and answer, only the part of a new prompt that
+does not start with them is evaluated (reported in prompt_eval_count, at
+4 characters per token), and that takes `prompt_eval_delay` seconds per
+token.
+
+The server counts the streams it serves, the ones abandoned by their client,
+the tokens it generated, the prompt tokens it evaluated and the errors it
+injected. Like Ollama, it keeps models "loaded" for keep_alive seconds
+after each request, and the first request to a model that is not loaded
+waits load_delay seconds; a request without prompt or messages only loads
+the model.
+
+Usage (from the repository root):
+    python -m benchmarks.mock_ollama [--port 11434] [--tokens 50] [--token-delay-ms 5] [--load-delay-ms 0]
+                                     [--latency-ms 0] [--jitter-ms 0] [--token-chars 8]
+                                     [--error-rate 0] [--stream-error-rate 0] [--seed 0]
+                                     [--prompt-eval-delay-ms 0] [--echo]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from aiohttp import web
+
+def ndjson_line(data):
+    """One NDJSON line written the way Ollama does: compact separators, non-ASCII text unescaped"""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+class MockOllama:
+    """Fake Ollama server streaming `tokens` tokens, one every `token_delay` seconds"""
+
+    def __init__(self, tokens=50, token_delay=0.005, models=("mock-small:latest", "mock-large:latest"),
+                 load_delay=0.0, latency=0.0, jitter=0.0, token_chars=None, text=None,
+                 error_rate=0.0, stream_error_rate=0.0, seed=0, prompt_eval_delay=0.0, echo=False):
+        self.token_delay = token_delay
+        self.models = list(models)
+        self.load_delay = load_delay
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.stream_error_rate = stream_error_rate
+        self.prompt_eval_delay = prompt_eval_delay
+        self.echo = echo
+        self.random = random.Random(seed)
+        self.token_chars = token_chars or 4
+        if text is not None:
+            self.pieces = self.split_tokens(text)
+        elif token_chars:
+            self.pieces = [f"t{index}".ljust(token_chars - 1, "x") + " " for index in range(tokens)]
+        else:
+            self.pieces = [f"token{index} " for index in range(tokens)]
+        self.tokens = len(self.pieces)
+        self.loaded = {}  # model -> time at which it is unloaded
+        self.prompt_cache = {}  # model -> last prompt followed by its answer
+        self.stats = {"requests": 0, "active": 0, "peak_active": 0, "completed": 0, "abandoned": 0,
+                      "loads": 0, "unloads": 0, "errors": 0, "tokens": 0, "prompt_tokens": 0}
+        self._runner = None
+        self._loop = None
+
+    def split_tokens(self, text):
+        """Split a text into tokens of token_chars characters"""
+        return [text[index:index + self.token_chars] for index in range(0, len(text), self.token_chars)]
+
+    def response_text(self):
+        """The full text of every generated response"""
+        return "".join(self.pieces)
+
+    def _pieces(self, body):
+        """The tokens of the response to a request"""
+        if not self.echo:
+            return self.pieces
+        if body.get("messages"):
+            return self.split_tokens(body["messages"][-1]["content"])
+        return self.split_tokens(body["prompt"])
+
+    def is_loaded(self, model):
+        expires = self.loaded.get(model)
+        return expires is not None and expires > time.monotonic()
+
+    async def _load(self, body):
+        """Simulate loading the requested model and apply its keep_alive; returns the load time"""
+        model = body.get("model")
+        keep_alive = body.get("keep_alive", 300)
+        keep_alive = 300 if isinstance(keep_alive, str) else keep_alive
+        load_duration = 0.0
+        if not self.is_loaded(model):
+            self.stats["loads"] += 1
+            load_duration = self.load_delay
+            if load_duration:
+                await asyncio.sleep(load_duration)
+        if keep_alive == 0:
+            self.loaded.pop(model, None)
+            self.stats["unloads"] += 1
+        else:
+            self.loaded[model] = time.monotonic() + (keep_alive if keep_alive > 0 else 1e9)
+        return load_duration
+
+    def _evaluate_prompt(self, body):
+        """Number of prompt tokens that are not in the prompt cache of the model"""
+        if body.get("messages"):
+            prompt = "".join(f"<{message['role']}>{message['content']}" for message in body["messages"])
+        else:
+            prompt = body.get("prompt", "")
+        cached = os.path.commonprefix([self.prompt_cache.get(body.get("model"), ""), prompt])
+        response = "".join(self._pieces(body))
+        answer = f"<assistant>{response}" if body.get("messages") else response
+        self.prompt_cache[body.get("model")] = prompt + answer
+        count = max(1, (len(prompt) - len(cached)) // 4)
+        self.stats["prompt_tokens"] += count
+        return count
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get("/api/tags", self.handle_tags)
+        app.router.add_post("/api/generate", self.handle_generate)
+        app.router.add_post("/api/chat", self.handle_chat)
+        return app
+
+    async def handle_tags(self, request):
+        return web.json_response({"models": [{"name": name} for name in self.models]})
+
+    async def handle_generate(self, request):
+        return await self._stream(request, lambda token: {"response": token})
+
+    async def handle_chat(self, request):
+        return await self._stream(request, lambda token: {"message": {"role": "assistant", "content": token}})
+
+    async def _stream(self, request, make_chunk):
+        body = await request.json()
+        if not body.get("prompt") and not body.get("messages"):
+            load_duration = await self._load(body)
+            return web.json_response({"model": body.get("model"), "response": "", "done": True,
+                                      "done_reason": "unload" if body.get("keep_alive") == 0 else "load",
+                                      "load_duration": int(load_duration * 1e9)})
+        load_duration = await self._load(body)
+        self.stats["requests"] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.random.random() < self.error_rate:
+            self.stats["errors"] += 1
+            return web.json_response({"error": "mock failure"}, status=500)
+        prompt_eval_count = self._evaluate_prompt(body)
+        if self.prompt_eval_delay:
+            await asyncio.sleep(prompt_eval_count * self.prompt_eval_delay)
+        pieces = self._pieces(body)
+        fail_at = len(pieces) // 2 if self.random.random() < self.stream_error_rate else None
+        self.stats["active"] += 1
+        self.stats["peak_active"] = max(self.stats["peak_active"], self.stats["active"])
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+        created_at = time.strftime("%Y-%m-%dT%H:%M:%S.000000Z", time.gmtime())
+        try:
+            for index, piece in enumerate(pieces):
+                if index == fail_at:
+                    self.stats["errors"] += 1
+                    await response.write(ndjson_line({"error": "mock stream failure"}))
+                    return response
+                delay = self.token_delay + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+                if delay:
+                    await asyncio.sleep(delay)
+                # Same field order as Ollama, the text of the token comes right before "done"
+                chunk = {"model": body.get("model"), "created_at": created_at, **make_chunk(piece), "done": False}
+                await response.write(ndjson_line(chunk))
+                self.stats["tokens"] += 1
+            final = {"model": body.get("model"), "created_at": created_at, **make_chunk("")}
+            final.update({
+                "done": True, "done_reason": "stop",
+                "total_duration": int(len(pieces) * self.token_delay * 1e9),
+                "load_duration": int(load_duration * 1e9),
+                "prompt_eval_count": prompt_eval_count,
+                "prompt_eval_duration": int(prompt_eval_count * self.prompt_eval_delay * 1e9) or 1000000,
+                "eval_count": len(pieces),
+                "eval_duration": int(len(pieces) * self.token_delay * 1e9)
+            })
+            await response.write(ndjson_line(final))
+            self.stats["completed"] += 1
+        except ConnectionResetError:
+            self.stats["abandoned"] += 1
+        except asyncio.CancelledError:
+            self.stats["abandoned"] += 1
+            raise
+        finally:
+            self.stats["active"] -= 1
+        return response
+
+    async def start(self, host="127.0.0.1", port=0):
+        """Start serving on the running event loop and return the base API url"""
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{port}/api/"
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def start_in_thread(self, host="127.0.0.1", port=0):
+        """Serve from a background event loop thread and return the base API url"""
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="mock-ollama", daemon=True).start()
+        return asyncio.run_coroutine_threadsafe(self.start(host, port), self._loop).result()
+
+    def stop_in_thread(self):
+        """Stop a server started with start_in_thread and its event loop"""
+        asyncio.run_coroutine_threadsafe(self.stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--tokens", type=int, default=50)
+    parser.add_argument("--token-delay-ms", type=float, default=5.0)
+    parser.add_argument("--load-delay-ms", type=float, default=0.0)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--token-chars", type=int)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--stream-error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--prompt-eval-delay-ms", type=float, default=0.0)
+    parser.add_argument("--echo", action="store_true")
+    args = parser.parse_args()
+    mock = MockOllama(args.tokens, args.token_delay_ms / 1000, load_delay=args.load_delay_ms / 1000,
+                      latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000, token_chars=args.token_chars,
+                      error_rate=args.error_rate, stream_error_rate=args.stream_error_rate, seed=args.seed,
+                      prompt_eval_delay=args.prompt_eval_delay_ms / 1000, echo=args.echo)
+    web.run_app(mock.app(), host="127.0.0.1", port=args.port)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""
+End-to-end benchmark suite on the mock Ollama server.
+
+Runs every scenario against benchmarks/mock_ollama.py, so no GPU or Ollama
+installation is needed:
+
+- stream_sync / stream_async: tokens per second a single stream delivers
+  through LLMClient.stream (as in batch mode) and AsyncLLMClient when the
+  server is not the limit
+- stream_concurrent: total tokens per second of concurrent async streams
+- errors: share of injected server failures (HTTP 500 and error lines in
+  the stream) that surface as exceptions
+- parser: markdown parsing time of the streamed response
+- memory: peak Python allocations while streaming a large response (the
+  mock runs in the same process and is included)
+- viewer: a hidden ClipboardViewer window transforming a text, with the
+  time to first drawn token, total time, render lag and the time spent in
+  the output update handler (needs a display, skipped without one)
+
+Every metric is the median of --repeat runs. --output writes the results as
+JSON; --baseline compares them with an earlier report and exits with status
+1 if a metric got worse by more than --tolerance, so performance
+regressions can be caught in CI.
+
+Usage (from the repository root):
+    python -m benchmarks.suite [--repeat 3] [--only stream_async parser] [--output report.json]
+                               [--baseline previous.json] [--tolerance 0.15]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from benchmarks.bench_markdown import make_document
+from benchmarks.mock_ollama import MockOllama
+from src.core import config
+from src.core.async_llm_client import AsyncLLMClient
+from src.core.llm_client import LLMClient
+from src.core.markdown_parser import CustomMarkdownParser
+from src.core.stream_buffer import StreamBuffer
+
+MODEL = "mock-small:latest"
+
+class Skipped(Exception):
+    """A scenario that cannot run in this environment"""
+
+def serve(mock):
+    """Start mock in a background thread and point the clients at it"""
+    config.OLLAMA_URL = mock.start_in_thread()
+    return mock
+
+def bench_stream_sync(args):
+    mock = serve(MockOllama(tokens=args.tokens, token_delay=0))
+    try:
+        start = time.perf_counter()
+        tokens = 0
+        # The path of batch mode: buffered reads decoded by iter_ndjson
+        for data in LLMClient.stream(MODEL, "benchmark"):
+            if data.get("response"):
+                tokens += 1
+        return {"tokens_per_s": (tokens / (time.perf_counter() - start), "higher", "tok/s")}
+    finally:
+        LLMClient.close_session()
+        mock.stop_in_thread()
+
+async def consume(client, prompt):
+    """Read a whole stream and return the number of tokens"""
+    tokens = 0
+    async for data in client.generate_stream(MODEL, prompt):
+        if data.get("response"):
+            tokens += 1
+    return tokens
+
+def bench_stream_async(args):
+    mock = serve(MockOllama(tokens=args.tokens, token_delay=0))
+
+    async def run():
+        client = AsyncLLMClient()
+        try:
+            start = time.perf_counter()
+            tokens = await consume(client, "benchmark")
+            return tokens / (time.perf_counter() - start)
+        finally:
+            await client.close()
+
+    try:
+        return {"tokens_per_s": (asyncio.run(run()), "higher", "tok/s")}
+    finally:
+        mock.stop_in_thread()
+
+def bench_stream_concurrent(args):
+    mock = serve(MockOllama(tokens=args.tokens // 4, token_delay=0.001, jitter=0.001))
+
+    async def run():
+        client = AsyncLLMClient()
+        try:
+            start = time.perf_counter()
+            # Distinct prompts, so the streams are not shared by the single-flight layer
+            counts = await asyncio.gather(*(consume(client, f"benchmark {index}") for index in range(args.streams)))
+            return sum(counts) / (time.perf_counter() - start)
+        finally:
+            await client.close()
+
+    try:
+        return {"tokens_per_s": (asyncio.run(run()), "higher", "tok/s")}
+    finally:
+        mock.stop_in_thread()
+
+def bench_errors(args):
+    mock = serve(MockOllama(tokens=20, token_delay=0, error_rate=0.25, stream_error_rate=0.25, seed=1))
+
+    async def run():
+        client = AsyncLLMClient()
+        surfaced = 0
+        try:
+            for index in range(40):
+                try:
+                    await consume(client, f"request {index}")
+                except Exception:
+                    surfaced += 1
+        finally:
+            await client.close()
+        return surfaced
+
+    try:
+        surfaced = asyncio.run(run())
+        injected = mock.stats["errors"]
+        return {"surfaced_ratio": (surfaced / injected if injected else 1.0, "higher", "")}
+    finally:
+        mock.stop_in_thread()
+
+def bench_parser(args):
+    text = make_document(args.lines)
+    parser = CustomMarkdownParser()
+    start = time.perf_counter()
+    parser.parse_indexed(text)
+    return {"parse_ms": ((time.perf_counter() - start) * 1000, "lower", "ms")}
+
+def bench_memory(args):
+    text = make_document(args.lines)
+    mock = serve(MockOllama(token_delay=0, text=text, token_chars=16))
+
+    async def run():
+        client = AsyncLLMClient()
+        buffer = StreamBuffer()
+        try:
+            async for data in client.generate_stream(MODEL, "benchmark"):
+                buffer.append(data.get("response", ""))
+            buffer.text()
+        finally:
+            await client.close()
+
+    try:
+        tracemalloc.start()
+        asyncio.run(run())
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return {"peak_mb": (peak / 1024 / 1024, "lower", "MB"),
+                "peak_per_response_byte": (peak / len(text), "lower", "")}
+    finally:
+        mock.stop_in_thread()
+
+def run_viewer(root, viewer, text, timeout=60.0):
+    """Transform text in the viewer, updating Tk until the stream ends; returns the timings in ms"""
+    from src.ui.dispatcher import UIEvent
+    handler_seconds = []
+
+    def timed_render(payload=None):
+        start = time.perf_counter()
+        viewer.render_stream(payload)
+        handler_seconds.append(time.perf_counter() - start)
+
+    viewer.ui.register(UIEvent.OUTPUT, timed_render, coalesce=True)
+    viewer.update_clipboard_content(text)
+    root.update()
+
+    start = time.perf_counter()
+    first_drawn = None
+    viewer.start_qa_llm()
+    while viewer.llm_future is not None:
+        if time.perf_counter() - start > timeout:
+            raise TimeoutError("the viewer did not finish the transformation")
+        root.update()
+        if first_drawn is None and viewer.out_text_box.get("1.0", "end").strip():
+            first_drawn = time.perf_counter()
+        time.sleep(0.001)
+    total = time.perf_counter() - start
+
+    record = list(viewer.metrics_log.records())[-1]
+    return {
+        "first_drawn_ms": ((first_drawn or time.perf_counter()) - start) * 1000,
+        "total_ms": total * 1000,
+        "render_lag_max_ms": record["render_lag_max_ms"] or 0.0,
+        "render_handler_ms": sum(handler_seconds) * 1000,
+        "render_calls": len(handler_seconds)
+    }
+
+def bench_viewer(args):
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:
+        raise Skipped(f"no display ({e})")
+    root.withdraw()
+    mock = serve(MockOllama(token_delay=0.0005, text=make_document(args.lines // 10), token_chars=8))
+    data_dir = tempfile.mkdtemp(prefix="clipai-bench-")
+    config.DATA_DIR = data_dir
+    config.CACHE_ENABLED = False
+    config.METRICS_ENABLED = True
+    config.MODEL_PRELOAD = False
+    config.FAST_START = True  # Keeps the constructor from reading the real clipboard
+    from src.ui.clipboard_viewer import ClipboardViewer
+    viewer = ClipboardViewer(root)
+    try:
+        values = run_viewer(root, viewer, "Benchmark input text.")
+    finally:
+        viewer.close()
+        root.destroy()
+        mock.stop_in_thread()
+    units = {"render_calls": ("lower", "")}
+    return {name: (value,) + units.get(name, ("lower", "ms")) for name, value in values.items()}
+
+SCENARIOS = {
+    "stream_sync": bench_stream_sync,
+    "stream_async": bench_stream_async,
+    "stream_concurrent": bench_stream_concurrent,
+    "errors": bench_errors,
+    "parser": bench_parser,
+    "memory": bench_memory,
+    "viewer": bench_viewer
+}
+
+def run_suite(args):
+    """Run the selected scenarios and return {metric: {"value", "better", "unit"}} and the skipped ones"""
+    results, skipped = {}, {}
+    for name in args.only or SCENARIOS:
+        runs = []
+        try:
+            for _ in range(args.repeat):
+                runs.append(SCENARIOS[name](args))
+        except Skipped as e:
+            skipped[name] = str(e)
+            continue
+        for metric, (_, better, unit) in runs[0].items():
+            value = statistics.median(run[metric][0] for run in runs)
+            results[f"{name}.{metric}"] = {"value": round(value, 4), "better": better, "unit": unit}
+    return results, skipped
+
+def compare(results, baseline, tolerance):
+    """Metrics that got worse than in baseline by more than tolerance: [(metric, old, new)]"""
+    regressions = []
+    for metric, result in results.items():
+        previous = baseline.get(metric)
+        if previous is None or not previous["value"]:
+            continue
+        change = (result["value"] - previous["value"]) / abs(previous["value"])
+        if (change if result["better"] == "lower" else -change) > tolerance:
+            regressions.append((metric, previous["value"], result["value"]))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="+", choices=sorted(SCENARIOS))
+    parser.add_argument("--tokens", type=int, default=5000, help="tokens per throughput stream")
+    parser.add_argument("--streams", type=int, default=8, help="concurrent streams")
+    parser.add_argument("--lines", type=int, default=5000, help="lines of the markdown response")
+    parser.add_argument("--output", metavar="PATH", help="write the report as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="report to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative change")
+    args = parser.parse_args()
+
+    results, skipped = run_suite(args)
+    print(f"{'metric':<40} {'median':>12}  unit")
+    for metric, result in results.items():
+        print(f"{metric:<40} {result['value']:>12.2f}  {result['unit']}")
+    for name, reason in skipped.items():
+        print(f"{name:<40} {'skipped':>12}  {reason}")
+
+    if args.output:
+        report = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+            "results": results
+        }
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for metric, old, new in regressions:
+            print(f"REGRESSION {metric}: {old:.2f} -> {new:.2f}")
+        if regressions:
+            return 1
+        print(f"No regression beyond {args.tolerance:.0%} compared with {os.path.basename(args.baseline)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from src.core import config
+from src.core.cancellation import CancelToken
+from src.core.llm_client import LLMClient
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Apply a ClipAI transformation to files or NDJSON records without the GUI"
+    )
+    parser.add_argument("inputs", nargs="+", metavar="INPUT",
+                        help="files or glob patterns (** is recursive); '-' reads NDJSON records "
+                             "{\"id\", \"text\", optional \"transform\" and \"model\"} from stdin")
+    parser.add_argument("-t", "--transform",
+                        help="name of the transformation in prompts.json "
+                             "(required unless every stdin record has a \"transform\")")
+    parser.add_argument("-m", "--model", help="Ollama model (default: DEFAULT_MODEL)")
+    parser.add_argument("-j", "--concurrency", type=int, default=4,
+                        help="number of requests sent at the same time (default: 4)")
+    parser.add_argument("-o", "--output", metavar="PATH",
+                        help="append the NDJSON results to PATH instead of printing them")
+    parser.add_argument("--checkpoint", metavar="PATH",
+                        help="record finished items in PATH and skip the items it already lists "
+                             "for the same transformation and model")
+    return parser.parse_args(argv)
+
+def iter_items(inputs, stdin=None):
+    """Yield (id, text or None, transform, model) for every input; file texts are read by the workers"""
+    for pattern in inputs:
+        if pattern == "-":
+            for line_number, line in enumerate(stdin or sys.stdin, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if "text" not in record:
+                    raise ValueError(f"stdin line {line_number} has no \"text\" field")
+                yield (str(record.get("id", line_number)), record["text"],
+                       record.get("transform"), record.get("model"))
+            continue
+        if not glob.has_magic(pattern):
+            yield pattern, None, None, None  # A missing file is reported in its result record
+            continue
+        for path in sorted(glob.glob(pattern, recursive=True)):
+            if os.path.isfile(path):
+                yield path, None, None, None
+
+def checkpoint_key(item_id, transform, model):
+    """Checkpoint line of an item, which is only done for the same transformation and model"""
+    return json.dumps([item_id, transform, model], ensure_ascii=False)
+
+def load_checkpoint(path):
+    """Return the checkpoint keys recorded in a checkpoint file"""
+    if not path or not os.path.isfile(path):
+        return set()
+    with open(path, "r", encoding="utf-8") as file:
+        return {line.rstrip("\n") for line in file if line.strip()}
+
+def transform_item(item_id, text, prompt_template, model, queued_at, cancel_token=None):
+    """Run one item through the LLM and return its result record"""
+    started = time.perf_counter()
+    record = {"id": item_id, "model": model, "ok": False}
+    first_token = None
+    try:
+        if text is None:
+            with open(item_id, "r", encoding="utf-8") as file:
+                text = file.read()
+        parts = []
+        final = None
+        # Read to the end of the stream rather than stopping at the done line, so that its
+        # connection goes back to the pool for the next item
+        for data in LLMClient.stream(model, prompt_template.format(text), cancel_token):
+            if "error" in data:
+                raise Exception(data["error"])
+            if first_token is None and data.get("response"):
+                first_token = time.perf_counter()
+            parts.append(data.get("response", ""))
+            if data.get("done", False):
+                final = data
+        if final is None:
+            raise Exception("The response ended before the model finished")
+        record["eval_count"] = final.get("eval_count")
+        record["response"] = "".join(parts)
+        record["ok"] = True
+    except Exception as e:
+        record["error"] = str(e)
+
+    finished = time.perf_counter()
+    record["timing"] = {
+        "queued_ms": round((started - queued_at) * 1000, 1),
+        "first_token_ms": round((first_token - started) * 1000, 1) if first_token else None,
+        "total_ms": round((finished - started) * 1000, 1)
+    }
+    return record
+
+def run_batch(args, stdin=None, stdout=None):
+    """Transform all items, streaming result records as they finish; returns the number of failures"""
+    if args.transform is not None and args.transform not in config.TRANSFORMATION_PROMPTS:
+        raise ValueError(f"Unknown transformation: {args.transform}")
+    default_model = args.model or config.DEFAULT_MODEL
+    done_keys = load_checkpoint(args.checkpoint)
+    output = open(args.output, "a", encoding="utf-8") if args.output else (stdout or sys.stdout)
+    checkpoint = open(args.checkpoint, "a", encoding="utf-8") if args.checkpoint else None
+    failures = 0
+    concurrency = max(1, args.concurrency)
+
+    def resolve(item):
+        """Apply the defaults to an item and add the error that keeps it from being sent, if any"""
+        item_id, text, transform, model = item
+        transform = transform or args.transform
+        error = None
+        if transform is None:
+            error = f"No transformation for {item_id}: pass --transform or add a \"transform\" field"
+        elif transform not in config.TRANSFORMATION_PROMPTS:
+            error = f"Unknown transformation: {transform}"
+        return item_id, text, transform, model or default_model, error
+
+    def submit(item):
+        item_id, text, transform, model, error = item
+        if error is not None:
+            # Reported in its result record like a failed generation, the other items still run
+            future = Future()
+            future.set_result({"id": item_id, "model": model, "ok": False, "error": error})
+        else:
+            future = executor.submit(transform_item, item_id, text, config.TRANSFORMATION_PROMPTS[transform],
+                                     model, time.perf_counter(), cancel_token)
+        pending[future] = transform
+
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    pending = {}
+    cancel_token = CancelToken()
+    try:
+        items = (item for item in map(resolve, iter_items(args.inputs, stdin))
+                 if checkpoint_key(item[0], item[2], item[3]) not in done_keys)
+        # Keep a bounded window of submitted items so huge inputs are never read all at once
+        for item in items:
+            submit(item)
+            if len(pending) < concurrency * 2:
+                continue
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            failures += write_results(finished, pending, output, checkpoint)
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            failures += write_results(finished, pending, output, checkpoint)
+    finally:
+        for future in pending:
+            future.cancel()
+        # Abort the requests still running (after an interrupt or an error) instead of
+        # waiting for their generations to finish at interpreter exit
+        cancel_token.cancel()
+        executor.shutdown(wait=False)
+        if checkpoint is not None:
+            checkpoint.close()
+        if args.output:
+            output.close()
+    return failures
+
+def write_results(finished, pending, output, checkpoint):
+    """Write the records of finished futures and checkpoint the successful ones"""
+    failures = 0
+    for future in finished:
+        record = future.result()
+        record["transform"] = pending.pop(future)
+        output.write(json.dumps(record, ensure_ascii=False) + "\n")
+        output.flush()
+        if record["ok"]:
+            if checkpoint is not None:
+                checkpoint.write(checkpoint_key(record["id"], record["transform"], record["model"]) + "\n")
+                checkpoint.flush()
+        else:
+            failures += 1
+    return failures
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        config.load_configs()
+        failures = run_batch(args)
+    except KeyboardInterrupt:
+        # Finished items are already in the output and the checkpoint, rerun to resume
+        print("Interrupted", file=sys.stderr)
+        return 130
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        LLMClient.close_session()
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+import asyncio
+import json
+from typing import AsyncIterator, Dict, List
+from . import config
+from .ndjson import NDJSONDecoder
+from .single_flight import SingleFlight
+
+class AsyncLLMClient:
+    """
+    Asyncio client for the Ollama API.
+
+    A single instance serves any number of concurrent streams on one event
+    loop through a shared keep-alive connection pool. Streams are async
+    generators: cancelling the task that consumes one closes its connection
+    at once, so Ollama stops generating for it.
+
+    Identical requests made while one is still streaming share it through
+    SingleFlight (unless SINGLE_FLIGHT is disabled): the later requester gets
+    the chunks produced so far, then follows the same stream live. A shared
+    stream is kept for a short grace period after its last requester left,
+    unless that requester passed a cancel_token and cancelled it.
+    """
+
+    def __init__(self):
+        self._session = None
+        self._flights = SingleFlight(config.SINGLE_FLIGHT_GRACE)
+
+    def _get_session(self):
+        """Return the shared aiohttp session, creating it on first use (must run on the event loop)"""
+        if self._session is None or self._session.closed:
+            # aiohttp is by far the slowest import, load it only when a request is made
+            import aiohttp
+            connector = aiohttp.TCPConnector(limit=config.HTTP_POOL_SIZE)
+            timeout = aiohttp.ClientTimeout(
+                total=None,
+                sock_connect=config.CONNECT_TIMEOUT,
+                sock_read=config.FIRST_BYTE_TIMEOUT
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self._session
+
+    async def close(self) -> None:
+        """Close the session and its pooled connections"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def fetch_models(self) -> List[str]:
+        """Fetch available models from Ollama API"""
+        try:
+            async with self._get_session().get(config.OLLAMA_URL + "tags") as response:
+                if response.status != 200:
+                    raise Exception(f"Failed to fetch models: {response.status}")
+                response_tmp = await response.json()
+                model_list = [model['name'] for model in response_tmp['models']]
+                return [model for model in model_list if "embed" not in model]
+        except Exception as e:
+            raise Exception(f"Error fetching models: {str(e)}")
+
+    async def load_model(self, model: str, keep_alive=None) -> Dict:
+        """Load a model into memory without generating anything, returns Ollama's timing fields"""
+        payload = {"model": model, "keep_alive": config.MODEL_KEEP_ALIVE if keep_alive is None else keep_alive,
+                   "stream": False}
+        async with self._get_session().post(config.OLLAMA_URL + "generate", json=payload) as response:
+            if response.status != 200:
+                raise Exception(f"Failed to load {model}: {response.status}")
+            return await response.json()
+
+    async def unload_model(self, model: str) -> None:
+        """Ask Ollama to release a model from memory"""
+        await self.load_model(model, keep_alive=0)
+
+    def generate_stream(self, model: str, prompt: str, cancel_token=None, **options) -> AsyncIterator[Dict]:
+        """Stream the chunks of a /api/generate response"""
+        payload = {"model": model, "prompt": prompt, "keep_alive": config.MODEL_KEEP_ALIVE, "stream": True}
+        payload.update(options)
+        return self._stream("generate", payload, cancel_token)
+
+    def chat_stream(self, model: str, messages: List[Dict], cancel_token=None, **options) -> AsyncIterator[Dict]:
+        """Stream the chunks of a /api/chat response"""
+        payload = {"model": model, "messages": messages, "keep_alive": config.MODEL_KEEP_ALIVE, "stream": True}
+        payload.update(options)
+        return self._stream("chat", payload, cancel_token)
+
+    def _stream(self, endpoint: str, payload: Dict, cancel_token=None) -> AsyncIterator[Dict]:
+        """Stream a request, sharing it with identical requests that are in flight"""
+        if not config.SINGLE_FLIGHT:
+            return self._request(endpoint, payload)
+        key = endpoint + json.dumps(payload, sort_keys=True)
+        return self._flights.subscribe(key, lambda: self._request(endpoint, payload), cancel_token)
+
+    async def _request(self, endpoint: str, payload: Dict) -> AsyncIterator[Dict]:
+        """POST to an endpoint and yield each decoded NDJSON line"""
+        try:
+            response = await self._get_session().post(config.OLLAMA_URL + endpoint, json=payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            raise Exception(f"Error in LLM request: {str(e)}")
+
+        finished = False
+        decoder = NDJSONDecoder()
+        try:
+            if response.status != 200:
+                raise Exception(f"Error in LLM request: LLM request failed: {response.status}")
+            while True:
+                # Read whatever has arrived, which may hold several lines, instead of line by line
+                try:
+                    chunk = await asyncio.wait_for(response.content.readany(), config.STREAM_IDLE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    raise Exception("Error in LLM request: stream idle timeout")
+                objects = decoder.feed(chunk) if chunk else decoder.close()
+                for data in objects:
+                    if "error" in data:
+                        raise Exception(f"Error in LLM request: {data['error']}")
+                    if data.get("done", False):
+                        # Drain the end of the stream so the connection goes back to the pool
+                        # even if the consumer stops iterating after this chunk
+                        await response.content.read()
+                        finished = True
+                        response.release()
+                        yield data
+                        return
+                    yield data
+                if not chunk:
+                    finished = True
+                    break
+        finally:
+            if not finished:
+                # Closing (rather than releasing) drops the socket, so an abandoned
+                # generation does not keep running on the server
+                response.close()
+            else:
+                response.release()
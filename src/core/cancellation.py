@@ -0,0 +1,55 @@
+import threading
+from typing import Callable, List
+
+class GenerationCancelled(Exception):
+    """Raised by a generation whose cancel token was cancelled"""
+
+class CancelToken:
+    """
+    Cancellation signal shared by the requester of a generation and the code running it.
+
+    cancel() may be called from any thread. Code that holds a resource which
+    must be released at once (such as a socket a worker thread is blocked
+    on) registers a callback with on_cancel(); the callbacks run in the
+    thread that cancels, right away.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def cancel(self) -> None:
+        """Cancel, running the registered callbacks once"""
+        with self._lock:
+            if self._cancelled:
+                return
+            self._cancelled = True
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass  # Releasing one resource must not keep the others from being released
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Run callback on cancellation (now if already cancelled); returns a function unregistering it"""
+        with self._lock:
+            if not self._cancelled:
+                self._callbacks.append(callback)
+                return lambda: self._remove(callback)
+        callback()
+        return lambda: None
+
+    def raise_if_cancelled(self) -> None:
+        if self._cancelled:
+            raise GenerationCancelled("Generation cancelled")
+
+    def _remove(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
@@ -0,0 +1,104 @@
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+from . import config
+from .chunking import estimate_tokens
+
+class ChatSession:
+    """
+    Multi-turn conversation sent to Ollama's /api/chat.
+
+    Every turn sends the earlier turns again, unchanged, so Ollama finds
+    them in the prompt cache of the loaded model and only evaluates the new
+    message. When the conversation would exceed max_tokens (estimated), the
+    oldest turns are dropped until it fits in keep_tokens: trimming well
+    below the budget changes the start of the conversation, and so
+    invalidates the cache, only once every few turns. With summarize the
+    dropped turns are first condensed by the model into a summary that is
+    sent as a system message ahead of the kept turns.
+
+    A turn is only added once its response is complete; a stopped turn
+    leaves the conversation as it was.
+    """
+
+    def __init__(self, max_tokens: int = None, keep_tokens: int = None, summarize: bool = None):
+        self.max_tokens = max_tokens or config.CHAT_CONTEXT_TOKENS
+        self.keep_tokens = keep_tokens or int(self.max_tokens * config.CHAT_TRIM_TARGET)
+        self.summarize = config.CHAT_SUMMARIZE if summarize is None else summarize
+        self.turns: List[Tuple[str, str]] = []
+        self.summary = ""
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+    def reset(self) -> None:
+        """Start a new conversation"""
+        self.turns = []
+        self.summary = ""
+
+    def tokens(self, text: str = "", turns: List[Tuple[str, str]] = None) -> int:
+        """Estimated size of the conversation (or of the given turns) followed by text"""
+        turns = self.turns if turns is None else turns
+        size = estimate_tokens(self.summary) + estimate_tokens(text)
+        return size + sum(estimate_tokens(user) + estimate_tokens(answer) for user, answer in turns)
+
+    def messages(self, text: str, turns: List[Tuple[str, str]] = None, summary: str = None) -> List[Dict]:
+        """The messages sending text as the next turn"""
+        turns = self.turns if turns is None else turns
+        summary = self.summary if summary is None else summary
+        messages = []
+        if summary:
+            messages.append({"role": "system", "content": config.CHAT_SUMMARY_INTRO + summary})
+        for user, answer in turns:
+            messages.append({"role": "user", "content": user})
+            messages.append({"role": "assistant", "content": answer})
+        messages.append({"role": "user", "content": text})
+        return messages
+
+    def trim(self, text: str) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+        """The turns kept and the turns dropped so that text fits in the budget"""
+        kept = list(self.turns)
+        if self.tokens(text, kept) <= self.max_tokens:
+            return kept, []
+        dropped = []
+        while kept and self.tokens(text, kept) > self.keep_tokens:
+            dropped.append(kept.pop(0))
+        return kept, dropped
+
+    async def _summarize(self, client, model: str, dropped: List[Tuple[str, str]], cancel_token=None) -> str:
+        """The summary with the dropped turns folded in"""
+        lines = [config.CHAT_SUMMARY_INTRO + self.summary] if self.summary else []
+        for user, answer in dropped:
+            lines.append(f"User: {user}")
+            lines.append(f"Assistant: {answer}")
+        parts = []
+        async for data in client.generate_stream(model, config.CHAT_SUMMARY_PROMPT.format("\n".join(lines)),
+                                                 cancel_token=cancel_token):
+            parts.append(data.get("response", ""))
+            if data.get("done", False):
+                break
+        return "".join(parts).strip()
+
+    async def stream(self, client, model: str, text: str, cancel_token=None,
+                     on_summarize: Optional[Callable[[], None]] = None) -> AsyncIterator[Dict]:
+        """
+        Send text as the next turn and stream the answer as /api/generate-style
+        chunks (the content is in "response"); the turn is added once done.
+        """
+        kept, dropped = self.trim(text)
+        summary = self.summary
+        if dropped and self.summarize:
+            if on_summarize is not None:
+                on_summarize()
+            summary = await self._summarize(client, model, dropped, cancel_token)
+
+        parts = []
+        async for data in client.chat_stream(model, self.messages(text, kept, summary), cancel_token=cancel_token):
+            content = data.get("message", {}).get("content", "")
+            parts.append(content)
+            chunk = dict(data)
+            chunk["response"] = content
+            if data.get("done", False):
+                self.turns = kept + [(text, "".join(parts))]
+                self.summary = summary
+                yield chunk
+                return
+            yield chunk
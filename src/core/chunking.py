@@ -0,0 +1,226 @@
+import asyncio
+import math
+import re
+from typing import AsyncIterator, Callable, Dict, List, Optional
+from . import config
+from .metrics import add_timings
+
+PARAGRAPH_PATTERN = re.compile(r'\n\s*\n')
+SENTENCE_PATTERN = re.compile(r'(?<=[.!?;:。！？])\s+')
+WORD_PATTERN = re.compile(r'\s+')
+
+# Text placed between the outputs of two chunks
+CHUNK_SEPARATOR = "\n\n"
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count of a text. Ollama does not expose its tokenizers, so
+    the count is estimated from the length with CHARS_PER_TOKEN.
+    """
+    return math.ceil(len(text) / config.CHARS_PER_TOKEN)
+
+def split_text(text: str, max_tokens: int) -> List[str]:
+    """
+    Split text into chunks of at most max_tokens (estimated) each.
+
+    Chunks are cut between paragraphs where possible, then between
+    sentences, then between words; only a single word longer than the whole
+    budget is cut in the middle.
+    """
+    max_chars = max(1, int(max_tokens * config.CHARS_PER_TOKEN))
+    if len(text) <= max_chars:
+        return [text] if text.strip() else []
+
+    # (piece, separator placed before it when it follows another piece)
+    pieces = []
+    for paragraph in PARAGRAPH_PATTERN.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            pieces.append((paragraph, "\n\n"))
+            continue
+        separator = "\n\n"
+        for sentence in SENTENCE_PATTERN.split(paragraph):
+            for part in _split_words(sentence, max_chars):
+                pieces.append((part, separator))
+                separator = " "
+
+    chunks = []
+    current = []
+    size = 0
+    for piece, separator in pieces:
+        added = len(piece) + len(separator) if current else len(piece)
+        if current and size + added > max_chars:
+            chunks.append("".join(current))
+            current = []
+            size = 0
+            added = len(piece)
+        if current:
+            current.append(separator)
+        current.append(piece)
+        size += added
+    if current:
+        chunks.append("".join(current))
+    return chunks
+
+def _split_words(sentence: str, max_chars: int) -> List[str]:
+    """Split a sentence longer than max_chars between words"""
+    if len(sentence) <= max_chars:
+        return [sentence]
+    parts = []
+    current = ""
+    for word in WORD_PATTERN.split(sentence):
+        while len(word) > max_chars:
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(word[:max_chars])
+            word = word[max_chars:]
+        if not current:
+            current = word
+        elif len(current) + 1 + len(word) <= max_chars:
+            current += " " + word
+        else:
+            parts.append(current)
+            current = word
+    if current:
+        parts.append(current)
+    return parts
+
+class ChunkedTransform:
+    """
+    Applies a prompt template to texts longer than the model context.
+
+    The text is split with split_text. Without a reduce template every chunk
+    is transformed on its own (e.g. rephrasing or translating): up to
+    `concurrency` chunks are generated at the same time and their tokens are
+    streamed back in the order of the chunks. With a reduce template the
+    chunk outputs are collected and combined (map-reduce, e.g. summarizing);
+    if the combined text is still too long it is reduced again in chunks, and
+    only the final combine step is streamed. A text that fits in one chunk
+    is sent as a single request, exactly like an unchunked transform. The
+    Ollama timing fields of the last chunk are summed over all requests.
+
+    on_progress(phase, done, total) is called from the event loop after each
+    chunk, with phase "map" or "reduce". cancel_token is passed on to every
+    request.
+    """
+
+    def __init__(self, client, model: str, prompt_template: str, reduce_template: Optional[str] = None,
+                 max_tokens: int = None, concurrency: int = None,
+                 on_progress: Callable[[str, int, int], None] = None, cancel_token=None, **options):
+        self.client = client
+        self.model = model
+        self.prompt_template = prompt_template
+        self.reduce_template = reduce_template
+        self.max_tokens = max_tokens or config.CHUNK_MAX_TOKENS
+        self.concurrency = max(1, concurrency or config.CHUNK_CONCURRENCY)
+        self.on_progress = on_progress
+        self.cancel_token = cancel_token
+        self.options = options
+
+    def split(self, text: str, template: str = None) -> List[str]:
+        """Split text so that each chunk fits the budget together with the template"""
+        overhead = estimate_tokens((template or self.prompt_template).replace("{}", ""))
+        return split_text(text, max(1, self.max_tokens - overhead))
+
+    def stream(self, text: str) -> AsyncIterator[Dict]:
+        """Stream the result as Ollama-style chunks; the last one has done set"""
+        chunks = self.split(text)
+        if len(chunks) <= 1:
+            return self.client.generate_stream(self.model, self.prompt_template.format(text),
+                                               cancel_token=self.cancel_token, **self.options)
+        if self.reduce_template:
+            return self._map_reduce(chunks)
+        return self._map_in_order(chunks)
+
+    async def _map_in_order(self, chunks: List[str]) -> AsyncIterator[Dict]:
+        """Transform chunks concurrently and yield their tokens in chunk order"""
+        queues = [asyncio.Queue() for _ in chunks]
+        semaphore = asyncio.Semaphore(self.concurrency)
+        timings = {}
+
+        async def transform(index, chunk):
+            try:
+                async with semaphore:
+                    async for data in self.client.generate_stream(
+                            self.model, self.prompt_template.format(chunk),
+                            cancel_token=self.cancel_token, **self.options):
+                        queues[index].put_nowait(data.get("response", ""))
+                        if data.get("done", False):
+                            add_timings(timings, data)
+                queues[index].put_nowait(None)
+            except Exception as e:
+                queues[index].put_nowait(e)
+
+        # Tasks are created in chunk order and the semaphore is fair, so chunks start in order
+        tasks = [asyncio.ensure_future(transform(index, chunk)) for index, chunk in enumerate(chunks)]
+        try:
+            for index, queue in enumerate(queues):
+                if index:
+                    yield {"response": CHUNK_SEPARATOR, "done": False}
+                while True:
+                    token = await queue.get()
+                    if token is None:
+                        break
+                    if isinstance(token, Exception):
+                        raise token
+                    yield {"response": token, "done": False}
+                self._progress("map", index + 1, len(chunks))
+            # The timings of all chunk requests are summed, as for a single request
+            yield dict(timings, response="", done=True)
+        finally:
+            # Cancelling closes the connections of chunks still being generated
+            for task in tasks:
+                task.cancel()
+
+    async def _map_reduce(self, chunks: List[str]) -> AsyncIterator[Dict]:
+        """Transform chunks, then combine the results until they fit in one request"""
+        phase, template = "map", self.prompt_template
+        timings = {}
+        while True:
+            outputs = await self._collect(chunks, template, phase, timings)
+            combined = CHUNK_SEPARATOR.join(output.strip() for output in outputs)
+            phase, template = "reduce", self.reduce_template
+            next_chunks = self.split(combined, template)
+            # Stop when the results fit, or when reducing no longer makes them shorter
+            if len(next_chunks) <= 1 or len(next_chunks) >= len(chunks):
+                break
+            chunks = next_chunks
+
+        self._progress("reduce", 0, 1)
+        async for data in self.client.generate_stream(self.model, template.format(combined),
+                                                      cancel_token=self.cancel_token, **self.options):
+            if data.get("done", False):
+                data = add_timings(dict(data), timings)
+            yield data
+
+    async def _collect(self, chunks: List[str], template: str, phase: str, timings: Dict) -> List[str]:
+        """Transform chunks concurrently and return their complete outputs in order"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        done = 0
+
+        async def transform(chunk):
+            nonlocal done
+            async with semaphore:
+                parts = []
+                async for data in self.client.generate_stream(self.model, template.format(chunk),
+                                                              cancel_token=self.cancel_token, **self.options):
+                    parts.append(data.get("response", ""))
+                    if data.get("done", False):
+                        add_timings(timings, data)
+            done += 1
+            self._progress(phase, done, len(chunks))
+            return "".join(parts)
+
+        tasks = [asyncio.ensure_future(transform(chunk)) for chunk in chunks]
+        try:
+            return await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _progress(self, phase: str, done: int, total: int) -> None:
+        if self.on_progress is not None:
+            self.on_progress(phase, done, total)
@@ -0,0 +1,88 @@
+from typing import Optional
+
+def format_size(num_bytes: int) -> str:
+    """Human readable size, e.g. 3.2 MB"""
+    size = float(num_bytes)
+    for unit in ("B", "KB", "MB"):
+        if size < 1024 or unit == "MB":
+            break
+        size /= 1024
+    if unit == "B":
+        return f"{num_bytes} B"
+    return f"{size:.1f} {unit}"
+
+class ClipboardPayload:
+    """
+    The authoritative copy of the text read from the clipboard.
+
+    Only a prefix of the text is shown in the input box: preview() returns the
+    first chunk and next_chunk() the following ones as the user scrolls, so
+    the widget never has to hold (or lay out) a multi-megabyte text. What is
+    sent to the LLM is taken from here, never read back from the widget.
+    Chunks end at a line break when one is close, so lines are not split
+    across two inserts.
+    """
+
+    def __init__(self, text: str = "", chunk_chars: int = 20000):
+        self.text = text
+        self.chunk_chars = chunk_chars
+        self.shown = 0  # Number of characters handed out for display
+        self._size = None
+        self._line_count = None
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    @property
+    def size(self) -> int:
+        """Size of the text in bytes when encoded as UTF-8"""
+        if self._size is None:
+            self._size = len(self.text.encode("utf-8", "surrogatepass"))
+        return self._size
+
+    @property
+    def line_count(self) -> int:
+        """Number of lines in the text"""
+        if self._line_count is None:
+            self._line_count = self.text.count("\n") + 1 if self.text else 0
+        return self._line_count
+
+    @property
+    def is_large(self) -> bool:
+        """Whether the text does not fit in a single preview chunk"""
+        return len(self.text) > self.chunk_chars
+
+    @property
+    def truncated(self) -> bool:
+        """Whether part of the text has not been displayed yet"""
+        return self.shown < len(self.text)
+
+    def preview(self) -> str:
+        """Restart the display and return the first chunk"""
+        self.shown = 0
+        return self.next_chunk()
+
+    def next_chunk(self) -> str:
+        """Return the next chunk to display, empty when everything is shown"""
+        start = self.shown
+        end = start + self.chunk_chars
+        if end < len(self.text):
+            # Prefer to stop after a line break in the last quarter of the chunk
+            newline = self.text.rfind("\n", end - self.chunk_chars // 4, end)
+            if newline != -1:
+                end = newline + 1
+        else:
+            end = len(self.text)
+        self.shown = end
+        return self.text[start:end]
+
+    def slice(self, start: Optional[int] = None, end: Optional[int] = None) -> str:
+        """The text between two character offsets, e.g. a selection in the preview"""
+        return self.text[start:end]
+
+    def describe(self) -> str:
+        """Size and line count for the status bar"""
+        if self.truncated:
+            shown_lines = self.text.count("\n", 0, self.shown)
+            return f"{format_size(self.size)}, showing {shown_lines:,} of {self.line_count:,} lines"
+        return f"{format_size(self.size)}, {self.line_count:,} lines"
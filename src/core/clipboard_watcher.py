@@ -0,0 +1,228 @@
+import hashlib
+import os
+import platform
+import shutil
+import subprocess
+import threading
+from collections import deque
+from typing import Callable, Optional, Tuple
+from . import config
+from .error_handler import ErrorHandler
+
+def fingerprint(text: str) -> Tuple[int, bytes]:
+    """Cheap identity of a clipboard text: its length and a short digest"""
+    return len(text), hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+class ClipboardBackend:
+    """
+    Clipboard access through pyperclip, without any change notification.
+
+    Subclasses can detect changes more cheaply by overriding change_count()
+    (a counter that changes with the clipboard) or wait_for_change()
+    (blocks until the system reports a change).
+    """
+    name = "poll"
+
+    def read(self) -> str:
+        """Return the clipboard text"""
+        import pyperclip
+        return pyperclip.paste()
+
+    def write(self, text: str) -> None:
+        """Put text on the clipboard"""
+        import pyperclip
+        pyperclip.copy(text)
+
+    def change_count(self) -> Optional[int]:
+        """A value that changes whenever the clipboard changes, or None if unsupported"""
+        return None
+
+    def wait_for_change(self, timeout: float) -> Optional[bool]:
+        """Block until the clipboard changes; None if the backend is not event driven"""
+        return None
+
+    def close(self) -> None:
+        """Release backend resources"""
+        pass
+
+class WindowsClipboardBackend(ClipboardBackend):
+    """Uses the clipboard sequence number, so unchanged content is never read"""
+    name = "windows"
+
+    def __init__(self):
+        import ctypes
+        self._sequence = ctypes.windll.user32.GetClipboardSequenceNumber
+
+    def change_count(self) -> Optional[int]:
+        return self._sequence()
+
+class MacClipboardBackend(ClipboardBackend):
+    """Uses NSPasteboard.changeCount (requires pyobjc)"""
+    name = "macos"
+
+    def __init__(self):
+        from AppKit import NSPasteboard
+        self._pasteboard = NSPasteboard.generalPasteboard()
+
+    def change_count(self) -> Optional[int]:
+        return self._pasteboard.changeCount()
+
+class WaylandClipboardBackend(ClipboardBackend):
+    """Event driven through `wl-paste --watch`, which runs a command on every clipboard change"""
+    name = "wayland"
+
+    def __init__(self):
+        if not os.environ.get("WAYLAND_DISPLAY") or shutil.which("wl-paste") is None:
+            raise RuntimeError("wl-paste is not available")
+        self._changed = threading.Event()
+        self._process = subprocess.Popen(
+            ["wl-paste", "--watch", "echo"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        threading.Thread(target=self._read_events, daemon=True).start()
+
+    def _read_events(self):
+        for _ in self._process.stdout:
+            self._changed.set()
+
+    def wait_for_change(self, timeout: float) -> Optional[bool]:
+        changed = self._changed.wait(timeout)
+        self._changed.clear()
+        return changed
+
+    def close(self) -> None:
+        self._process.terminate()
+
+class FakeClipboardBackend(ClipboardBackend):
+    """In-memory, event driven clipboard for headless tests and benchmarks"""
+    name = "fake"
+
+    def __init__(self, text: str = ""):
+        self._text = text
+        self._count = 0
+        self._changed = threading.Event()
+        self.reads = 0
+
+    def read(self) -> str:
+        self.reads += 1
+        return self._text
+
+    def write(self, text: str) -> None:
+        self._text = text
+        self._count += 1
+        self._changed.set()
+
+    def change_count(self) -> Optional[int]:
+        return self._count
+
+    def wait_for_change(self, timeout: float) -> Optional[bool]:
+        changed = self._changed.wait(timeout)
+        self._changed.clear()
+        return changed
+
+BACKENDS = {
+    "poll": ClipboardBackend,
+    "windows": WindowsClipboardBackend,
+    "macos": MacClipboardBackend,
+    "wayland": WaylandClipboardBackend,
+    "fake": FakeClipboardBackend,
+}
+
+def create_backend(name: str = None) -> ClipboardBackend:
+    """
+    Create the clipboard backend named in config.CLIPBOARD_BACKEND. "auto"
+    picks the cheapest backend available on this system and falls back to
+    polling.
+    """
+    name = name or config.CLIPBOARD_BACKEND
+    if name != "auto":
+        return BACKENDS[name]()
+
+    system = platform.system()
+    candidates = {"Windows": ["windows"], "Darwin": ["macos"], "Linux": ["wayland"]}.get(system, [])
+    for candidate in candidates:
+        try:
+            return BACKENDS[candidate]()
+        except Exception:
+            continue
+    return ClipboardBackend()
+
+class ClipboardWatcher:
+    """
+    Watches the clipboard on a background thread and calls on_change(text)
+    for every new, non-empty text.
+
+    Event-driven backends are waited on; backends with a change counter are
+    read only when the counter moves; plain polling backs off from
+    min_interval to max_interval while the clipboard stays unchanged. Texts
+    are compared by length and digest, never as full strings.
+    """
+
+    def __init__(self, backend: ClipboardBackend, on_change: Callable[[str], None],
+                 min_interval: float = None, max_interval: float = None, backoff: float = None):
+        self.backend = backend
+        self.on_change = on_change
+        self.min_interval = min_interval or config.CLIPBOARD_POLL_MIN
+        self.max_interval = max_interval or config.CLIPBOARD_POLL_MAX
+        self.backoff = backoff or config.CLIPBOARD_POLL_BACKOFF
+        self._last = None
+        self._ignored = deque(maxlen=8)
+        self._stop = None
+
+    def ignore(self, text: str) -> None:
+        """Do not report text if it shows up on the clipboard (e.g. our own output)"""
+        self._ignored.append(fingerprint(text))
+
+    def start(self, current_text: str = "") -> None:
+        """Start watching; current_text is treated as already seen"""
+        self.stop()
+        self._last = fingerprint(current_text)
+        # Each run gets its own stop event, so a thread that is still finishing
+        # its last wait cannot be revived by a quick stop/start
+        self._stop = threading.Event()
+        threading.Thread(target=self._run, args=(self._stop,), name="ClipAI-clipboard", daemon=True).start()
+
+    def stop(self) -> None:
+        """Ask the watcher thread to exit, without waiting for it"""
+        if self._stop is not None:
+            self._stop.set()
+            self._stop = None
+
+    def check(self) -> bool:
+        """Read the clipboard once and report it if it changed"""
+        text = self.backend.read()
+        if not text:
+            return False
+        current = fingerprint(text)
+        if current == self._last:
+            return False
+        self._last = current
+        if current in self._ignored:
+            return False
+        self.on_change(text)
+        return True
+
+    def _run(self, stop: threading.Event):
+        interval = self.min_interval
+        last_count = self.backend.change_count()
+        while not stop.is_set():
+            try:
+                signalled = self.backend.wait_for_change(self.max_interval)
+                if signalled is None:
+                    if stop.wait(interval):
+                        break
+                    count = self.backend.change_count()
+                    if count is not None:
+                        # Counter backends: only read the clipboard when the counter moved
+                        if count != last_count:
+                            last_count = count
+                            self.check()
+                        continue
+                    # Plain polling: back off while nothing changes
+                    interval = self.min_interval if self.check() else min(interval * self.backoff, self.max_interval)
+                elif signalled and not stop.is_set():
+                    self.check()
+            except Exception as e:
+                ErrorHandler.handle_error(e, "Clipboard Monitor Error", show_message_box=False)
+                break
@@ -6,21 +6,130 @@ OLLAMA_URL = "http://localhost:11434/api/"
 DEFAULT_MODEL = "aya-expanse:latest"
 TRANSFORMATION_PROMPTS = None
 
+# HTTP client configuration (seconds)
+HTTP_POOL_SIZE = 10
+CONNECT_TIMEOUT = 3.05
+FIRST_BYTE_TIMEOUT = 120.0  # Covers model load and prompt evaluation
+STREAM_IDLE_TIMEOUT = 30.0  # Maximum gap between two streamed chunks
+
+# Identical requests made while one is streaming share its generation
+SINGLE_FLIGHT = True
+SINGLE_FLIGHT_GRACE = 0.25  # Seconds a generation survives its last requester, so a superseding identical request can take it over
+
+# Startup
+FAST_START = True  # Defer the first clipboard read, model discovery and hidden images until after the first frame
+
+# Clipboard monitoring
+CLIPBOARD_BACKEND = "auto"  # auto, poll, windows, macos, wayland or fake
+CLIPBOARD_POLL_MIN = 0.5  # Seconds between checks right after a change
+CLIPBOARD_POLL_MAX = 5.0  # Longest interval reached by polling backoff
+CLIPBOARD_POLL_BACKOFF = 1.5  # Interval growth factor while the clipboard is unchanged
+
+# Long inputs are split into chunks that fit the model context
+CHUNK_MAX_TOKENS = 1000  # Estimated prompt tokens per request, leaving room for the answer in a 2048 token context
+CHUNK_CONCURRENCY = 2  # Chunks generated at the same time
+CHARS_PER_TOKEN = 4  # Used to estimate token counts, Ollama does not expose its tokenizers
+# Transformations listed here are map-reduced: chunk results are combined with this prompt.
+# The others transform each chunk on its own.
+REDUCE_PROMPTS = {
+    "Summarize": "Combine the following partial summaries into a single summary in the same language, preserving the main ideas and tone. Do not include explanations or comments: \"{}\""
+}
+
+# Local HTTP server (server.py)
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 11500
+SERVER_MAX_CONCURRENCY = 4  # Generations run at the same time, further requests wait their turn
+
+# Input box
+INPUT_PREVIEW_CHARS = 20000  # Characters of a large clipboard text shown at once, more are loaded on scroll
+
+# Speculative transformation of new clipboard text picked up by auto-refresh (opt-in)
+SPECULATIVE_TRANSFORM = False
+SPECULATIVE_DELAY = 1.0  # Seconds the clipboard must stay unchanged before the transformation starts
+
+# Chat Mode: the transformation below holds a conversation through /api/chat instead of one-off prompts
+CHAT_TRANSFORMATION = "Chat Mode"
+CHAT_CONTEXT_TOKENS = 1500  # Estimated size of the conversation sent with a turn, keep it below the model context
+CHAT_TRIM_TARGET = 0.5  # Share of CHAT_CONTEXT_TOKENS kept when older turns are dropped
+CHAT_SUMMARIZE = True  # Condense dropped turns into a summary instead of forgetting them
+CHAT_SUMMARY_PROMPT = ("Summarize the following conversation in a few sentences, keeping the facts, names and "
+                       "decisions needed to continue it. Do not add comments:\n\n{}")
+CHAT_SUMMARY_INTRO = "Summary of the earlier conversation: "
+
+# Fan-out: one input sent to several models and transformations side by side
+FANOUT_CONCURRENCY = 2  # Streams generating at the same time, the others wait for a free slot
+FANOUT_COLUMNS = 3  # Output panes per row
+
+# Local data (caches, logs)
+DATA_DIR = os.path.join(os.path.expanduser("~"), ".clipai")
+
+# Generation metrics, appended to metrics.jsonl in DATA_DIR
+METRICS_ENABLED = True
+METRICS_LOG_MAX_BYTES = 1000000  # Size at which the log is rotated
+METRICS_LOG_BACKUPS = 3  # Rotated logs kept
+
+# Transformation history, kept in history.sqlite3 in DATA_DIR
+HISTORY_ENABLED = True
+HISTORY_MAX_ENTRIES = 50000  # Oldest entries are deleted beyond this (0: keep all)
+HISTORY_PAGE_SIZE = 100  # Rows the history window loads at a time
+HISTORY_SEARCH_DELAY = 0.2  # Seconds of typing pause before the history is searched
+
+# Response cache
+CACHE_ENABLED = True
+CACHE_MAX_MB = 50  # Size limit of the on-disk store
+CACHE_MEMORY_ENTRIES = 64  # Responses kept in the in-memory LRU
+
+# Model discovery
+MODEL_CACHE_TTL = 86400  # Seconds for which the last known model list is shown at startup
+MODEL_FETCH_RETRIES = 5  # Attempts to reach Ollama before giving up
+MODEL_FETCH_RETRY_DELAY = 1.0  # Seconds before the first retry, doubled after each attempt
+
+# Model residency
+MODEL_KEEP_ALIVE = 300  # Seconds of inactivity after which Ollama unloads the model (negative: never)
+MODEL_PRELOAD = True  # Load the selected model in the background before the first request
+MODEL_UNLOAD_PREVIOUS = True  # Release the previous model from memory when another one is selected
+MODEL_LOAD_REPORT_THRESHOLD = 0.1  # Loads shorter than this (seconds) mean the model was already in memory
+
+# Optional config.json keys overriding the defaults above
+OPTIONAL_CONFIG_KEYS = (
+    "HTTP_POOL_SIZE", "CONNECT_TIMEOUT", "FIRST_BYTE_TIMEOUT", "STREAM_IDLE_TIMEOUT",
+    "SINGLE_FLIGHT", "SINGLE_FLIGHT_GRACE",
+    "LIVE_MARKDOWN", "FAST_START", "DATA_DIR",
+    "CHUNK_MAX_TOKENS", "CHUNK_CONCURRENCY", "CHARS_PER_TOKEN", "REDUCE_PROMPTS",
+    "INPUT_PREVIEW_CHARS", "SERVER_HOST", "SERVER_PORT", "SERVER_MAX_CONCURRENCY",
+    "SPECULATIVE_TRANSFORM", "SPECULATIVE_DELAY",
+    "CHAT_TRANSFORMATION", "CHAT_CONTEXT_TOKENS", "CHAT_TRIM_TARGET", "CHAT_SUMMARIZE", "CHAT_SUMMARY_PROMPT",
+    "FANOUT_CONCURRENCY", "FANOUT_COLUMNS",
+    "CLIPBOARD_BACKEND", "CLIPBOARD_POLL_MIN", "CLIPBOARD_POLL_MAX", "CLIPBOARD_POLL_BACKOFF",
+    "METRICS_ENABLED", "METRICS_LOG_MAX_BYTES", "METRICS_LOG_BACKUPS",
+    "HISTORY_ENABLED", "HISTORY_MAX_ENTRIES", "HISTORY_PAGE_SIZE", "HISTORY_SEARCH_DELAY",
+    "CACHE_ENABLED", "CACHE_MAX_MB", "CACHE_MEMORY_ENTRIES",
+    "MODEL_CACHE_TTL", "MODEL_FETCH_RETRIES", "MODEL_FETCH_RETRY_DELAY",
+    "MODEL_KEEP_ALIVE", "MODEL_PRELOAD", "MODEL_UNLOAD_PREVIOUS", "MODEL_LOAD_REPORT_THRESHOLD",
+)
+
 # Window configuration
 WINDOW_TITLE = "ClipAI"
 WINDOW_SIZE = "700x608"
 WINDOW_MIN_SIZE = (700, 608)
 WINDOW_PADDING = (10, 10)
+HISTORY_WINDOW_TITLE = "ClipAI History"
+HISTORY_WINDOW_SIZE = "700x400"
+FANOUT_WINDOW_TITLE = "ClipAI Compare"
+FANOUT_WINDOW_SIZE = "1000x650"
 
 # Font configuration
 FONT_FAMILY = "Segoe UI"
 FONT_SIZE = 10
+CODE_FONT_FAMILY = "Consolas"
 FONT_HEIGHT_MULTIPLIER = 1.2
 NUM_LINES = 10
 
 # Colors
 BACKGROUND_COLOR = "#f0f5ff"
 TEXT_BACKGROUND = "white"
+CODE_BACKGROUND = "#e4e9f5"
+LINK_COLOR = "#1a5fb4"
 
 # Button sizes
 BUTTON_WIDTH_SMALL = 12
@@ -35,6 +144,12 @@ BULLET_MARGIN_LEFT = 20
 BULLET_MARGIN_RIGHT = 40
 BULLET_SPACING = 2
 
+# Streaming and UI event dispatch
+LIVE_MARKDOWN = True  # Format markdown while the response streams instead of once it is complete
+STREAM_FRAME_MS = 33  # Minimum interval between output widget updates while streaming
+UI_IDLE_PUMP_MS = 100  # Dispatcher poll interval when no events are flowing
+UI_MAX_EVENTS_PER_TICK = 50  # Maximum number of worker events handled per dispatcher tick
+
 # File paths
 ICON_PATH = 'images/ClipAI_icon.png'
 REFRESH_ICON = 'images/iconRefresh.png'
@@ -47,7 +162,8 @@ COPY_ICON = 'images/iconCopy.png'
 
 # Status messages
 STATUS_READY = "Ready"
-STATUS_UPDATED = "Updated: {}"
+STATUS_UPDATED = "Updated: {} ({})"
+STATUS_PREVIEW = "Clipboard text: {}"
 STATUS_EMPTY = "Clipboard is empty or contains non-text content"
 STATUS_NO_TEXT = "No text in clipboard"
 STATUS_CLEARED = "Cleared"
@@ -55,9 +171,33 @@ STATUS_AUTO_REFRESH_ENABLED = "Auto-refresh enabled"
 STATUS_AUTO_REFRESH_DISABLED = "Auto-refresh disabled"
 STATUS_SENDING = "Sending to {}..."
 STATUS_RECEIVED = "Response received from {}"
+STATUS_RECEIVED_METRICS = "Response received from {} ({})"
 STATUS_STOPPED = "LLM response stopped by user."
 STATUS_COPIED = "Output content copied to clipboard"
 STATUS_NO_CONTENT = "No content to copy"
+STATUS_CHUNKS = "{}/{} chunks done by {}..."
+STATUS_COMBINING = "Combining partial results with {}..."
+STATUS_CACHED = "Cached response from {} (Ctrl+Shift+Enter to regenerate)"
+STATUS_SPECULATIVE_HIT = "Precomputed response from {} (speculation hit rate {:.0%})"
+STATUS_SPECULATIVE_ATTACHED = "Continuing precomputed response from {}..."
+STATUS_HISTORY_RESTORED = "Restored from history: {} ({})"
+STATUS_CHAT_RECEIVED = "Chat turn {} with {} ({})"
+STATUS_CHAT_SUMMARIZING = "Summarizing earlier turns with {}..."
+STATUS_CHAT_CLEARED = "Cleared, the next message starts a new chat"
+STATUS_FANOUT_RUNNING = "{} of {} done..."
+STATUS_FANOUT_DONE = "{} of {} done"
+STATUS_FANOUT_EMPTY = "Select at least one model and one transformation"
+STATUS_FANOUT_PICKED = "Copied the response of {} ({})"
+STATUS_FANOUT_QUEUED = "Waiting for a free slot"
+STATUS_FANOUT_WAITING = "Waiting for the first token..."
+STATUS_FANOUT_STOPPED = "Stopped"
+STATUS_FANOUT_FAILED = "Failed: {}"
+STATUS_MODEL_LOADED = "{} loaded in {:.1f} s"
+STATUS_MODELS_UNAVAILABLE = "Could not fetch models from Ollama: {}"
+
+def data_path(name):
+    """Return the path of a file in the local data directory"""
+    return os.path.join(os.path.expanduser(DATA_DIR), name)
 
 def load_configs():
     global OLLAMA_URL, DEFAULT_MODEL, TRANSFORMATION_PROMPTS
@@ -76,5 +216,8 @@ def load_configs():
             CONFIGS_DATA = json.load(file)
             OLLAMA_URL = CONFIGS_DATA["OLLAMA_URL"]
             DEFAULT_MODEL = CONFIGS_DATA["DEFAULT_MODEL"]
+            for key in OPTIONAL_CONFIG_KEYS:
+                if key in CONFIGS_DATA:
+                    globals()[key] = CONFIGS_DATA[key]
     else:
         print("WARNING: The configuration file config.json does not exist. Using default parameters.") 
\ No newline at end of file
@@ -0,0 +1,123 @@
+import asyncio
+import itertools
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from .cancellation import CancelToken, GenerationCancelled
+from .chunking import ChunkedTransform
+from .metrics import GenerationMetrics
+from .stream_buffer import StreamBuffer
+
+def combinations(models: Iterable[str], transforms: Iterable[str]) -> List[Tuple[str, str]]:
+    """Every (model, transformation) pair of the selection, grouped by transformation"""
+    return [(model, transform) for transform, model in itertools.product(transforms, models)]
+
+class FanOutStream:
+    """One model and transformation of a fan-out, streamed into its own buffer"""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    STOPPED = "stopped"
+    FAILED = "failed"
+
+    def __init__(self, model: str, transform: str, prompt_template: str, reduce_template: Optional[str] = None):
+        self.model = model
+        self.transform = transform
+        self.prompt_template = prompt_template
+        self.reduce_template = reduce_template
+        self.buffer = StreamBuffer()
+        self.metrics = GenerationMetrics(model, transform)
+        self.state = self.QUEUED
+        self.error = None
+
+    @property
+    def finished(self) -> bool:
+        return self.state not in (self.QUEUED, self.RUNNING)
+
+class FanOut:
+    """
+    Runs one input through several models and transformations at once.
+
+    At most `concurrency` streams generate at the same time, the others wait
+    for a free slot; the metrics of a stream start when its request is sent,
+    so time spent waiting does not count as latency. on_update() is called on
+    the event loop whenever a stream received text or changed state. All
+    streams share one cancel token: cancel() stops the running ones and
+    keeps the queued ones from starting.
+    """
+
+    def __init__(self, client, text: str, streams: List[FanOutStream], concurrency: int = 2,
+                 on_update: Optional[Callable[[], None]] = None):
+        self.client = client
+        self.text = text
+        self.streams = streams
+        self.concurrency = max(1, concurrency)
+        self.on_update = on_update or (lambda: None)
+        self.cancel_token = CancelToken()
+        self.future = None
+
+    @classmethod
+    def from_selection(cls, client, text: str, pairs: Iterable[Tuple[str, str]], prompts: Dict[str, str],
+                       reduce_prompts: Dict[str, str], **kwargs) -> "FanOut":
+        """A fan-out over (model, transformation) pairs, with the prompts of the transformations"""
+        streams = [FanOutStream(model, transform, prompts.get(transform, "{}"), reduce_prompts.get(transform))
+                   for model, transform in pairs]
+        return cls(client, text, streams, **kwargs)
+
+    @property
+    def finished(self) -> bool:
+        return all(stream.finished for stream in self.streams)
+
+    async def run(self) -> None:
+        """Run every stream, within the concurrency limit"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        try:
+            await asyncio.gather(*(self._run(stream, semaphore) for stream in self.streams))
+        finally:
+            for stream in self.streams:
+                if not stream.finished:
+                    stream.state = FanOutStream.STOPPED
+            self.on_update()
+
+    async def _run(self, stream: FanOutStream, semaphore: asyncio.Semaphore) -> None:
+        async with semaphore:
+            if self.cancel_token.cancelled:
+                stream.state = FanOutStream.STOPPED
+                return
+            stream.state = FanOutStream.RUNNING
+            stream.metrics = GenerationMetrics(stream.model, stream.transform, len(self.text))
+            self.on_update()
+            transform = ChunkedTransform(self.client, stream.model, stream.prompt_template, stream.reduce_template,
+                                         cancel_token=self.cancel_token)
+            try:
+                async for data in transform.stream(self.text):
+                    text = data.get("response", "")
+                    stream.buffer.append(text)
+                    stream.metrics.token(text)
+                    if data.get("done", False):
+                        stream.metrics.finish(data)
+                        stream.state = FanOutStream.DONE
+                        break
+                    self.on_update()
+                if stream.state == FanOutStream.RUNNING:
+                    stream.state = FanOutStream.STOPPED
+            except GenerationCancelled:
+                stream.state = FanOutStream.STOPPED
+            except asyncio.CancelledError:
+                stream.state = FanOutStream.STOPPED
+                raise
+            except Exception as e:
+                stream.state = FanOutStream.FAILED
+                stream.error = str(e)
+            finally:
+                if stream.metrics.finished is None:
+                    stream.metrics.finish()
+                self.on_update()
+
+    def cancel(self) -> None:
+        """Stop the running streams and the queued ones"""
+        self.cancel_token.cancel()
+        for stream in self.streams:
+            if stream.state == FanOutStream.QUEUED:
+                stream.state = FanOutStream.STOPPED  # Not started yet, it never will be
+        if self.future is not None:
+            self.future.cancel()
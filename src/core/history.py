@@ -0,0 +1,217 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+from .error_handler import ErrorHandler
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS history ("
+    "id INTEGER PRIMARY KEY, created REAL, model TEXT, transform TEXT, prompt TEXT, "
+    "input TEXT, output TEXT, completed INTEGER, metrics TEXT)",
+)
+
+_FTS_SCHEMA = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5("
+    "input, output, content='history', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS history_insert AFTER INSERT ON history BEGIN "
+    "INSERT INTO history_fts (rowid, input, output) VALUES (new.id, new.input, new.output); END",
+    "CREATE TRIGGER IF NOT EXISTS history_delete AFTER DELETE ON history BEGIN "
+    "INSERT INTO history_fts (history_fts, rowid, input, output) "
+    "VALUES ('delete', old.id, old.input, old.output); END",
+)
+
+# Columns of the rows returned by page(), the input is cut to PREVIEW_CHARS
+PREVIEW_CHARS = 200
+_PAGE_COLUMNS = f"h.id, h.created, h.model, h.transform, substr(h.input, 1, {PREVIEW_CHARS}), h.completed"
+
+def fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query matching every word as a prefix"""
+    return " ".join('"' + word.replace('"', '""') + '"*' for word in text.split())
+
+class HistoryStore:
+    """
+    Persistent history of transformations, searchable by input and output text.
+
+    add() only queues the entry: a background thread owns the writes, so
+    recording never blocks the caller. Reads use their own connection (the
+    database is in WAL mode, so they do not wait for the writer) and are
+    paged by id, newest first, so a page costs the same whatever the size of
+    the history. Text search uses an FTS5 index, or LIKE when the SQLite
+    library was built without FTS5. Entries beyond the newest max_entries
+    are deleted every 100 writes. If the database cannot be opened for
+    writing, the error is kept in `error` and later entries are dropped.
+    """
+
+    def __init__(self, path: str, max_entries: int = 0):
+        self.path = path
+        self.max_entries = max_entries
+        self.fts = True
+        self.error: Optional[Exception] = None
+        self._queue = queue.SimpleQueue()
+        self._writer = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def _open(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        with db:
+            for statement in _SCHEMA:
+                db.execute(statement)
+            try:
+                for statement in _FTS_SCHEMA:
+                    db.execute(statement)
+            except sqlite3.OperationalError:
+                self.fts = False  # No FTS5 in this SQLite build
+        return db
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the read connection on first use"""
+        if self._reader is None:
+            self._reader = self._open()
+        return self._reader
+
+    def add(self, model: str, transform: str, prompt: str, input_text: str, output: str,
+            completed: bool = True, metrics: Optional[Dict] = None) -> None:
+        """Queue an entry to be written in the background"""
+        with self._lock:
+            if self.error is not None:
+                return  # The writer could not open the database
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="clipai-history", daemon=True)
+                self._writer.start()
+            self._queue.put((time.time(), model, transform, prompt, input_text, output, int(completed),
+                             json.dumps(metrics) if metrics else None))
+
+    def _write_loop(self) -> None:
+        try:
+            db = self._open()
+        except (OSError, sqlite3.Error) as e:
+            ErrorHandler.handle_error(e, "History Error", show_message_box=False)
+            with self._lock:
+                self.error = e
+                self._release_waiters()
+            return
+        written = 0
+        stop = False
+        while not stop:
+            # Everything queued meanwhile is written in the same transaction
+            entries, waiters = [], []
+            item = self._queue.get()
+            while True:
+                if item is None:
+                    stop = True
+                    break
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    entries.append(item)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if entries:
+                try:
+                    with db:
+                        db.executemany(
+                            "INSERT INTO history (created, model, transform, prompt, input, output, completed, "
+                            "metrics) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", entries)
+                        if self.max_entries and (written == 0 or (written + len(entries)) // 100 > written // 100):
+                            self._prune(db)
+                    written += len(entries)
+                except sqlite3.Error:
+                    pass  # Losing history entries must not stop the writer
+            for waiter in waiters:
+                waiter.set()
+        db.close()
+
+    def _prune(self, db: sqlite3.Connection) -> None:
+        """Delete the entries older than the newest max_entries"""
+        row = db.execute("SELECT id FROM history ORDER BY id DESC LIMIT 1 OFFSET ?",
+                         (self.max_entries,)).fetchone()
+        if row is not None:
+            db.execute("DELETE FROM history WHERE id <= ?", (row[0],))
+
+    def _release_waiters(self) -> None:
+        """Drop everything queued for a writer that stopped, waking the flush() calls waiting on it"""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if isinstance(item, threading.Event):
+                item.set()
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until the entries queued so far are written; False if they were not"""
+        with self._lock:
+            if self.error is not None:
+                return False
+            if self._writer is None:
+                return True
+            done = threading.Event()
+            self._queue.put(done)
+        return done.wait(timeout) and self.error is None
+
+    def page(self, search: str = "", before_id: int = None, limit: int = 50) -> List[tuple]:
+        """
+        Newest entries older than before_id, matching search if given, as
+        (id, created, model, transform, input preview, completed) rows
+        """
+        before_id = before_id if before_id is not None else 2 ** 63 - 1
+        with self._lock:
+            db = self._connect()
+            if not search.strip():
+                return db.execute(
+                    f"SELECT {_PAGE_COLUMNS} FROM history h WHERE h.id < ? ORDER BY h.id DESC LIMIT ?",
+                    (before_id, limit)).fetchall()
+            if self.fts:
+                try:
+                    return db.execute(
+                        f"SELECT {_PAGE_COLUMNS} FROM history_fts f JOIN history h ON h.id = f.rowid "
+                        "WHERE history_fts MATCH ? AND f.rowid < ? ORDER BY f.rowid DESC LIMIT ?",
+                        (fts_query(search), before_id, limit)).fetchall()
+                except sqlite3.OperationalError:
+                    return []  # Not a valid query yet, e.g. while typing
+            pattern = "%" + search.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            return db.execute(
+                f"SELECT {_PAGE_COLUMNS} FROM history h "
+                "WHERE (h.input LIKE ? ESCAPE '\\' OR h.output LIKE ? ESCAPE '\\') AND h.id < ? "
+                "ORDER BY h.id DESC LIMIT ?",
+                (pattern, pattern, before_id, limit)).fetchall()
+
+    def get(self, entry_id: int) -> Optional[Dict]:
+        """The full entry with the given id, or None"""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT id, created, model, transform, prompt, input, output, completed, metrics "
+                "FROM history WHERE id = ?", (entry_id,)).fetchone()
+        if row is None:
+            return None
+        keys = ("id", "created", "model", "transform", "prompt", "input", "output", "completed", "metrics")
+        entry = dict(zip(keys, row))
+        entry["completed"] = bool(entry["completed"])
+        entry["metrics"] = json.loads(entry["metrics"]) if entry["metrics"] else None
+        return entry
+
+    def count(self) -> int:
+        """Number of stored entries"""
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    def close(self) -> None:
+        """Write the queued entries and close the database"""
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join(5)
+            self._writer = None
+        with self._lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
@@ -1,12 +1,63 @@
+import socket
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 from . import config
+from .cancellation import GenerationCancelled
+from .ndjson import iter_ndjson
 
 class LLMClient:
+    _session = None
+    _session_lock = threading.Lock()
+
+    @classmethod
+    def get_session(cls):
+        """Return the shared keep-alive HTTP session, creating it on first use"""
+        with cls._session_lock:
+            if cls._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=config.HTTP_POOL_SIZE)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                cls._session = session
+            return cls._session
+
+    @classmethod
+    def close_session(cls):
+        """Close the shared HTTP session and its pooled connections"""
+        with cls._session_lock:
+            if cls._session is not None:
+                cls._session.close()
+                cls._session = None
+
     @staticmethod
-    def fetch_models():
+    def _request_timeout():
+        """Connect and first-byte timeouts for a request"""
+        return (config.CONNECT_TIMEOUT, config.FIRST_BYTE_TIMEOUT)
+
+    @staticmethod
+    def _set_idle_timeout(response):
+        """Switch a streaming response from the first-byte to the idle-stream read timeout"""
+        try:
+            response.raw.connection.sock.settimeout(config.STREAM_IDLE_TIMEOUT)
+        except AttributeError:
+            # The connection is not reachable (e.g. already released), keep the first-byte timeout
+            pass
+
+    @staticmethod
+    def _abort(response):
+        """Shut the socket of a streaming response down, waking the thread blocked reading it"""
+        try:
+            response.raw.connection.sock.shutdown(socket.SHUT_RDWR)
+        except (AttributeError, OSError):
+            pass
+        response.close()
+
+    @classmethod
+    def fetch_models(cls):
         """Fetch available models from Ollama API"""
         try:
-            response = requests.get(config.OLLAMA_URL + "tags")
+            response = cls.get_session().get(config.OLLAMA_URL + "tags", timeout=cls._request_timeout())
             if response.status_code == 200:
                 response_tmp = response.json()
                 model_list = [model['name'] for model in response_tmp['models']]
@@ -16,22 +67,52 @@ class LLMClient:
         except Exception as e:
             raise Exception(f"Error fetching models: {str(e)}")
 
-    @staticmethod
-    def generate_stream(model, prompt):
+    @classmethod
+    def generate_stream(cls, model, prompt, cancel_token=None):
         """Generate streaming response from the LLM"""
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
         try:
-            response = requests.post(
+            response = cls.get_session().post(
                 config.OLLAMA_URL + "generate",
-                json={"model": model, "prompt": prompt, "keep_alive": "5m", "stream": True},
-                stream=True
+                json={"model": model, "prompt": prompt, "keep_alive": config.MODEL_KEEP_ALIVE, "stream": True},
+                stream=True,
+                timeout=cls._request_timeout()
             )
             
             if response.status_code == 200:
                 if response == "":
                     raise Exception(f"No response from the model")
                 else:
+                    cls._set_idle_timeout(response)
                     return response
             else:
+                response.close()
                 raise Exception(f"LLM request failed: {response.status_code}")
         except Exception as e:
-            raise Exception(f"Error in LLM request: {str(e)}") 
\ No newline at end of file
+            raise Exception(f"Error in LLM request: {str(e)}")
+
+    @classmethod
+    def stream(cls, model, prompt, cancel_token=None):
+        """
+        Yield the decoded chunks of a generation. Cancelling cancel_token from
+        another thread aborts the connection at once, so Ollama stops
+        generating, and the reading thread gets GenerationCancelled. A token
+        cancelled before Ollama answered takes effect when the answer starts.
+        """
+        response = cls.generate_stream(model, prompt, cancel_token)
+        unregister = cancel_token.on_cancel(lambda: cls._abort(response)) if cancel_token else None
+        try:
+            # iter_content(None) yields the data as it arrives, in chunks of several lines
+            for data in iter_ndjson(response.iter_content(None)):
+                yield data
+        except Exception:
+            if cancel_token is not None and cancel_token.cancelled:
+                raise GenerationCancelled("Generation cancelled")
+            raise
+        finally:
+            if unregister is not None:
+                unregister()
+            response.close()
+        if cancel_token is not None and cancel_token.cancelled:
+            raise GenerationCancelled("Generation cancelled")
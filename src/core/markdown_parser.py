@@ -1,16 +1,35 @@
 import re
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 
 class CustomMarkdownParser:
-    def __init__(self):
-        # Define regex patterns for different markdown elements
-        self.patterns = {
-            'bold_italic': r'\*\*\*(.*?)\*\*\*',  # ***text***
-            'bold': r'\*\*(.*?)\*\*',             # **text**
-            'italic': r'\*(.*?)\*',               # *text*
-            'heading': r'^(#{1,6})\s+(.+)$',      # # Heading
-            'bullet_point': r'^\s*[-*+]\s+(.+)$'  # - item or * item or + item
-        }
+    """
+    Converts markdown to plain text plus formatting tags for the Tk text widget.
+
+    Lines are parsed one at a time. Block elements (headings, bullet and
+    numbered list items, fenced code blocks) are recognised at the start of
+    each line; inline elements (code spans, links, bold/italic) are found in a
+    single left-to-right pass over the line with one precompiled pattern, so
+    tag offsets always refer to the text after the markup was removed. The
+    time per line is linear in its length, also with many unmatched markers.
+    """
+
+    # Block-level patterns
+    FENCE_PATTERN = re.compile(r'^\s*(```|~~~)')                  # ``` or ~~~
+    HEADING_PATTERN = re.compile(r'^(#{1,6})\s+(.+)$')              # # Heading
+    BULLET_PATTERN = re.compile(r'^\s*[-*+]\s+(.+)$')               # - item or * item or + item
+    NUMBERED_PATTERN = re.compile(r'^\s*(\d{1,9})[.)]\s+(.+)$')     # 1. item or 1) item
+
+    # Inline patterns, tried left to right; at the same position the first alternative wins.
+    # Span contents are negated classes that cannot run past the next marker of their kind,
+    # so an unmatched marker is given up at the next one and a line is parsed in linear time.
+    INLINE_PATTERN = re.compile(
+        r'(?=[*`\[])'                                              # Skip quickly to a candidate marker
+        r'(?:(?P<code>(?P<ticks>`+)(?P<code_text>[^`]+(?:`+[^`]+)*?)(?P=ticks)(?!`))'  # `code`
+        r'|(?P<link>\[(?P<link_text>[^\[\]]+)\]\((?P<url>[^)\s]+)\))'  # [text](url)
+        r'|\*\*\*(?P<bold_italic>(?!\s)(?:[^*]|\*{1,2}(?!\*))+(?<!\s))\*\*\*'  # ***text***
+        r'|\*\*(?P<bold>(?!\s)(?:[^*]|\*(?!\*))+(?<!\s))\*\*'    # **text**
+        r'|\*(?P<italic>(?![\s*])[^*]+(?<!\s))\*)'                  # *text*
+    )
 
     def parse(self, text: str) -> Tuple[str, List[Tuple[str, int, int]]]:
         """
@@ -23,78 +42,179 @@ class CustomMarkdownParser:
         if not text:
             return "", []
 
-        # Split text into lines for processing
-        lines = text.split('\n')
         plain_lines = []
         tags = []
         current_pos = 0
+        in_code_block = False
 
-        for line in lines:
-            # Process other markdown elements
-            plain_line, line_tags = self._process_line(line, current_pos)
+        for line in text.split('\n'):
+            plain_line, line_tags, in_code_block = self.parse_line(line, in_code_block)
             plain_lines.append(plain_line)
-            tags.extend(line_tags)
+            tags.extend((name, current_pos + start, current_pos + end) for name, start, end in line_tags)
             current_pos += len(plain_line) + 1  # +1 for newline
 
         return '\n'.join(plain_lines), tags
 
-    def _process_line(self, line: str, start_pos: int) -> Tuple[str, List[Tuple[str, int, int]]]:
-        """Process a single line of markdown text"""
-        plain_text = line
-        tags = []
-        current_pos = 0
+    def parse_indexed(self, text: str) -> Tuple[str, Dict[str, List[str]], bool]:
+        """
+        Parse markdown text and return tag ranges as Tk "line.column" indexes
+        Returns:
+            Tuple containing:
+            - Plain text with markdown removed
+            - Dict mapping each tag name to a flat list [start1, end1, start2, end2, ...]
+              of indexes, so that each tag can be applied with a single tag_add call
+            - Whether the last line starts inside a fenced code block
+        """
+        plain_lines = []
+        ranges = {}
+        in_code_block = False
+        last_line_state = False
+
+        for line_number, line in enumerate(text.split('\n'), 1):
+            last_line_state = in_code_block
+            plain_line, line_tags, in_code_block = self.parse_line(line, in_code_block)
+            plain_lines.append(plain_line)
+            for name, start, end in line_tags:
+                indexes = ranges.get(name)
+                if indexes is None:
+                    indexes = ranges[name] = []
+                indexes.append(f"{line_number}.{start}")
+                indexes.append(f"{line_number}.{end}")
+
+        return '\n'.join(plain_lines), ranges, last_line_state
+
+    def parse_line(self, line: str, in_code_block: bool = False) -> Tuple[str, List[Tuple[str, int, int]], bool]:
+        """
+        Parse a single line of markdown.
+
+        Every input line produces exactly one output line. Tag offsets are
+        columns in the returned plain line. The returned flag tells whether
+        the next line is inside a fenced code block.
+        """
+        # Fences open and close code blocks and are shown as empty lines
+        if self.FENCE_PATTERN.match(line):
+            return "", [], not in_code_block
+
+        if in_code_block:
+            return line, [('code_block', 0, len(line))], True
 
-        # Process headings
-        heading_match = re.match(r'^(#{1,6})\s+(.+)$', line)
+        heading_match = self.HEADING_PATTERN.match(line)
         if heading_match:
             level = len(heading_match.group(1))
-            content = heading_match.group(2)
-            plain_text = content
-            tags.append((f'heading{level}', start_pos, start_pos + len(content)))
-            return plain_text, tags
+            plain_text, tags = self._parse_inline(heading_match.group(2))
+            tags.insert(0, (f'heading{level}', 0, len(plain_text)))
+            return plain_text, tags, False
 
-        # Process bullet points
-        bullet_match = re.match(self.patterns['bullet_point'], line)
+        bullet_match = self.BULLET_PATTERN.match(line)
         if bullet_match:
-            content = bullet_match.group(1)
-            plain_text = "• " + content  # Add round bullet point
-            tags.append(('bullet', start_pos, start_pos + len(plain_text)))
-            # Process inline formatting within bullet point
-            inline_text, inline_tags = self._process_inline_formatting(content, start_pos + 2)  # +2 for "• "
-            tags.extend(inline_tags)
-            return plain_text, tags
-
-        # Process inline formatting
-        return self._process_inline_formatting(line, start_pos)
-
-    def _process_inline_formatting(self, text: str, start_pos: int) -> Tuple[str, List[Tuple[str, int, int]]]:
-        """Process all inline formatting (bold, italic)"""
+            return self._list_item("• ", 'bullet', bullet_match.group(1)) + (False,)
+
+        numbered_match = self.NUMBERED_PATTERN.match(line)
+        if numbered_match:
+            marker = numbered_match.group(1) + ". "
+            return self._list_item(marker, 'numbered', numbered_match.group(2)) + (False,)
+
+        plain_text, tags = self._parse_inline(line)
+        return plain_text, tags, False
+
+    def _list_item(self, marker: str, tag_name: str, content: str) -> Tuple[str, List[Tuple[str, int, int]]]:
+        """Build a list item line with its marker and inline formatting"""
+        inline_text, inline_tags = self._parse_inline(content, len(marker))
+        plain_text = marker + inline_text
+        return plain_text, [(tag_name, 0, len(plain_text))] + inline_tags
+
+    def _parse_inline(self, text: str, offset: int = 0) -> Tuple[str, List[Tuple[str, int, int]]]:
+        """Remove inline markup in one pass, tag offsets start at offset"""
+        if '*' not in text and '`' not in text and '[' not in text:
+            return text, []
+
+        parts = []
         tags = []
-        plain_text = text
-        offset = 0
+        position = offset  # Offset of the end of the plain text built so far
+        last_end = 0
 
-        # Process bold and italic (***text***)
-        for match in re.finditer(self.patterns['bold_italic'], plain_text):
+        for match in self.INLINE_PATTERN.finditer(text):
             start, end = match.span()
-            content = match.group(1)
-            plain_text = plain_text[:start] + content + plain_text[end:]
-            tags.append(('bold_italic', start_pos + start, start_pos + start + len(content)))
-            offset += 4  # Account for removed asterisks
+            if start > last_end:
+                parts.append(text[last_end:start])
+                position += start - last_end
+            last_end = end
 
-        # Process bold (**text**)
-        for match in re.finditer(self.patterns['bold'], plain_text):
-            start, end = match.span()
-            content = match.group(1)
-            plain_text = plain_text[:start] + content + plain_text[end:]
-            tags.append(('bold', start_pos + start, start_pos + start + len(content)))
-            offset += 2  # Account for removed asterisks
+            # The outermost group of an alternative closes last, so lastgroup names the element
+            kind = match.lastgroup
+            if kind == 'code':
+                content = match.group('code_text')
+                parts.append(content)
+                tags.append(('code', position, position + len(content)))
+                position += len(content)
+                continue
 
-        # Process italic (*text*)
-        for match in re.finditer(self.patterns['italic'], plain_text):
-            start, end = match.span()
-            content = match.group(1)
-            plain_text = plain_text[:start] + content + plain_text[end:]
-            tags.append(('italic', start_pos + start, start_pos + start + len(content)))
-            offset += 2  # Account for removed asterisks
+            content = match.group('link_text' if kind == 'link' else kind)
+
+            # Formatting can be nested (e.g. a link inside bold text)
+            if '*' in content or '`' in content or '[' in content:
+                content, inner_tags = self._parse_inline(content, position)
+            else:
+                inner_tags = None
+            parts.append(content)
+            tags.append((kind, position, position + len(content)))
+            if inner_tags:
+                tags.extend(inner_tags)
+            position += len(content)
+
+        if last_end == 0 and not parts:
+            return text, []
+        parts.append(text[last_end:])
+        return "".join(parts), tags
+
+class IncrementalMarkdown:
+    """
+    Formats a growing markdown text as it streams in.
+
+    Completed lines are parsed once; only the last, still open line is parsed
+    again when more text arrives, so the cost of feed() is bounded by the
+    length of the lines it touches and not by the length of the document.
+    feed() returns line updates (line_number, plain_line, tags, is_new):
+    tags carry column offsets in plain_line, and is_new tells whether the
+    line must be appended or replaces the line with the same number.
+    """
+
+    def __init__(self, parser: CustomMarkdownParser = None):
+        self.parser = parser or CustomMarkdownParser()
+        self.open_line = ""
+        self.line_number = 0         # Number of the open line
+        self.in_code_block = False   # Fenced code block state at the start of the open line
+        self.emitted = False         # Whether the open line has already been sent out
+
+    def render(self, text: str) -> Tuple[str, Dict[str, List[str]]]:
+        """
+        Parse a whole text at once with CustomMarkdownParser.parse_indexed and
+        leave this instance ready to continue with feed(). Returns the plain
+        text and the grouped tag indexes.
+        """
+        plain_text, ranges, in_code_block = self.parser.parse_indexed(text)
+        last_newline = text.rfind('\n')
+        self.open_line = text[last_newline + 1:]
+        self.line_number = text.count('\n')
+        self.in_code_block = in_code_block
+        self.emitted = True
+        return plain_text, ranges
+
+    def feed(self, text: str) -> List[Tuple[int, str, List[Tuple[str, int, int]], bool]]:
+        """Add streamed text and return the line updates it causes"""
+        if not text:
+            return []
+
+        updates = []
+        pieces = (self.open_line + text).split('\n')
+        for piece in pieces[:-1]:
+            plain_line, tags, self.in_code_block = self.parser.parse_line(piece, self.in_code_block)
+            updates.append((self.line_number, plain_line, tags, not self.emitted))
+            self.line_number += 1
+            self.emitted = False
 
-        return plain_text, tags 
\ No newline at end of file
+        self.open_line = pieces[-1]
+        plain_line, tags, _ = self.parser.parse_line(self.open_line, self.in_code_block)
+        updates.append((self.line_number, plain_line, tags, not self.emitted))
+        self.emitted = True
+        return updates
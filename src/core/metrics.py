@@ -0,0 +1,214 @@
+import json
+import math
+import os
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Timing fields of the final chunk of an Ollama response, durations are in nanoseconds
+TIMING_FIELDS = ("total_duration", "load_duration", "prompt_eval_count", "prompt_eval_duration",
+                 "eval_count", "eval_duration")
+
+def add_timings(totals: Dict[str, int], data: Dict) -> Dict[str, int]:
+    """Add the timing fields of a done chunk to totals"""
+    for field in TIMING_FIELDS:
+        if field in data:
+            totals[field] = totals.get(field, 0) + data[field]
+    return totals
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of values, None when there are none"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = math.ceil(fraction * len(ordered))
+    return ordered[max(0, min(len(ordered), rank) - 1)]
+
+class GenerationMetrics:
+    """
+    Timings of one generation as seen by the client and by Ollama.
+
+    Created when the request is started; token() is called for every
+    streamed chunk, rendered() each time buffered text is drawn with the
+    time it waited, and finish() with the final chunk, whose timing fields
+    are merged in.
+    """
+
+    def __init__(self, model: str, transform: str, input_chars: int = 0):
+        self.model = model
+        self.transform = transform
+        self.input_chars = input_chars
+        self.started = time.perf_counter()
+        self.first_token = None
+        self.finished = None
+        self.completed = False
+        self.chunks = 0
+        self.output_chars = 0
+        self.render_lags: List[float] = []
+        self.server: Dict[str, int] = {}
+
+    def token(self, text: str) -> None:
+        """Note a streamed chunk"""
+        if text:
+            if self.first_token is None:
+                self.first_token = time.perf_counter()
+            self.chunks += 1
+            self.output_chars += len(text)
+
+    def rendered(self, lag: float) -> None:
+        """Note that text which waited lag seconds since it arrived was drawn"""
+        self.render_lags.append(lag)
+
+    def finish(self, data: Optional[Dict] = None) -> None:
+        """Stop the clock, merging the timings of the final chunk when there is one"""
+        self.finished = time.perf_counter()
+        if data is not None and data.get("done", False):
+            self.completed = True
+            add_timings(self.server, data)
+
+    def ttft(self) -> Optional[float]:
+        """Seconds from the request to the first token"""
+        return None if self.first_token is None else self.first_token - self.started
+
+    def tokens_per_second(self) -> Optional[float]:
+        """Generation speed reported by Ollama, or measured from the stream so far"""
+        if self.server.get("eval_duration"):
+            return self.server.get("eval_count", 0) / (self.server["eval_duration"] / 1e9)
+        end = self.finished if self.finished is not None else time.perf_counter()
+        if self.first_token is not None and end > self.first_token:
+            return self.chunks / (end - self.first_token)
+        return None
+
+    def as_record(self) -> Dict:
+        """JSON-serializable record, durations in milliseconds"""
+        def ms(seconds):
+            return None if seconds is None else round(seconds * 1000, 2)
+
+        def server_ms(field):
+            return ms(self.server[field] / 1e9) if field in self.server else None
+
+        rate = self.tokens_per_second()
+        return {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "model": self.model,
+            "transform": self.transform,
+            "completed": self.completed,
+            "input_chars": self.input_chars,
+            "output_chars": self.output_chars,
+            "ttft_ms": ms(self.ttft()),
+            "total_ms": ms(None if self.finished is None else self.finished - self.started),
+            "render_lag_ms": ms(sum(self.render_lags) / len(self.render_lags)) if self.render_lags else None,
+            "render_lag_max_ms": ms(max(self.render_lags)) if self.render_lags else None,
+            "tokens_per_second": None if rate is None else round(rate, 2),
+            "load_ms": server_ms("load_duration"),
+            "prompt_eval_count": self.server.get("prompt_eval_count"),
+            "prompt_eval_ms": server_ms("prompt_eval_duration"),
+            "eval_count": self.server.get("eval_count"),
+            "eval_ms": server_ms("eval_duration"),
+            "server_total_ms": server_ms("total_duration")
+        }
+
+    def summary(self) -> str:
+        """Compact summary for the status bar"""
+        parts = []
+        ttft = self.ttft()
+        if ttft is not None:
+            parts.append(f"first token {ttft:.2f}s")
+        rate = self.tokens_per_second()
+        if rate is not None:
+            parts.append(f"{rate:.1f} tok/s")
+        if self.server.get("load_duration", 0) >= 1e8:
+            parts.append(f"load {self.server['load_duration'] / 1e9:.2f}s")
+        if "prompt_eval_count" in self.server:
+            parts.append(f"prompt {self.server['prompt_eval_count']} tok"
+                         f" in {self.server.get('prompt_eval_duration', 0) / 1e9:.2f}s")
+        if self.render_lags:
+            parts.append(f"render lag {max(self.render_lags) * 1000:.0f}ms")
+        return ", ".join(parts)
+
+class MetricsLog:
+    """
+    Appends generation records to a JSONL file.
+
+    When the file grows over max_bytes it is renamed to path.1 (path.1 to
+    path.2 and so on) and a new file is started; at most `backups` old
+    files are kept.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 1000000, backups: int = 3):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+
+    def append(self, record: Dict) -> None:
+        """Write one record, rotating the file first if it is full"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        if os.path.isfile(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+            self.rotate()
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(record) + "\n")
+
+    def rotate(self) -> None:
+        """Shift the log files by one, dropping the oldest"""
+        for index in range(self.backups, 0, -1):
+            source = self.path if index == 1 else f"{self.path}.{index - 1}"
+            if os.path.isfile(source):
+                os.replace(source, f"{self.path}.{index}")
+        if self.backups <= 0 and os.path.isfile(self.path):
+            os.remove(self.path)
+
+    def records(self) -> Iterator[Dict]:
+        """All records, oldest first; lines that cannot be parsed are skipped"""
+        paths = [f"{self.path}.{index}" for index in range(self.backups, 0, -1)] + [self.path]
+        for path in paths:
+            if not os.path.isfile(path):
+                continue
+            with open(path, "r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+
+# Record fields summarized by aggregate(), with their column titles
+AGGREGATE_FIELDS = (("ttft_ms", "first token ms"), ("tokens_per_second", "tok/s"),
+                    ("total_ms", "total ms"), ("render_lag_max_ms", "render lag ms"))
+
+def aggregate(records: Iterable[Dict]) -> Dict[Tuple[str, str], Dict]:
+    """p50 and p95 of the completed generations per model and transformation"""
+    groups: Dict[Tuple[str, str], Dict[str, List[float]]] = {}
+    counts: Dict[Tuple[str, str], int] = {}
+    for record in records:
+        if not record.get("completed"):
+            continue
+        key = (record.get("model"), record.get("transform"))
+        counts[key] = counts.get(key, 0) + 1
+        values = groups.setdefault(key, {})
+        for field, _ in AGGREGATE_FIELDS:
+            if record.get(field) is not None:
+                values.setdefault(field, []).append(record[field])
+
+    result = {}
+    for key, values in groups.items():
+        result[key] = {"count": counts[key]}
+        for field, _ in AGGREGATE_FIELDS:
+            samples = values.get(field, [])
+            result[key][field] = (percentile(samples, 0.5), percentile(samples, 0.95))
+    return result
+
+def report(records: Iterable[Dict]) -> str:
+    """Human readable table of aggregate()"""
+    stats = aggregate(records)
+    if not stats:
+        return "No completed generations recorded"
+    header = f"{'model':<24} {'transformation':<16} {'n':>5}"
+    for _, title in AGGREGATE_FIELDS:
+        header += f" {title + ' p50/p95':>24}"
+    lines = [header]
+    for (model, transform), values in sorted(stats.items(), key=lambda item: (str(item[0][0]), str(item[0][1]))):
+        line = f"{str(model):<24} {str(transform):<16} {values['count']:>5}"
+        for field, _ in AGGREGATE_FIELDS:
+            p50, p95 = values[field]
+            cell = "-" if p50 is None else f"{p50:.1f} / {p95:.1f}"
+            line += f" {cell:>24}"
+        lines.append(line)
+    return "\n".join(lines)
@@ -0,0 +1,32 @@
+import json
+import os
+import time
+from typing import List, Optional
+
+class ModelListCache:
+    """On-disk copy of the last model list returned by Ollama, valid for ttl seconds"""
+
+    def __init__(self, path: str, ttl: float):
+        self.path = path
+        self.ttl = ttl
+
+    def load(self) -> Optional[List[str]]:
+        """Return the cached model list, or None if it is missing, unreadable or expired"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            if time.time() - data["timestamp"] > self.ttl:
+                return None
+            return list(data["models"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save(self, models: List[str]) -> None:
+        """Write the model list to disk"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"timestamp": time.time(), "models": models}, file)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,80 @@
+import time
+from typing import Callable, Dict, List, Optional
+from . import config
+from .error_handler import ErrorHandler
+
+class ModelResidency:
+    """
+    Keeps the selected Ollama model in memory while the user is active.
+
+    select() loads a model in the background as soon as it is chosen (and
+    optionally releases the previous one), so the first request does not pay
+    for the model load. Ollama unloads a model keep_alive seconds after the
+    last request; activity() renews that lease while the user is working, at
+    most once per half lease, so a model stays resident during use and is
+    unloaded after keep_alive seconds of inactivity. With a keep_alive of 0
+    nothing is preloaded or renewed. The load time reported by Ollama is
+    recorded for every load.
+
+    submit(coro) must schedule a coroutine on the event loop of client.
+    """
+
+    def __init__(self, client, submit: Callable, keep_alive: float = None, unload_previous: bool = None,
+                 on_loaded: Optional[Callable[[str, float], None]] = None):
+        self.client = client
+        self.submit = submit
+        self.keep_alive = config.MODEL_KEEP_ALIVE if keep_alive is None else keep_alive
+        self.unload_previous = config.MODEL_UNLOAD_PREVIOUS if unload_previous is None else unload_previous
+        self.on_loaded = on_loaded
+        self.model = None
+        self.last_renewal = 0.0
+        self.load_times: Dict[str, List[float]] = {}
+
+    def select(self, model: str) -> None:
+        """Make model the resident model, loading it in the background"""
+        if not model:
+            return
+        if model == self.model:
+            self.activity()
+            return
+        previous, self.model = self.model, model
+        if previous and self.unload_previous:
+            self.submit(self._unload(previous))
+        if self.keep_alive != 0:  # Preloading is pointless when Ollama unloads the model right away
+            self._renew()
+
+    def activity(self) -> None:
+        """Note user activity, renewing the lease of the resident model when it gets old"""
+        if self.model is None or self.keep_alive <= 0:
+            # A negative keep_alive keeps models loaded forever, 0 unloads them after
+            # every request: either way there is no lease to renew
+            return
+        if time.monotonic() - self.last_renewal > self.keep_alive / 2:
+            self._renew()
+
+    def used(self) -> None:
+        """Note that a request was just sent to the resident model, which renews its lease"""
+        self.last_renewal = time.monotonic()
+
+    def _renew(self) -> None:
+        self.last_renewal = time.monotonic()
+        self.submit(self._load(self.model))
+
+    async def _load(self, model: str) -> None:
+        try:
+            result = await self.client.load_model(model, self.keep_alive)
+        except Exception as e:
+            ErrorHandler.handle_error(e, "Model Load Error", show_message_box=False)
+            return
+        # load_duration is close to zero when the model was already in memory
+        seconds = result.get("load_duration", 0) / 1e9
+        if seconds >= config.MODEL_LOAD_REPORT_THRESHOLD:
+            self.load_times.setdefault(model, []).append(seconds)
+            if self.on_loaded is not None:
+                self.on_loaded(model, seconds)
+
+    async def _unload(self, model: str) -> None:
+        try:
+            await self.client.unload_model(model)
+        except Exception as e:
+            ErrorHandler.handle_error(e, "Model Unload Error", show_message_box=False)
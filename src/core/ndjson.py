@@ -0,0 +1,73 @@
+import json
+from typing import Dict, Iterable, Iterator, List
+
+# Token lines of Ollama streams end with these bytes, right after the text of the token
+_GENERATE_PREFIX = b'"response":"'
+_GENERATE_SUFFIX = b'","done":false}'
+_CHAT_PREFIX = b'"message":{"role":"assistant","content":"'
+_CHAT_SUFFIX = b'"},"done":false}'
+
+def decode_line(line: bytes) -> Dict:
+    """
+    Decode one NDJSON line of an Ollama stream.
+
+    Token lines whose text needs no unescaping are sliced out directly and
+    returned as {"response": text, "done": False} (or the "message" form of
+    /api/chat) without the other fields; everything else, such as the final
+    chunk with the timings or an error, goes through json.loads.
+    """
+    if b"\\" not in line:
+        if line.endswith(_GENERATE_SUFFIX):
+            start = line.find(_GENERATE_PREFIX)
+            end = len(line) - len(_GENERATE_SUFFIX)
+            if start >= 0 and line.find(b'"', start + len(_GENERATE_PREFIX)) == end:
+                return {"response": line[start + len(_GENERATE_PREFIX):end].decode("utf-8"), "done": False}
+        elif line.endswith(_CHAT_SUFFIX):
+            start = line.find(_CHAT_PREFIX)
+            end = len(line) - len(_CHAT_SUFFIX)
+            if start >= 0 and line.find(b'"', start + len(_CHAT_PREFIX)) == end:
+                content = line[start + len(_CHAT_PREFIX):end].decode("utf-8")
+                return {"message": {"role": "assistant", "content": content}, "done": False}
+    return json.loads(line)
+
+class NDJSONDecoder:
+    """
+    Incremental decoder of NDJSON streams.
+
+    feed() takes the bytes as they arrive, in chunks of any size, and returns
+    the objects of the lines completed by them; a partial last line is kept
+    until the rest arrives.
+    """
+
+    def __init__(self):
+        self._buffer = b""
+
+    def feed(self, data: bytes) -> List[Dict]:
+        """Decode the complete lines in the data received so far"""
+        if self._buffer:
+            data = self._buffer + data
+        objects = []
+        start = 0
+        while True:
+            end = data.find(b"\n", start)
+            if end < 0:
+                break
+            if end > start:
+                line = data[start:end].strip()
+                if line:
+                    objects.append(decode_line(line))
+            start = end + 1
+        self._buffer = data[start:]
+        return objects
+
+    def close(self) -> List[Dict]:
+        """Decode a last line that was not terminated by a newline"""
+        line, self._buffer = self._buffer.strip(), b""
+        return [decode_line(line)] if line else []
+
+def iter_ndjson(chunks: Iterable[bytes]) -> Iterator[Dict]:
+    """Decode an iterable of byte chunks, such as response.iter_content(None)"""
+    decoder = NDJSONDecoder()
+    for chunk in chunks:
+        yield from decoder.feed(chunk)
+    yield from decoder.close()
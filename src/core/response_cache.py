@@ -0,0 +1,118 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+class ResponseCache:
+    """
+    Two-level cache of completed LLM responses.
+
+    Entries are keyed by a hash of the model, the resolved prompt template and
+    the input text. A bounded in-memory LRU sits in front of a SQLite store on
+    disk; when the stored responses exceed max_bytes, the least recently used
+    rows are evicted. All methods are thread-safe.
+    """
+
+    def __init__(self, path: str, max_bytes: int, memory_entries: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+
+    @staticmethod
+    def make_key(model: str, prompt_template: str, text: str) -> str:
+        """Build the cache key for a request"""
+        digest = hashlib.sha256()
+        for part in (model, prompt_template, text):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use"""
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, model TEXT, response TEXT, "
+                "size INTEGER, last_access REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)")
+        return self._db
+
+    def _remember(self, key: str, response: str) -> None:
+        """Insert into the in-memory LRU, dropping the oldest entry when full"""
+        self._memory[key] = response
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key, or None"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+            db = self._connect()
+            row = db.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            with db:
+                db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._remember(key, row[0])
+            return row[0]
+
+    def put(self, key: str, model: str, response: str) -> None:
+        """Store a completed response and evict old entries above the size limit"""
+        size = len(response.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._remember(key, response)
+            db = self._connect()
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO responses (key, model, response, size, last_access) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, model, response, size, time.time())
+                )
+                self._evict(db)
+
+    def _evict(self, db: sqlite3.Connection) -> None:
+        """Delete the least recently used rows until the store fits in max_bytes"""
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Memory hits do not touch the disk, bring their access times up to date before picking rows
+        now = time.time()
+        db.executemany("UPDATE responses SET last_access = ? WHERE key = ?",
+                       [(now + index * 1e-6, key) for index, key in enumerate(self._memory)])
+        for key, size in db.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall():
+            db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._memory.pop(key, None)
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self) -> None:
+        """Remove every cached response"""
+        with self._lock:
+            self._memory.clear()
+            db = self._connect()
+            with db:
+                db.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
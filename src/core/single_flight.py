@@ -0,0 +1,105 @@
+import asyncio
+from typing import AsyncIterator, Callable, Dict, Hashable, List, Optional
+
+class _Flight:
+    """One upstream stream and everything it has produced so far"""
+
+    def __init__(self):
+        self.items: List = []
+        self.finished = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.changed = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.cancel_handle = None
+
+    def notify(self):
+        # Wake the current waiters and give later ones a fresh event
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+class SingleFlight:
+    """
+    Shares identical in-flight async streams between their requesters.
+
+    subscribe(key, factory) starts factory() the first time a key is
+    requested. Requesters of the same key while it is still running get the
+    items already produced, then follow live. When the last subscriber
+    leaves, the upstream stream is cancelled after `grace` seconds unless a
+    new subscriber arrives in the meantime, so that a request superseded by
+    an identical one keeps its generation. A subscriber that leaves because
+    its cancel token was cancelled does not wait for the grace period. Must
+    be used from a single event loop.
+    """
+
+    def __init__(self, grace: float = 0.0):
+        self.grace = grace
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    def subscribers(self, key: Hashable) -> int:
+        """Number of requesters attached to a key"""
+        flight = self._flights.get(key)
+        return flight.subscribers if flight else 0
+
+    async def subscribe(self, key: Hashable, factory: Callable[[], AsyncIterator],
+                        cancel_token=None) -> AsyncIterator:
+        """Yield the items of the stream for key, starting it if it is not running"""
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight()
+            flight.task = asyncio.ensure_future(self._pump(key, flight, factory))
+        elif flight.cancel_handle is not None:
+            flight.cancel_handle.cancel()
+            flight.cancel_handle = None
+        flight.subscribers += 1
+
+        index = 0
+        try:
+            while True:
+                while index < len(flight.items):
+                    yield flight.items[index]
+                    index += 1
+                if flight.finished:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                await flight.changed.wait()
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.finished:
+                if self.grace > 0 and not (cancel_token is not None and cancel_token.cancelled):
+                    flight.cancel_handle = asyncio.get_event_loop().call_later(
+                        self.grace, self._abandon, key, flight)
+                else:
+                    self._abandon(key, flight)
+
+    def _abandon(self, key: Hashable, flight: _Flight) -> None:
+        """Cancel a stream that nobody follows anymore"""
+        flight.cancel_handle = None
+        if flight.subscribers == 0 and not flight.finished:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            flight.task.cancel()
+
+    async def _pump(self, key: Hashable, flight: _Flight, factory: Callable[[], AsyncIterator]) -> None:
+        """Read the upstream stream into the flight"""
+        stream = factory()
+        try:
+            async for item in stream:
+                flight.items.append(item)
+                flight.notify()
+        except asyncio.CancelledError:
+            flight.error = asyncio.CancelledError()
+            raise
+        except Exception as e:
+            flight.error = e
+        finally:
+            flight.finished = True
+            # Later requests start a new stream, completed ones are served by the response cache
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            flight.notify()
+            await stream.aclose()
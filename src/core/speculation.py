@@ -0,0 +1,127 @@
+import asyncio
+import json
+import os
+import time
+from typing import AsyncIterator, Callable, Dict, Optional
+from .cancellation import CancelToken
+from .stream_buffer import StreamBuffer
+
+class Speculation:
+    """A transformation started before the user asked for it"""
+
+    def __init__(self, key: str, on_complete: Optional[Callable[["Speculation"], None]] = None):
+        self.key = key
+        self.on_complete = on_complete
+        self.buffer = StreamBuffer()
+        self.started = None  # Set when the request is sent, after the delay
+        self.finished = None
+        self.completed = False
+        self.future = None
+        self.cancel_token = CancelToken()
+
+    def elapsed(self) -> float:
+        """Seconds of generation already done"""
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+class Speculator:
+    """
+    Runs the current transformation in the background when new clipboard
+    text arrives, so that Send can show the result at once.
+
+    Only one speculation runs at a time: a new one cancels the previous one,
+    and so does a Send that does not match it, so Ollama is not kept busy
+    with work nobody asked for. A speculation waits `delay` seconds before
+    sending anything, so text copied in quick succession does not start
+    generations. claim() is called on every Send and records whether the
+    speculation was used (finished: hit, still running: attached) or not
+    (miss), so the benefit can be measured with hit_rate(). The counters
+    are accumulated across sessions in stats_path.
+
+    submit(coro) must schedule a coroutine on the event loop of the streams,
+    and stream_factory(cancel_token) must return a stream honouring the token.
+    """
+
+    def __init__(self, submit: Callable, delay: float = 0.0, stats_path: Optional[str] = None):
+        self.submit = submit
+        self.delay = delay
+        self.stats_path = stats_path
+        self.current: Optional[Speculation] = None
+        self.stats = {"started": 0, "cancelled": 0, "hits": 0, "attached": 0, "misses": 0, "saved_seconds": 0.0}
+        if stats_path and os.path.isfile(stats_path):
+            try:
+                with open(stats_path, "r", encoding="utf-8") as file:
+                    self.stats.update(json.load(file))
+            except (OSError, ValueError):
+                pass
+
+    def save_stats(self) -> None:
+        """Write the counters to stats_path"""
+        if self.stats_path:
+            os.makedirs(os.path.dirname(self.stats_path) or ".", exist_ok=True)
+            with open(self.stats_path, "w", encoding="utf-8") as file:
+                json.dump(self.stats, file, indent=2)
+
+    def start(self, key: str, stream_factory: Callable[[CancelToken], AsyncIterator[Dict]],
+              on_complete: Optional[Callable[[Speculation], None]] = None) -> None:
+        """Speculatively run the stream returned by stream_factory for key"""
+        if self.current is not None and self.current.key == key:
+            return
+        self.cancel()
+        speculation = Speculation(key, on_complete)
+        speculation.future = self.submit(self._run(speculation, stream_factory))
+        self.current = speculation
+        self.stats["started"] += 1
+
+    def cancel(self) -> None:
+        """Cancel the running speculation, if any"""
+        speculation, self.current = self.current, None
+        if speculation is not None and not speculation.completed:
+            speculation.cancel_token.cancel()
+            speculation.future.cancel()
+            self.stats["cancelled"] += 1
+
+    def claim(self, key: str, attach: bool = True) -> Optional[Speculation]:
+        """
+        Called when the user sends a request. Returns the matching
+        speculation (complete or still streaming) or None, in which case a
+        running speculation is cancelled. Without attach (identical requests
+        are not shared), a matching speculation still streaming is cancelled
+        too, so the request does not run next to a second generation.
+        """
+        speculation = self.current
+        usable = (speculation is not None and speculation.key == key and speculation.started is not None
+                  and (speculation.completed or (attach and not speculation.future.done())))
+        if not usable:
+            self.stats["misses"] += 1
+            self.cancel()
+            return None
+        self.current = None
+        self.stats["hits" if speculation.completed else "attached"] += 1
+        self.stats["saved_seconds"] += speculation.elapsed()
+        if not speculation.completed:
+            # The caller sends the identical request right away, which takes over the
+            # running generation (see SingleFlight), so this consumer can leave
+            speculation.future.cancel()
+        return speculation
+
+    def hit_rate(self) -> float:
+        """Share of sends that could use a speculation"""
+        used = self.stats["hits"] + self.stats["attached"]
+        total = used + self.stats["misses"]
+        return used / total if total else 0.0
+
+    async def _run(self, speculation: Speculation,
+                   stream_factory: Callable[[CancelToken], AsyncIterator[Dict]]) -> None:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        speculation.started = time.monotonic()
+        async for data in stream_factory(speculation.cancel_token):
+            speculation.buffer.append(data.get("response", ""))
+            if data.get("done", False):
+                speculation.completed = True
+                break
+        speculation.finished = time.monotonic()
+        if speculation.completed and speculation.on_complete is not None:
+            speculation.on_complete(speculation)
@@ -0,0 +1,64 @@
+import json
+import time
+from contextlib import contextmanager
+
+class StartupTracer:
+    """
+    Records how long each startup phase takes.
+
+    Sequential phases are closed with mark(), each one lasting from the
+    previous mark (or the creation of the tracer) until now. Work that is
+    spread over several phases, such as decoding images, is accumulated
+    separately with measure().
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self._last = self.start
+        self.phases = []
+        self.totals = {}
+
+    def mark(self, name: str) -> None:
+        """Close the current sequential phase"""
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last))
+        self._last = now
+
+    @contextmanager
+    def measure(self, name: str):
+        """Accumulate the time spent in a block under name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.totals[name] = self.totals.get(name, 0.0) + time.perf_counter() - start
+
+    def elapsed(self) -> float:
+        """Seconds since the tracer was created"""
+        return time.perf_counter() - self.start
+
+    def as_dict(self) -> dict:
+        """Timings in milliseconds"""
+        return {
+            "phases": {name: round(seconds * 1000, 2) for name, seconds in self.phases},
+            "totals": {name: round(seconds * 1000, 2) for name, seconds in self.totals.items()},
+            "elapsed": round((self._last - self.start) * 1000, 2)
+        }
+
+    def report(self) -> str:
+        """Human readable table of the recorded timings"""
+        lines = ["Startup timings (ms):"]
+        for name, seconds in self.phases:
+            lines.append(f"  {name:<22}{seconds * 1000:>9.1f}")
+        for name, seconds in self.totals.items():
+            lines.append(f"  {name + ' (total)':<22}{seconds * 1000:>9.1f}")
+        lines.append(f"  {'time to last mark':<22}{(self._last - self.start) * 1000:>9.1f}")
+        return "\n".join(lines)
+
+    def save(self, path: str) -> None:
+        """Write the timings as JSON"""
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.as_dict(), file, indent=2)
+
+# Created as early as possible so that the import phase is measured too
+TRACER = StartupTracer()
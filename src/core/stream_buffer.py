@@ -0,0 +1,76 @@
+import threading
+import time
+from typing import Tuple
+
+class StreamBuffer:
+    """
+    Append-only text buffer for streamed LLM output.
+
+    Tokens are appended as chunks in O(1); the full text is only joined when
+    requested and the joined result is cached until the next append. Tokens
+    that have not been drawn yet are kept in a separate pending list so the UI
+    can insert only the new tail instead of redrawing the whole response.
+    """
+
+    def __init__(self, text: str = ""):
+        self._lock = threading.Lock()
+        self._chunks = [text] if text else []
+        self._pending = []
+        self._pending_since = 0.0
+        self._length = len(text)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def append(self, text: str) -> None:
+        """Append a token to the buffer"""
+        if not text:
+            return
+        with self._lock:
+            if not self._pending:
+                self._pending_since = time.perf_counter()
+            self._chunks.append(text)
+            self._pending.append(text)
+            self._length += len(text)
+
+    def text(self) -> str:
+        """Return the full buffered text"""
+        with self._lock:
+            if len(self._chunks) > 1:
+                self._chunks = ["".join(self._chunks)]
+            return self._chunks[0] if self._chunks else ""
+
+    def take_pending(self) -> str:
+        """Return the text appended since the last call"""
+        with self._lock:
+            pending = "".join(self._pending)
+            self._pending = []
+            return pending
+
+    def take_pending_timed(self) -> Tuple[str, float]:
+        """Return the text appended since the last call and how many seconds its oldest token waited"""
+        with self._lock:
+            if not self._pending:
+                return "", 0.0
+            pending = "".join(self._pending)
+            self._pending = []
+            return pending, time.perf_counter() - self._pending_since
+
+    def snapshot(self) -> str:
+        """Return the full text and mark all of it as rendered"""
+        with self._lock:
+            self._pending = []
+            if len(self._chunks) > 1:
+                self._chunks = ["".join(self._chunks)]
+            return self._chunks[0] if self._chunks else ""
+
+    def has_pending(self) -> bool:
+        """Whether there is text that has not been rendered yet"""
+        return bool(self._pending)
+
+    def reset(self, text: str = "") -> None:
+        """Replace the buffer content and drop anything not yet rendered"""
+        with self._lock:
+            self._chunks = [text] if text else []
+            self._pending = []
+            self._length = len(text)
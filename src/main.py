@@ -1,21 +1,69 @@
+from src.core.startup_trace import TRACER
+import argparse
 import tkinter as tk
 from tkinter import messagebox
 from src.core import config
 from src.ui.clipboard_viewer import ClipboardViewer
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="ClipAI clipboard transformer")
+    parser.add_argument("--trace-startup", action="store_true",
+                        help="print the duration of each startup phase")
+    parser.add_argument("--trace-output", metavar="PATH",
+                        help="write the startup timings as JSON to PATH")
+    parser.add_argument("--eager-startup", action="store_true",
+                        help="disable the fast-start path (FAST_START) for this run")
+    parser.add_argument("--exit-after-startup", action="store_true",
+                        help="quit as soon as the first frame is drawn (used by benchmarks)")
+    parser.add_argument("--metrics-report", action="store_true",
+                        help="print p50/p95 generation timings per model and transformation, then exit")
+    return parser.parse_args(argv)
+
+def print_metrics_report():
+    """Print the aggregated generation metrics"""
+    from src.core.metrics import MetricsLog, report
+    log = MetricsLog(config.data_path("metrics.jsonl"), backups=config.METRICS_LOG_BACKUPS)
+    print(report(log.records()))
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.metrics_report:
+        config.load_configs()
+        print_metrics_report()
+        return
     try:
+        TRACER.mark("imports")
+
         # Load configurations
         config.load_configs()
-        
+        if args.eager_startup:
+            config.FAST_START = False
+        TRACER.mark("config")
+
         # Create and run the main window
         root = tk.Tk()
+        TRACER.mark("window")
         app = ClipboardViewer(root)
+        TRACER.mark("widgets")
+
+        def on_first_frame():
+            TRACER.mark("first_frame")
+            app.finish_startup()
+            if args.trace_startup:
+                print(TRACER.report())
+            if args.trace_output:
+                TRACER.save(args.trace_output)
+            if args.exit_after_startup:
+                root.destroy()
+
+        # Idle callbacks queued after the initial redraws run once the first frame is on screen
+        root.after(0, lambda: root.after_idle(on_first_frame))
         root.mainloop()
+        app.close()  # The window is destroyed by now, close() does not touch Tk
     except FileNotFoundError as e:
         messagebox.showerror("Error", str(e))
     except Exception as e:
         messagebox.showerror("Error", f"An unexpected error occurred: {str(e)}")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
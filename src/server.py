@@ -0,0 +1,208 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from aiohttp import web
+from src.core import config
+from src.core.async_llm_client import AsyncLLMClient
+from src.core.chunking import ChunkedTransform
+from src.core.response_cache import ResponseCache
+
+class TransformServer:
+    """
+    Local HTTP API exposing the prompts.json transformations.
+
+    All clients share one AsyncLLMClient (and so one keep-alive connection
+    pool to Ollama), one response cache and one scheduler that lets at most
+    max_concurrency generations run at the same time; further requests wait
+    in arrival order.
+
+    Endpoints:
+        GET  /health           -> {"status": "ok"}
+        GET  /transformations  -> {"transformations": [names]}
+        GET  /models           -> {"models": [names]}
+        POST /transform        {"text", "transform", "model", "stream", "cache"}
+             streams NDJSON {"response": token, "done": false} lines and a final
+             {"done": true, "cached": bool, "total_ms": ...} line, or returns a
+             single JSON object when "stream" is false
+    """
+
+    def __init__(self, client: AsyncLLMClient = None, cache: ResponseCache = None, max_concurrency: int = None):
+        self.client = client or AsyncLLMClient()
+        self.cache = cache
+        self.max_concurrency = max_concurrency or config.SERVER_MAX_CONCURRENCY
+        self._scheduler = None
+
+    def app(self) -> web.Application:
+        """Build the aiohttp application"""
+        app = web.Application()
+        app.router.add_get("/health", self.handle_health)
+        app.router.add_get("/transformations", self.handle_transformations)
+        app.router.add_get("/models", self.handle_models)
+        app.router.add_post("/transform", self.handle_transform)
+        app.on_cleanup.append(self.close)
+        return app
+
+    async def close(self, app=None) -> None:
+        """Release the connection pool and the cache"""
+        await self.client.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    @property
+    def scheduler(self) -> asyncio.Semaphore:
+        """Limits concurrent generations, created on the serving event loop"""
+        if self._scheduler is None:
+            self._scheduler = asyncio.Semaphore(self.max_concurrency)
+        return self._scheduler
+
+    async def handle_health(self, request):
+        return web.json_response({"status": "ok"})
+
+    async def handle_transformations(self, request):
+        return web.json_response({"transformations": list(config.TRANSFORMATION_PROMPTS)})
+
+    async def handle_models(self, request):
+        try:
+            return web.json_response({"models": await self.client.fetch_models()})
+        except Exception as e:
+            return web.json_response({"error": str(e)}, status=502)
+
+    async def handle_transform(self, request):
+        try:
+            body = await request.json()
+            text = body["text"]
+        except (ValueError, KeyError, TypeError):
+            return web.json_response({"error": "expected a JSON object with a \"text\" field"}, status=400)
+        if not isinstance(text, str):
+            return web.json_response({"error": "\"text\" must be a string"}, status=400)
+        for field in ("transform", "model"):
+            if body.get(field) is not None and not isinstance(body[field], str):
+                return web.json_response({"error": f"\"{field}\" must be a string"}, status=400)
+        transform = body.get("transform") or next(iter(config.TRANSFORMATION_PROMPTS))
+        if transform not in config.TRANSFORMATION_PROMPTS:
+            return web.json_response({"error": f"unknown transformation: {transform}"}, status=404)
+        model = body.get("model") or config.DEFAULT_MODEL
+        prompt_template = config.TRANSFORMATION_PROMPTS[transform]
+        started = time.perf_counter()
+
+        cache_key = None
+        cached = None
+        if self.cache is not None and body.get("cache", True):
+            cache_key = ResponseCache.make_key(model, prompt_template, text)
+            cached = self.cache.get(cache_key)
+
+        if not body.get("stream", True):
+            from_cache = cached is not None
+            try:
+                if cached is None:
+                    parts = []
+                    async for token, from_cache in self._generate(text, transform, model, prompt_template, cache_key):
+                        parts.append(token)
+                    cached = "".join(parts)
+            except Exception as e:
+                return web.json_response({"error": str(e)}, status=502)
+            return web.json_response({
+                "response": cached, "model": model, "transform": transform, "cached": from_cache,
+                "total_ms": round((time.perf_counter() - started) * 1000, 1)
+            })
+
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+        if cached is not None:
+            await self._write(response, {"response": cached, "done": False})
+            await self._write(response, self._final(started, True))
+            return response
+
+        from_cache = False
+        stream = self._generate(text, transform, model, prompt_template, cache_key)
+        try:
+            async for token, from_cache in stream:
+                await self._write(response, {"response": token, "done": False})
+        except ConnectionResetError:
+            return response
+        except Exception as e:
+            await self._write(response, {"error": str(e), "done": True})
+            return response
+        finally:
+            # A client that disconnected leaves the stream suspended, close it so that
+            # its connection to Ollama is dropped and the generation stops
+            await stream.aclose()
+
+        await self._write(response, self._final(started, from_cache))
+        return response
+
+    async def _generate(self, text, transform, model, prompt_template, cache_key):
+        """
+        Yield (token, from_cache) pairs once the scheduler admits the request.
+        The cache is checked again at that point, since an identical request
+        may have completed while this one was waiting.
+        """
+        async with self.scheduler:
+            cached = self.cache.get(cache_key) if cache_key is not None else None
+            if cached is not None:
+                yield cached, True
+                return
+
+            stream = ChunkedTransform(
+                self.client, model, prompt_template, config.REDUCE_PROMPTS.get(transform)
+            ).stream(text)
+            parts = []
+            completed = False
+            try:
+                async for data in stream:
+                    token = data.get("response", "")
+                    parts.append(token)
+                    completed = data.get("done", False)
+                    yield token, False
+            finally:
+                await stream.aclose()
+            if completed:
+                self._store(cache_key, model, "".join(parts))
+
+    def _store(self, cache_key, model, response):
+        """Cache a completed response"""
+        if cache_key is not None:
+            self.cache.put(cache_key, model, response)
+
+    @staticmethod
+    def _final(started, cached):
+        return {"done": True, "cached": cached, "total_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+    @staticmethod
+    async def _write(response, data):
+        await response.write(json.dumps(data, ensure_ascii=False).encode("utf-8") + b"\n")
+
+def create_cache():
+    """The response cache shared with the GUI, or None when disabled"""
+    if not config.CACHE_ENABLED:
+        return None
+    return ResponseCache(config.data_path("cache.sqlite3"), config.CACHE_MAX_MB * 1024 * 1024,
+                         config.CACHE_MEMORY_ENTRIES)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the ClipAI transformations over a local HTTP API")
+    parser.add_argument("--host", help="address to listen on (default: SERVER_HOST)")
+    parser.add_argument("--port", type=int, help="port to listen on (default: SERVER_PORT)")
+    parser.add_argument("-j", "--concurrency", type=int,
+                        help="generations run at the same time (default: SERVER_MAX_CONCURRENCY)")
+    parser.add_argument("--no-cache", action="store_true", help="do not use the response cache")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        config.load_configs()
+    except FileNotFoundError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    server = TransformServer(cache=None if args.no_cache else create_cache(), max_concurrency=args.concurrency)
+    host = args.host or config.SERVER_HOST
+    port = args.port or config.SERVER_PORT
+    print(f"ClipAI server listening on http://{host}:{port}/", file=sys.stderr)
+    web.run_app(server.app(), host=host, port=port, print=None)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
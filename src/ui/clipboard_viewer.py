@@ -1,14 +1,24 @@
 import tkinter as tk
 from tkinter import ttk
-import pyperclip
-import threading
 import time
-import json
+# pyperclip, asyncio and the modules that need it (the async LLM client, chat, chunking, fan-out and
+# speculation) are imported on first use to keep them out of the startup path
+from src.core.clipboard_watcher import ClipboardWatcher, create_backend
+from src.core.clipboard_payload import ClipboardPayload
 from src.core import config
-from src.core.llm_client import LLMClient
-from src.core.markdown_parser import CustomMarkdownParser
+from src.core.startup_trace import TRACER
+from src.core.cancellation import CancelToken
+from src.core.markdown_parser import CustomMarkdownParser, IncrementalMarkdown
+from src.core.stream_buffer import StreamBuffer
+from src.core.metrics import GenerationMetrics, MetricsLog
+from src.core.history import HistoryStore
+from src.core.response_cache import ResponseCache
+from src.core.model_cache import ModelListCache
+from src.core.model_residency import ModelResidency
 from src.core.error_handler import ErrorHandler, ClipboardError, LLMError
-from src.ui.components import TextBox, Button, Dropdown, StatusBar
+from src.ui.components import TextBox, Button, Dropdown, StatusBar, load_image
+from src.ui.dispatcher import UIDispatcher, UIEvent
+from src.ui.history_panel import HistoryPanel
 
 class ClipboardViewer:
     """
@@ -22,22 +32,133 @@ class ClipboardViewer:
     
     Attributes:
         root (tk.Tk): The main application window
-        llm_active (bool): Whether an LLM request is currently active
-        llm_response: The current LLM response stream
-        current_content (str): The current content being displayed
+        llm_client (AsyncLLMClient): Asyncio client streaming responses from Ollama
+        bridge (AsyncBridge): Event loop thread on which all generations run
+        llm_future: Future of the current generation, cancelled to stop it
+        cancel_token (CancelToken): Token of the current generation, cancelled unless an identical request supersedes it
+        current_content (str): The current content being displayed, backed by output_buffer
+        output_buffer (StreamBuffer): Growable buffer holding the streamed response
+        ui (UIDispatcher): Queue through which worker threads update the UI
         is_formatted_view (bool): Whether the content is in formatted view
         markdown_parser (CustomMarkdownParser): Parser for markdown formatting
+        live_markdown (IncrementalMarkdown): Formats the output line by line while it streams
+        response_cache (ResponseCache): Cache of completed responses, None when disabled
+        metrics_log (MetricsLog): Log of the timings of each generation, None when disabled
+        generation_metrics (GenerationMetrics): Timings of the running generation
+        history (HistoryStore): Searchable record of past transformations, None when disabled
+        generation_request (tuple): Model, transformation, prompt and input of the running generation
+        residency (ModelResidency): Keeps the selected model loaded while the user is active
+        chat (ChatSession): Conversation continued by each Send while Chat Mode is selected
+        speculator (Speculator): Transforms new clipboard text before Send is pressed, None unless enabled
+        speculation_postponed (bool): Whether new clipboard text waits for the running generation to be speculated
+        input_payload (ClipboardPayload): Full clipboard text, of which the input box shows a preview
     """
     
     def __init__(self, root):
         """Initialize the ClipboardViewer."""
         self.root = root
+        self.output_buffer = StreamBuffer()
+        self.input_payload = ClipboardPayload(chunk_chars=config.INPUT_PREVIEW_CHARS)
+        self._extend_pending = False
         self.setup_ui()
-        self.llm_active = False
-        self.llm_response = None
-        self.current_content = ""
+        self._llm_client = None
+        self._bridge = None
+        self._clipboard = None
+        self._residency = None
+        self.speculator = None
+        self.speculation_postponed = False
+        self.clipboard_watcher = None
+        self.llm_future = None
+        self.cancel_token = None
+        self.llm_request_key = None
         self.is_formatted_view = False
         self.markdown_parser = CustomMarkdownParser()
+        self.live_markdown = None
+        self.response_cache = None
+        if config.CACHE_ENABLED:
+            self.response_cache = ResponseCache(
+                config.data_path("cache.sqlite3"),
+                config.CACHE_MAX_MB * 1024 * 1024,
+                config.CACHE_MEMORY_ENTRIES
+            )
+        self.metrics_log = None
+        self.generation_metrics = None
+        if config.METRICS_ENABLED:
+            self.metrics_log = MetricsLog(
+                config.data_path("metrics.jsonl"), config.METRICS_LOG_MAX_BYTES, config.METRICS_LOG_BACKUPS)
+        self.history = None
+        self.history_panel = None
+        self.generation_request = None
+        self.fanout_window = None
+        self._chat = None
+        if config.HISTORY_ENABLED:
+            self.history = HistoryStore(config.data_path("history.sqlite3"), config.HISTORY_MAX_ENTRIES)
+        self.setup_dispatcher()
+        self.setup_activity_tracking()
+        if not config.FAST_START:
+            self.fetch_models()
+            self.preload_selected_model()
+
+    @property
+    def bridge(self):
+        """The asyncio bridge, started on first use to keep asyncio out of the startup path"""
+        if self._bridge is None:
+            from src.core.async_bridge import AsyncBridge
+            self._bridge = AsyncBridge()
+            self._bridge.start()
+        return self._bridge
+
+    @property
+    def clipboard(self):
+        """The clipboard backend selected by CLIPBOARD_BACKEND, created on first use"""
+        if self._clipboard is None:
+            self._clipboard = create_backend()
+        return self._clipboard
+
+    @property
+    def residency(self):
+        """The model residency manager, created on first use"""
+        if self._residency is None:
+            self._residency = ModelResidency(
+                self.llm_client,
+                self.bridge.submit,
+                on_loaded=lambda model, seconds: self.ui.post(
+                    UIEvent.STATUS, config.STATUS_MODEL_LOADED.format(model, seconds))
+            )
+        return self._residency
+
+    @property
+    def chat(self):
+        """The Chat Mode conversation, started on first use"""
+        if self._chat is None:
+            from src.core.chat import ChatSession
+            self._chat = ChatSession()
+        return self._chat
+
+    @property
+    def llm_client(self):
+        """The asyncio LLM client, created on first use"""
+        if self._llm_client is None:
+            from src.core.async_llm_client import AsyncLLMClient
+            self._llm_client = AsyncLLMClient()
+        return self._llm_client
+
+    def finish_startup(self):
+        """Run the startup work deferred until the first frame is drawn"""
+        if config.FAST_START:
+            with TRACER.measure("first_clipboard_read"):
+                self.update_clipboard_content()
+            self.fetch_models()
+            self.preload_selected_model()
+
+    @property
+    def current_content(self):
+        """The full text of the current response"""
+        return self.output_buffer.text()
+
+    @current_content.setter
+    def current_content(self, value):
+        self.output_buffer.reset(value)
 
     def setup_ui(self):
         """Initialize and setup all UI components"""
@@ -48,7 +169,7 @@ class ClipboardViewer:
         self.root.resizable(False, False)
 
         # Load icon
-        icon = tk.PhotoImage(file=config.ICON_PATH)
+        icon = load_image(config.ICON_PATH)
         self.root.iconphoto(True, icon)
 
         # Apply theme
@@ -61,8 +182,39 @@ class ClipboardViewer:
         self.setup_button_bar()
         self.setup_status_bar()
 
-        # Initialize with current clipboard content
-        self.update_clipboard_content()
+        # Initialize with current clipboard content, the fast-start path reads it after the first frame
+        if not config.FAST_START:
+            with TRACER.measure("first_clipboard_read"):
+                self.update_clipboard_content()
+
+    def setup_dispatcher(self):
+        """Register the main-thread handlers for events posted by worker threads"""
+        self.ui = UIDispatcher(self.root)
+        self.ui.register(UIEvent.STATUS, self.status_bar.set, coalesce=True)
+        self.ui.register(UIEvent.OUTPUT, self.render_stream, coalesce=True)
+        self.ui.register(UIEvent.SEND_BUTTON, self.set_send_button, coalesce=True)
+        self.ui.register(UIEvent.CLIPBOARD, self.handle_clipboard_change, coalesce=True)
+        self.ui.register(UIEvent.STREAM_END, self.finish_stream)
+        self.ui.register(UIEvent.MODELS, self.set_model_list, coalesce=True)
+        self.ui.register(UIEvent.ERROR, lambda error: ErrorHandler.handle_error(error[1], error[0]))
+        self.ui.start()
+
+    def setup_activity_tracking(self):
+        """Keep the selected model loaded while the user works with the window"""
+        def handle_activity(event):
+            if self._residency is not None:
+                self._residency.activity()
+        self.root.bind_all('<KeyPress>', handle_activity, add='+')
+        self.root.bind_all('<ButtonPress>', handle_activity, add='+')
+        self.model_menu.bind('<<ComboboxSelected>>', lambda event: self.preload_selected_model())
+        # Ctrl+H alone is backspace in Tk text widgets
+        self.root.bind_all('<Control-H>', lambda event: self.show_history())
+        self.root.bind_all('<Control-F>', lambda event: self.show_fanout())
+
+    def preload_selected_model(self):
+        """Load the selected model in the background so the first request starts quickly"""
+        if config.MODEL_PRELOAD:
+            self.residency.select(self.model_menu.get())
 
     def setup_main_container(self):
         """Setup the main container frame"""
@@ -93,12 +245,27 @@ class ClipboardViewer:
         )
         self.text_box.grid(row=0, column=0, sticky="ew")
 
+        # Extend the preview of a large clipboard text when the user scrolls near its end
+        scrollbar_set = self.text_box.widget.vbar.set
+        def handle_input_scroll(first, last):
+            scrollbar_set(first, last)
+            if float(last) > 0.9 and self.input_payload.truncated and not self._extend_pending:
+                self._extend_pending = True
+                self.root.after_idle(self.extend_input_preview)
+        self.text_box.widget.configure(yscrollcommand=handle_input_scroll)
+
         # Bind Shift+Enter to send_to_llm and prevent default behavior
         def handle_shift_return(event):
             self.handle_send_click()
             return "break"
         self.text_box.bind('<Shift-Return>', handle_shift_return)
 
+        # Bind Ctrl+Shift+Enter to send without using the response cache
+        def handle_bypass_cache_return(event):
+            self.handle_send_click(bypass_cache=True)
+            return "break"
+        self.text_box.bind('<Control-Shift-Return>', handle_bypass_cache_return)
+
     def setup_output_area(self):
         """Setup the output area with text widget"""
         # Create output frame
@@ -137,6 +304,15 @@ class ClipboardViewer:
             spacing1=config.BULLET_SPACING, 
             spacing3=config.BULLET_SPACING
         )
+        self.out_text_box.widget.tag_configure('numbered', 
+            lmargin1=config.BULLET_MARGIN_LEFT, 
+            lmargin2=config.BULLET_MARGIN_RIGHT, 
+            spacing1=config.BULLET_SPACING, 
+            spacing3=config.BULLET_SPACING
+        )
+        self.out_text_box.widget.tag_configure('code', font=(config.CODE_FONT_FAMILY, config.FONT_SIZE), background=config.CODE_BACKGROUND)
+        self.out_text_box.widget.tag_configure('code_block', font=(config.CODE_FONT_FAMILY, config.FONT_SIZE), background=config.CODE_BACKGROUND)
+        self.out_text_box.widget.tag_configure('link', foreground=config.LINK_COLOR, underline=True)
 
         # Ensure the text box is disabled
         self.out_text_box.widget.configure(state='disabled')
@@ -172,8 +348,7 @@ class ClipboardViewer:
 
         # Auto-refresh button
         self.auto_refresh = False
-        self.auto_refresh_off_image = tk.PhotoImage(file=config.AUTO_REFRESH_OFF_ICON)
-        self.auto_refresh_on_image = tk.PhotoImage(file=config.AUTO_REFRESH_ON_ICON)
+        self.auto_refresh_off_image = load_image(config.AUTO_REFRESH_OFF_ICON)
         self.auto_refresh_button = ttk.Button(
             self.button_frame,
             image=self.auto_refresh_off_image,
@@ -202,8 +377,10 @@ class ClipboardViewer:
         self.copy_button.grid(row=0, column=6, padx=2)
 
         # Send button
-        self.send_image = tk.PhotoImage(file=config.SEND_ICON)
-        self.stop_image = tk.PhotoImage(file=config.STOP_ICON)
+        self.send_image = load_image(config.SEND_ICON)
+        if not config.FAST_START:
+            load_image(config.STOP_ICON)
+            load_image(config.AUTO_REFRESH_ON_ICON)
         self.send_button = ttk.Button(
             self.button_frame,
             image=self.send_image,
@@ -234,9 +411,12 @@ class ClipboardViewer:
         )
         self.model_menu.grid(row=0, column=4, padx=5, sticky="ew")
         
-        # Initialize model list
+        # Show the last known model list right away, fetch_models refreshes it in the background
         self.model_list = []
-        self.fetch_models()
+        self.model_cache = ModelListCache(config.data_path("models.json"), config.MODEL_CACHE_TTL)
+        cached_models = self.model_cache.load()
+        if cached_models:
+            self.set_model_list(cached_models)
 
     def setup_status_bar(self):
         """Setup the status bar"""
@@ -251,23 +431,14 @@ class ClipboardViewer:
                 self.out_text_box.widget.configure(state='normal')
                 self.out_text_box.delete(1.0, tk.END)
                 
-                # Parse the markdown content
-                plain_text, tags = self.markdown_parser.parse(self.current_content)
-                
-                # Insert the plain text
-                self.out_text_box.insert(tk.END, plain_text)
+                # Format everything received so far, later tokens are fed to the same parser
+                self.live_markdown = IncrementalMarkdown(self.markdown_parser)
+                plain_text, tag_ranges = self.live_markdown.render(self.output_buffer.snapshot())
                 
-                # Apply tags in reverse order to handle nested formatting
-                for tag_name, start, end in sorted(tags, key=lambda x: x[1], reverse=True):
-                    try:
-                        # Convert character positions to line.column format
-                        start_line = "1.0"
-                        end_line = "1.0"
-                        
-                        # Add the tag
-                        self.out_text_box.widget.tag_add(tag_name, f"{start_line}+{start}c", f"{end_line}+{end}c")
-                    except Exception as e:
-                        ErrorHandler.handle_error(e, "Tag Application Error", show_message_box=False)
+                # Insert the plain text, then apply all ranges of each tag in a single call
+                self.out_text_box.widget.insert("1.0", plain_text, ())
+                for tag_name, indexes in tag_ranges.items():
+                    self.out_text_box.widget.tag_add(tag_name, *indexes)
                 
                 self.out_text_box.widget.configure(state='disabled')
                 self.is_formatted_view = True
@@ -281,58 +452,331 @@ class ClipboardViewer:
             try:
                 self.out_text_box.widget.configure(state='normal')
                 self.out_text_box.delete(1.0, tk.END)
-                self.out_text_box.insert(tk.END, self.current_content)
+                self.out_text_box.insert(tk.END, self.output_buffer.snapshot())
                 self.out_text_box.widget.configure(state='disabled')
+                self.live_markdown = None
                 self.is_formatted_view = False
             except Exception as e:
                 self.out_text_box.widget.configure(state='disabled')
                 ErrorHandler.handle_error(e, "View Switch Error")
 
-    def handle_send_click(self):
+    def apply_markdown_updates(self, updates):
+        """Write formatted lines produced by IncrementalMarkdown into the output box"""
+        widget = self.out_text_box.widget
+        for line_number, plain_line, tags, is_new in updates:
+            line = line_number + 1
+            if is_new:
+                if line > 1:
+                    widget.insert(tk.END, "\n")
+            else:
+                widget.delete(f"{line}.0", f"{line}.end")
+            # An empty tag list keeps the new text from inheriting neighbouring tags
+            widget.insert(f"{line}.0", plain_line, ())
+            for tag_name, start, end in tags:
+                widget.tag_add(tag_name, f"{line}.{start}", f"{line}.{end}")
+
+    def handle_send_click(self, bypass_cache=False):
         """Handle send button click"""
-        if self.llm_active and self.llm_response:
-            self.llm_active = False
+        if self.llm_future is not None and not self.llm_future.done():
+            self.cancel_llm()
             self.status_bar.set(config.STATUS_STOPPED)
-            self.llm_response.close()
             return
-        self.start_qa_llm()
+        self.start_qa_llm(bypass_cache)
+
+    def cancel_llm(self, keep_shared=False):
+        """
+        Cancel the running generation, which closes its connection to Ollama.
+        With keep_shared the generation is kept for a moment so that an
+        identical new request can take it over.
+        """
+        if self.llm_future is not None:
+            self.stop_generation(keep_shared)
+            self.set_send_button("send")
+
+    def stop_generation(self, keep_shared=False):
+        """Cancel the running generation without touching Tk, so it also works once the window is gone"""
+        if self.llm_future is not None:
+            if not keep_shared:
+                self.cancel_token.cancel()
+            self.llm_future.cancel()
+            self.llm_future = None
+            # A generation taken over by an identical request is recorded once, by the new request
+            self.record_generation(completed=False, add_history=not keep_shared)
+
+    def record_generation(self, completed, add_history=True):
+        """Log the timings of the current generation and, with add_history, add it to the history"""
+        metrics, self.generation_metrics = self.generation_metrics, None
+        request, self.generation_request = self.generation_request, None
+        record = None
+        if metrics is not None:
+            if metrics.finished is None:
+                metrics.finish()
+            completed = completed or metrics.completed  # Finished before its end was handled
+            record = metrics.as_record()
+            if self.metrics_log is not None:
+                try:
+                    self.metrics_log.append(record)
+                except OSError as e:
+                    ErrorHandler.handle_error(e, "Metrics Error", show_message_box=False)
+        if add_history and request is not None and self.history is not None and len(self.output_buffer):
+            model, transform, prompt, text = request
+            self.history.add(model, transform, prompt, text, self.output_buffer.text(), completed, record)
+
+    def show_history(self):
+        """Open the history window"""
+        if self.history is None:
+            return
+        if self.history_panel is None:
+            self.history_panel = HistoryPanel(self.root, self.history, self.restore_history)
+        self.history_panel.show()
+
+    def show_fanout(self):
+        """Open the window comparing several models and transformations"""
+        if self.fanout_window is None:
+            from src.ui.fanout_window import FanOutWindow
+            self.fanout_window = FanOutWindow(
+                self.root, self.ui, self.start_fanout, self.pick_fanout_result, self.record_fanout)
+        self.fanout_window.show(self.model_list or [self.model_menu.get()], self.transformation_options,
+                                self.model_menu.get(), self.transformation_menu.get())
+
+    def start_fanout(self, pairs, on_update):
+        """Send the input to every (model, transformation) pair, None when there is no input"""
+        clipboard_text = self.get_input_text()
+        if not clipboard_text.strip():
+            return None
+        from src.core.fanout import FanOut
+        fanout = FanOut.from_selection(
+            self.llm_client, clipboard_text, pairs, config.TRANSFORMATION_PROMPTS, config.REDUCE_PROMPTS,
+            concurrency=config.FANOUT_CONCURRENCY, on_update=on_update
+        )
+        fanout.future = self.bridge.submit(fanout.run())
+        return fanout
+
+    def pick_fanout_result(self, stream):
+        """Copy the response chosen in the fan-out window and show it in the main window"""
+        def pick():
+            self.cancel_llm()
+            self.clear_outbox()
+            self.show_cached_response(stream.buffer.text(), stream.model)
+            self.clipboard.write(stream.buffer.text())
+            self.status_bar.set(config.STATUS_FANOUT_PICKED.format(stream.model, stream.transform))
+
+        ErrorHandler.safe_execute(pick, "Copy Error")
+
+    def record_fanout(self, fanout):
+        """Log the timings of the fan-out streams that were sent"""
+        if self.metrics_log is None:
+            return
+        for stream in fanout.streams:
+            if stream.metrics.finished is not None:
+                try:
+                    self.metrics_log.append(stream.metrics.as_record())
+                except OSError as e:
+                    ErrorHandler.handle_error(e, "Metrics Error", show_message_box=False)
+                    return
+
+    def restore_history(self, entry):
+        """Show a past transformation in the main window"""
+        self.cancel_llm()
+        if self.auto_refresh:
+            self.toggle_auto_refresh()  # It would replace the restored input right away
+        self.show_input(entry["input"])
+        if entry["transform"] in self.transformation_options:
+            self.transformation_menu.set(entry["transform"])
+        if entry["model"] in self.model_list:
+            self.model_menu.set(entry["model"])
+        self.clear_outbox()
+        self.show_cached_response(entry["output"], entry["model"])
+        created = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["created"]))
+        self.status_bar.set(config.STATUS_HISTORY_RESTORED.format(created, entry["model"]))
+
+    def close(self):
+        """
+        Stop running generations and release resources once the window is gone.
+        No step touches Tk, and a step that fails does not skip the ones after
+        it, so the response cache and the history are always flushed.
+        """
+        steps = [self.stop_generation]
+        if self.fanout_window is not None and self.fanout_window.fanout is not None:
+            steps.append(self.fanout_window.fanout.cancel)
+        if self.clipboard_watcher is not None:
+            steps.append(self.clipboard_watcher.stop)
+        if self.speculator is not None:
+            steps += [self.speculator.cancel, self.speculator.save_stats]
+        if self._clipboard is not None:
+            steps.append(self._clipboard.close)
+        if self._bridge is not None:
+            if self._llm_client is not None:
+                steps.append(lambda: self._bridge.run(self._llm_client.close(), timeout=5))
+            steps.append(self._bridge.stop)
+        if self.response_cache is not None:
+            steps.append(self.response_cache.close)
+        if self.history is not None:
+            steps.append(self.history.close)
+        for step in steps:
+            ErrorHandler.safe_execute(step, "Shutdown Error", show_message_box=False)
 
     def fetch_models(self):
-        """Fetch available models from Ollama API"""
-        def fetch():
+        """Fetch available models from Ollama API in the background"""
+        self.bridge.submit(self.refresh_models())
+
+    async def refresh_models(self):
+        """Fetch the model list, retrying while Ollama starts up, and update the dropdown"""
+        import asyncio
+        delay = config.MODEL_FETCH_RETRY_DELAY
+        attempts = max(1, config.MODEL_FETCH_RETRIES)  # 0 or less still tries once
+        for attempt in range(attempts):
             try:
-                self.model_list = LLMClient.fetch_models()
-                self.model_menu.config(values=self.model_list)
-                if self.model_menu.get() not in self.model_list:
-                    self.model_menu.set(self.model_list[0])
+                models = await self.llm_client.fetch_models()
+                break
             except Exception as e:
-                raise LLMError(f"Failed to fetch models: {str(e)}")
+                error = e
+                if attempt + 1 < attempts:
+                    await asyncio.sleep(delay)
+                    delay *= 2
+        else:
+            self.ui.post(UIEvent.STATUS, config.STATUS_MODELS_UNAVAILABLE.format(error))
+            return
+
+        self.ui.post(UIEvent.MODELS, models)
+        try:
+            self.model_cache.save(models)
+        except OSError as e:
+            ErrorHandler.handle_error(e, "Model Cache Error", show_message_box=False)
 
-        ErrorHandler.safe_execute(fetch, "Model Fetch Error")
+    def set_model_list(self, models):
+        """Show a model list in the model dropdown"""
+        self.model_list = models
+        self.model_menu.config(values=self.model_list)
+        if self.model_list and self.model_menu.get() not in self.model_list:
+            self.model_menu.set(self.model_list[0])
+            if self._residency is not None:
+                self.preload_selected_model()
 
-    def update_clipboard_content(self):
+    def handle_clipboard_change(self, clipboard_text):
+        """Show new clipboard text picked up by auto-refresh and optionally transform it right away"""
+        self.update_clipboard_content(clipboard_text)
+        if config.SPECULATIVE_TRANSFORM:
+            self.speculate()
+
+    def speculate(self):
+        """
+        Start the selected transformation of the input text in the background,
+        once the running generation (if any) has finished
+        """
+        if self.llm_future is not None and not self.llm_future.done():
+            # Do not compete with the generation the user is waiting for
+            self.speculation_postponed = True
+            return
+        self.speculation_postponed = False
+        text = self.input_payload.text
+        if not text.strip():
+            return
+        selected_option = self.transformation_menu.get()
+        if selected_option == config.CHAT_TRANSFORMATION:
+            return  # The answer depends on the conversation, which Send may change first
+        model = self.model_menu.get()
+        prompt_template = config.TRANSFORMATION_PROMPTS.get(selected_option, "{}")
+        key = ResponseCache.make_key(model, prompt_template, text)
+        if self.response_cache is not None and self.lookup_cache(key) is not None:
+            return  # Already instant
+        if self.speculator is None:
+            from src.core.speculation import Speculator
+            self.speculator = Speculator(
+                self.bridge.submit, config.SPECULATIVE_DELAY, config.data_path("speculation.json"))
+
+        def store(speculation):
+            if self.response_cache is not None:
+                try:
+                    self.response_cache.put(speculation.key, model, speculation.buffer.text())
+                except Exception as e:
+                    ErrorHandler.handle_error(e, "Cache Error", show_message_box=False)
+
+        def stream(cancel_token):
+            from src.core.chunking import ChunkedTransform
+            transform = ChunkedTransform(self.llm_client, model, prompt_template,
+                                         config.REDUCE_PROMPTS.get(selected_option), cancel_token=cancel_token)
+            return transform.stream(text)
+
+        self.speculator.start(key, stream, store)
+
+    def update_clipboard_content(self, clipboard_text=None):
         """Update the text box with current clipboard content"""
         def update():
             try:
-                clipboard_text = pyperclip.paste()
-                self.text_box.delete(1.0, tk.END)
-                if clipboard_text:
-                    self.text_box.insert(tk.END, clipboard_text)
-                    self.status_bar.set(config.STATUS_UPDATED.format(time.strftime('%H:%M:%S')))
+                text = self.clipboard.read() if clipboard_text is None else clipboard_text
+                self.show_input(text)
+                if text:
+                    self.status_bar.set(config.STATUS_UPDATED.format(
+                        time.strftime('%H:%M:%S'), self.input_payload.describe()))
                 else:
-                    self.text_box.insert(tk.END, config.STATUS_EMPTY)
                     self.status_bar.set(config.STATUS_NO_TEXT)
             except Exception as e:
                 raise ClipboardError(f"Failed to update clipboard: {str(e)}")
 
         ErrorHandler.safe_execute(update, "Clipboard Update Error")
 
+    def show_input(self, text):
+        """Keep text as the input payload and show its first chunk in the input box"""
+        self.input_payload = ClipboardPayload(text, config.INPUT_PREVIEW_CHARS)
+        widget = self.text_box.widget
+        widget.configure(state='normal')
+        widget.delete(1.0, tk.END)
+        widget.insert(tk.END, self.input_payload.preview() if text else config.STATUS_EMPTY)
+        widget.edit_modified(False)
+        self.update_input_state()
+
+    def update_input_state(self):
+        """Only allow editing a text that is shown in full, and not while auto-refresh is on"""
+        read_only = self.auto_refresh or self.input_payload.is_large
+        self.text_box.widget.configure(state='disabled' if read_only else 'normal')
+
+    def extend_input_preview(self):
+        """Append the next chunk of a large clipboard text to the input box"""
+        self._extend_pending = False
+        if not self.input_payload.truncated:
+            return
+        widget = self.text_box.widget
+        widget.configure(state='normal')
+        widget.insert(tk.END, self.input_payload.next_chunk())
+        widget.edit_modified(False)
+        self.update_input_state()
+        self.status_bar.set(config.STATUS_PREVIEW.format(self.input_payload.describe()))
+
+    def get_input_text(self):
+        """The text to send: the selected range or the full payload, or the input box if the user edited it"""
+        widget = self.text_box.widget
+        selection = widget.tag_ranges('sel')
+        if widget.edit_modified():
+            # Typed or edited by the user, only possible when the whole text fits in the input box
+            return widget.get(*selection) if selection else self.text_box.get('1.0', tk.END)
+        if selection:
+            # The preview is a prefix of the payload, so offsets in the widget are offsets in the payload
+            return self.input_payload.slice(self._input_offset(selection[0]), self._input_offset(selection[1]))
+        return self.input_payload.text
+
+    def _input_offset(self, index):
+        """Character offset of a Tk index in the input box"""
+        count = self.text_box.widget.count("1.0", index, "chars")
+        if not count:
+            return 0
+        return count[0] if isinstance(count, tuple) else count
+
     def clear_content(self):
         """Clear the text box"""
         try:
+            self.input_payload = ClipboardPayload(chunk_chars=config.INPUT_PREVIEW_CHARS)
+            self.text_box.widget.configure(state='normal')
             self.text_box.delete(1.0, tk.END)
+            self.text_box.widget.edit_modified(False)
+            self.update_input_state()
             self.clear_outbox()
-            self.status_bar.set(config.STATUS_CLEARED)
+            if self._chat is not None and len(self._chat):
+                # A new session, so a turn still streaming cannot add itself to it
+                self._chat = None
+                self.status_bar.set(config.STATUS_CHAT_CLEARED)
+            else:
+                self.status_bar.set(config.STATUS_CLEARED)
         except Exception as e:
             ErrorHandler.handle_error(e, "Clear Error")
 
@@ -341,6 +785,7 @@ class ClipboardViewer:
         try:
             self.current_content = ""
             self.is_formatted_view = False
+            self.live_markdown = None
             self.out_text_box.widget.configure(state='normal')
             self.out_text_box.delete(1.0, tk.END)
             self.out_text_box.widget.configure(state='disabled')
@@ -353,111 +798,219 @@ class ClipboardViewer:
         try:
             self.auto_refresh = not self.auto_refresh
             if self.auto_refresh:
-                self.auto_refresh_button.configure(image=self.auto_refresh_on_image)
-                self.auto_refresh_button.image = self.auto_refresh_on_image  # Keep reference
+                on_image = load_image(config.AUTO_REFRESH_ON_ICON)
+                self.auto_refresh_button.configure(image=on_image)
+                self.auto_refresh_button.image = on_image  # Keep reference
                 self.status_bar.set(config.STATUS_AUTO_REFRESH_ENABLED)
-                self.monitor_thread = threading.Thread(target=self.monitor_clipboard, daemon=True)
-                self.monitor_thread.start()
-                self.text_box.widget.configure(state='disabled')
+                if self.clipboard_watcher is None:
+                    self.clipboard_watcher = ClipboardWatcher(
+                        self.clipboard,
+                        lambda text: self.ui.post(UIEvent.CLIPBOARD, text)
+                    )
+                self.ignore_output()
+                self.clipboard_watcher.start(self.input_payload.text)
+                self.update_input_state()
             else:
                 self.auto_refresh_button.configure(image=self.auto_refresh_off_image)
                 self.auto_refresh_button.image = self.auto_refresh_off_image  # Keep reference
                 self.status_bar.set(config.STATUS_AUTO_REFRESH_DISABLED)
-                self.monitor_thread = None
-                self.text_box.widget.configure(state='normal')
+                if self.clipboard_watcher is not None:
+                    self.clipboard_watcher.stop()
+                if self.speculator is not None:
+                    self.speculator.cancel()
+                self.speculation_postponed = False
+                self.update_input_state()
         except Exception as e:
             ErrorHandler.handle_error(e, "Auto-refresh Toggle Error")
 
-    def monitor_clipboard(self):
-        """Continuously monitor clipboard for changes"""
-        last_content = self.text_box.get('1.0', tk.END)
-        while self.auto_refresh:
-            try:
-                current_content = pyperclip.paste()
-                # Only update if clipboard content is:
-                # - Not empty
-                # - Different from last check
-                # - Different from current transformed content
-                # - Different from what's displayed in text box
-                if (current_content != "" and
-                    current_content != last_content and 
-                    current_content != self.current_content and
-                    current_content != self.text_box.get('1.0', tk.END)):
-                    last_content = current_content
-                    self.root.after(0, self.update_clipboard_content)
-                time.sleep(0.5)
-            except Exception as e:
-                ErrorHandler.handle_error(e, "Clipboard Monitor Error", show_message_box=False)
-                break
+    def start_qa_llm(self, bypass_cache=False):
+        """Start the LLM query on the asyncio bridge, superseding any running one"""
+        # Read all widget state here, the generation task must not touch Tk
+        clipboard_text = self.get_input_text()
+        selected_option = self.transformation_menu.get()
+        model = self.model_menu.get()
+        prompt_template = config.TRANSFORMATION_PROMPTS.get(selected_option, "{}")
+        reduce_template = config.REDUCE_PROMPTS.get(selected_option)
+        chat = self.chat if selected_option == config.CHAT_TRANSFORMATION else None
+        request_key = ResponseCache.make_key(model, prompt_template, clipboard_text)
 
-    def start_qa_llm(self):
-        """Start the LLM query in a separate thread"""
+        # Any other generation is torn down at once, an identical one is taken over below
+        self.cancel_llm(keep_shared=request_key == self.llm_request_key and not bypass_cache)
+        self.speculation_postponed = False  # The user sent the text themselves
         self.clear_outbox()
-        thread = threading.Thread(target=self.send_to_llm, daemon=True)
-        thread.start()
-
-    def send_to_llm(self):
-        """Send clipboard text to an Ollama LLM model"""
-        def send():
-            clipboard_text = self.text_box.get('1.0', tk.END)
-            if not clipboard_text.strip():
-                self.status_bar.set(config.STATUS_NO_TEXT)
-                return
-
-            selected_option = self.transformation_menu.get()
-            prompt_template = config.TRANSFORMATION_PROMPTS.get(selected_option, "{}")
-            formatted_prompt = prompt_template.format(clipboard_text)
-
-            model = self.model_menu.get()
+        if not clipboard_text.strip():
+            self.status_bar.set(config.STATUS_NO_TEXT)
+            return
+
+        speculation = None
+        if self.speculator is not None and chat is None:
+            if bypass_cache:
+                self.speculator.cancel()
+            else:
+                # A running speculation can only be joined through single flight
+                speculation = self.speculator.claim(request_key, attach=config.SINGLE_FLIGHT)
+                if speculation is not None and speculation.completed:
+                    self.show_cached_response(speculation.buffer.text(), model)
+                    self.status_bar.set(config.STATUS_SPECULATIVE_HIT.format(model, self.speculator.hit_rate()))
+                    return
+
+        cache_key = None
+        if self.response_cache is not None and chat is None:
+            cache_key = request_key
+            if not bypass_cache:
+                cached = self.lookup_cache(cache_key)
+                if cached is not None:
+                    self.show_cached_response(cached, model)
+                    return
+
+        if speculation is not None:
+            # The identical request below joins the generation that is already running
+            self.status_bar.set(config.STATUS_SPECULATIVE_ATTACHED.format(model))
+        else:
             self.status_bar.set(config.STATUS_SENDING.format(model))
-            self.root.update_idletasks()
+        self.set_send_button("stop")
+        if self._residency is not None and model == self._residency.model:
+            self._residency.used()
 
-            try:
-                self.llm_active = True
-                self.llm_response = LLMClient.generate_stream(model, formatted_prompt)
-                self.send_button.configure(image=self.stop_image)
-                self.send_button.image = self.stop_image  # Keep reference
+        # Each generation writes to its own buffer so a superseded task can never
+        # leak tokens into the output of the new one
+        self.output_buffer = StreamBuffer()
+        if config.LIVE_MARKDOWN:
+            self.live_markdown = IncrementalMarkdown(self.markdown_parser)
+            self.is_formatted_view = True
+        if self.metrics_log is not None or self.history is not None:
+            self.generation_metrics = GenerationMetrics(model, selected_option, len(clipboard_text))
+        self.generation_request = (model, selected_option, prompt_template, clipboard_text)
+        self.cancel_token = CancelToken()
+        self.llm_request_key = request_key
+        self.llm_future = self.bridge.submit(
+            self.send_to_llm(self.output_buffer, clipboard_text, prompt_template, model, cache_key,
+                             reduce_template, self.generation_metrics, self.cancel_token, chat)
+        )
 
-                self.current_content = ""
-                self.is_formatted_view = False
-                
-                for line in self.llm_response.iter_lines():
-                    if not self.llm_active:
-                        break
-                    if line:
-                        data = json.loads(line.decode())
-                        token = data.get("response", "")
-                        self.current_content += token
-                        
-                        # Update streaming text
-                        self.out_text_box.widget.configure(state='normal')
-                        self.out_text_box.delete(1.0, tk.END)
-                        self.out_text_box.insert(tk.END, self.current_content)
-                        self.out_text_box.see(tk.END)
-                        self.out_text_box.widget.configure(state='disabled')
-                        self.root.update_idletasks()
-                        
-                        # If this is the last token, switch to HTML widget with formatting
-                        if data.get("done", False):
-                            self.switch_to_html_view()
-                            break
-                self.status_bar.set(config.STATUS_RECEIVED.format(model))
-            except Exception as e:
-                if self.llm_active:
-                    raise LLMError(f"LLM request failed: {str(e)}")
+    def lookup_cache(self, cache_key):
+        """Return a cached response, cache failures only disable the lookup"""
+        try:
+            return self.response_cache.get(cache_key)
+        except Exception as e:
+            ErrorHandler.handle_error(e, "Cache Error", show_message_box=False)
+            return None
+
+    def show_cached_response(self, response, model):
+        """Replay a cached response into the output box"""
+        self.output_buffer = StreamBuffer()
+        self.output_buffer.append(response)
+        self.switch_to_html_view()
+        self.ignore_output()
+        self.status_bar.set(config.STATUS_CACHED.format(model))
+
+    def ignore_output(self):
+        """Keep auto-refresh from picking up our own response when it is copied"""
+        if self.clipboard_watcher is not None and len(self.output_buffer):
+            self.clipboard_watcher.ignore(self.output_buffer.text())
+
+    def render_stream(self, _=None):
+        """Append newly streamed tokens to the output box"""
+        pending, lag = self.output_buffer.take_pending_timed()
+        if pending:
+            if self.generation_metrics is not None:
+                self.generation_metrics.rendered(lag)
+            try:
+                self.out_text_box.widget.configure(state='normal')
+                if self.is_formatted_view and self.live_markdown is not None:
+                    self.apply_markdown_updates(self.live_markdown.feed(pending))
+                else:
+                    self.out_text_box.insert(tk.END, pending)
+                self.out_text_box.see(tk.END)
             finally:
-                self.llm_response = None
-                self.send_button.configure(image=self.send_image)
-                self.send_button.image = self.send_image  # Keep reference
+                self.out_text_box.widget.configure(state='disabled')
+
+    def set_send_button(self, mode):
+        """Show the send or the stop image on the send button"""
+        image = load_image(config.STOP_ICON) if mode == "stop" else self.send_image
+        self.send_button.configure(image=image)
+        self.send_button.image = image  # Keep reference
+
+    def finish_stream(self, result):
+        """Flush the remaining tokens and restore the send button once a stream ends"""
+        buffer, completed = result
+        if buffer is not self.output_buffer:
+            return  # A superseded generation
+        self.render_stream()
+        self.llm_future = None
+        self.set_send_button("send")
+        metrics = self.generation_metrics
+        if completed and metrics is not None:
+            if metrics.transform == config.CHAT_TRANSFORMATION:
+                self.status_bar.set(config.STATUS_CHAT_RECEIVED.format(len(self.chat), metrics.model, metrics.summary()))
+            else:
+                self.status_bar.set(config.STATUS_RECEIVED_METRICS.format(metrics.model, metrics.summary()))
+        self.record_generation(completed)
+        if completed:
+            # The last token has arrived, switch to the formatted view
+            self.switch_to_html_view()
+            self.ignore_output()
+        if self.speculation_postponed:
+            self.speculate()
+
+    async def send_to_llm(self, buffer, clipboard_text, prompt_template, model, cache_key=None, reduce_template=None,
+                          metrics=None, cancel_token=None, chat=None):
+        """
+        Send clipboard text to an Ollama LLM model, in chunks if it does not fit
+        in one request, or as the next turn of the chat session if one is given
+        """
+        def show_progress(phase, done, total):
+            if phase == "map":
+                self.ui.post(UIEvent.STATUS, config.STATUS_CHUNKS.format(done, total, model))
+            else:
+                self.ui.post(UIEvent.STATUS, config.STATUS_COMBINING.format(model))
 
-        ErrorHandler.safe_execute(send, "LLM Request Error")
+        if chat is not None:
+            stream = chat.stream(
+                self.llm_client, model, clipboard_text, cancel_token,
+                on_summarize=lambda: self.ui.post(UIEvent.STATUS, config.STATUS_CHAT_SUMMARIZING.format(model))
+            )
+        else:
+            from src.core.chunking import ChunkedTransform
+            stream = ChunkedTransform(
+                self.llm_client, model, prompt_template, reduce_template, on_progress=show_progress,
+                cancel_token=cancel_token
+            ).stream(clipboard_text)
+        completed = False
+
+        try:
+            async for data in stream:
+                # Tokens are only buffered here, render_stream draws them on the main thread
+                buffer.append(data.get("response", ""))
+                self.ui.post(UIEvent.OUTPUT)
+                if metrics is not None:
+                    metrics.token(data.get("response", ""))
+
+                if data.get("done", False):
+                    completed = True
+                    if metrics is not None:
+                        metrics.finish(data)
+                    break
+            self.ui.post(UIEvent.STATUS, config.STATUS_RECEIVED.format(model))
+
+            if completed and cache_key is not None:
+                try:
+                    self.response_cache.put(cache_key, model, buffer.text())
+                except Exception as e:
+                    ErrorHandler.handle_error(e, "Cache Error", show_message_box=False)
+        except Exception as e:
+            self.ui.post(UIEvent.ERROR, ("LLM Request Error", LLMError(f"LLM request failed: {str(e)}")))
+        finally:
+            self.ui.post(UIEvent.STREAM_END, (buffer, completed))
 
     def copy_output_content(self):
         """Copy the content of the output text box to clipboard"""
         def copy():
             content = self.out_text_box.get(1.0, tk.END).strip()
             if content:
-                pyperclip.copy(content)
+                if self.clipboard_watcher is not None:
+                    self.clipboard_watcher.ignore(content)
+                self.clipboard.write(content)
                 self.status_bar.set(config.STATUS_COPIED)
             else:
                 self.status_bar.set(config.STATUS_NO_CONTENT)
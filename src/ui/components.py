@@ -1,6 +1,18 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext
 from src.core import config
+from src.core.startup_trace import TRACER
+
+_images = {}
+
+def load_image(path):
+    """Decode an image file on first use and reuse the PhotoImage afterwards"""
+    image = _images.get(path)
+    if image is None:
+        with TRACER.measure("asset_decode"):
+            image = tk.PhotoImage(file=path)
+        _images[path] = image
+    return image
 
 class TextBox:
     def __init__(self, parent, **kwargs):
@@ -32,7 +44,7 @@ class TextBox:
 
 class Button:
     def __init__(self, parent, image_path, command, width):
-        self.image = tk.PhotoImage(file=image_path)
+        self.image = load_image(image_path)
         self.widget = ttk.Button(
             parent,
             image=self.image,
@@ -69,6 +81,9 @@ class Dropdown:
         
     def config(self, **kwargs):
         self.widget.config(**kwargs)
+        
+    def bind(self, sequence, func):
+        self.widget.bind(sequence, func)
 
 class StatusBar:
     def __init__(self, parent):
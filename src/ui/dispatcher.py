@@ -0,0 +1,91 @@
+import queue
+import threading
+from typing import Any, Callable, Dict
+from src.core import config
+from src.core.error_handler import ErrorHandler
+
+class UIEvent:
+    """Event types that worker threads can post to the UI dispatcher"""
+    STATUS = "status"              # payload: status bar text
+    OUTPUT = "output"              # payload: None, new tokens are read from the output buffer
+    SEND_BUTTON = "send_button"    # payload: "send" or "stop"
+    CLIPBOARD = "clipboard"        # payload: new clipboard text
+    STREAM_END = "stream_end"      # payload: (buffer, True if the done chunk was received)
+    MODELS = "models"              # payload: list of available model names
+    FANOUT = "fanout"              # payload: None, every pane reads its new tokens from its stream
+    ERROR = "error"                # payload: (title, exception)
+
+_COALESCED = object()
+
+class UIDispatcher:
+    """
+    Marshals updates from worker threads onto the Tk main thread.
+
+    Workers call post() from any thread; a periodic root.after pump drains the
+    queue on the main thread and calls the registered handlers. Event types
+    registered with coalesce=True only keep their latest payload, so a burst
+    of status or output updates costs a single handler call per tick. Each
+    tick handles at most max_events events to keep the UI responsive.
+    """
+
+    def __init__(self, root, frame_ms: int = None, idle_ms: int = None, max_events: int = None):
+        self.root = root
+        self.frame_ms = frame_ms or config.STREAM_FRAME_MS
+        self.idle_ms = idle_ms or config.UI_IDLE_PUMP_MS
+        self.max_events = max_events or config.UI_MAX_EVENTS_PER_TICK
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._handlers: Dict[str, Callable[[Any], None]] = {}
+        self._coalesced: Dict[str, bool] = {}
+        self._latest: Dict[str, Any] = {}
+        self._job = None
+
+    def register(self, kind: str, handler: Callable[[Any], None], coalesce: bool = False) -> None:
+        """Register the main-thread handler for an event type"""
+        self._handlers[kind] = handler
+        self._coalesced[kind] = coalesce
+
+    def post(self, kind: str, payload: Any = None) -> None:
+        """Post an event from any thread"""
+        if self._coalesced.get(kind):
+            with self._lock:
+                pending = kind in self._latest
+                self._latest[kind] = payload
+            if not pending:
+                self._queue.put((kind, _COALESCED))
+        else:
+            self._queue.put((kind, payload))
+
+    def start(self) -> None:
+        """Start the periodic pump on the main thread"""
+        if self._job is None:
+            self._job = self.root.after(self.idle_ms, self._pump)
+
+    def stop(self) -> None:
+        """Stop the pump, pending events are discarded"""
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+
+    def _pump(self):
+        """Handle queued events, then reschedule"""
+        handled = 0
+        while handled < self.max_events:
+            try:
+                kind, payload = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if payload is _COALESCED:
+                with self._lock:
+                    payload = self._latest.pop(kind, None)
+            handler = self._handlers.get(kind)
+            if handler:
+                try:
+                    handler(payload)
+                except Exception as e:
+                    ErrorHandler.handle_error(e, "UI Update Error", show_message_box=False)
+            handled += 1
+
+        # Poll at frame rate while events are flowing, back off when idle
+        delay = self.frame_ms if handled else self.idle_ms
+        self._job = self.root.after(delay, self._pump)
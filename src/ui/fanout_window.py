@@ -0,0 +1,181 @@
+import tkinter as tk
+from tkinter import ttk
+from src.core import config
+from src.core.fanout import FanOutStream, combinations
+from src.ui.components import TextBox
+from src.ui.dispatcher import UIEvent
+
+class FanOutPane:
+    """Output pane of one fan-out stream, with its timings and a button to pick it"""
+
+    def __init__(self, parent, stream, on_pick):
+        self.stream = stream
+        self.frame = ttk.LabelFrame(parent, text=f"{stream.model} - {stream.transform}", padding=5)
+        self.frame.columnconfigure(0, weight=1)
+        self.frame.rowconfigure(1, weight=1)
+        self.stats = tk.StringVar(value=config.STATUS_FANOUT_QUEUED)
+        ttk.Label(self.frame, textvariable=self.stats, anchor=tk.W).grid(row=0, column=0, sticky="ew")
+        self.pick_button = ttk.Button(self.frame, text="Copy", command=lambda: on_pick(stream), state="disabled")
+        self.pick_button.grid(row=0, column=1, padx=(5, 0))
+        self.text_box = TextBox(self.frame, height=8)
+        self.text_box.grid(row=1, column=0, columnspan=2, sticky="nsew", pady=(5, 0))
+        self.text_box.widget.configure(state='disabled')
+
+    def describe(self):
+        """Timings of the stream so far, or why it is not generating"""
+        stream = self.stream
+        if stream.state == FanOutStream.QUEUED:
+            return config.STATUS_FANOUT_QUEUED
+        if stream.state == FanOutStream.FAILED:
+            return config.STATUS_FANOUT_FAILED.format(stream.error)
+        summary = stream.metrics.summary()
+        if stream.state == FanOutStream.STOPPED:
+            return f"{config.STATUS_FANOUT_STOPPED}, {summary}" if summary else config.STATUS_FANOUT_STOPPED
+        return summary or config.STATUS_FANOUT_WAITING
+
+    def render(self):
+        """Append the newly streamed text and refresh the timings"""
+        pending = self.stream.buffer.take_pending()
+        if pending:
+            self.text_box.widget.configure(state='normal')
+            self.text_box.insert(tk.END, pending)
+            self.text_box.see(tk.END)
+            self.text_box.widget.configure(state='disabled')
+        self.stats.set(self.describe())
+        if self.stream.finished and len(self.stream.buffer):
+            self.pick_button.configure(state="normal")
+
+class FanOutWindow:
+    """
+    Window sending the input to several models and transformations at once.
+
+    Every selected model is combined with every selected transformation, and
+    each pair streams into its own pane. start(pairs, on_update) must start
+    the fan-out and return it, or None when there is nothing to send;
+    on_pick(stream) receives the stream the user chose, and on_finish(fanout)
+    is called once when all streams have ended.
+    """
+
+    def __init__(self, root, ui, start, on_pick, on_finish=None):
+        self.root = root
+        self.ui = ui
+        self.start = start
+        self.on_pick = on_pick
+        self.on_finish = on_finish
+        self.fanout = None
+        self.panes = []
+        self._finish_reported = False
+
+        self.window = tk.Toplevel(root)
+        self.window.title(config.FANOUT_WINDOW_TITLE)
+        self.window.geometry(config.FANOUT_WINDOW_SIZE)
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.window.bind('<Escape>', lambda event: self.close())
+
+        frame = ttk.Frame(self.window, padding=config.WINDOW_PADDING)
+        frame.pack(fill=tk.BOTH, expand=True)
+        frame.columnconfigure(0, weight=1)
+        frame.rowconfigure(1, weight=1)
+
+        selection = ttk.Frame(frame)
+        selection.grid(row=0, column=0, sticky="ew")
+        selection.columnconfigure(0, weight=1)
+        selection.columnconfigure(1, weight=1)
+        ttk.Label(selection, text="Models").grid(row=0, column=0, sticky="w")
+        ttk.Label(selection, text="Transformations").grid(row=0, column=1, sticky="w", padx=(10, 0))
+        self.model_list = tk.Listbox(selection, selectmode=tk.MULTIPLE, exportselection=False, height=5)
+        self.model_list.grid(row=1, column=0, sticky="ew")
+        self.transform_list = tk.Listbox(selection, selectmode=tk.MULTIPLE, exportselection=False, height=5)
+        self.transform_list.grid(row=1, column=1, sticky="ew", padx=(10, 0))
+        self.run_button = ttk.Button(selection, text="Run", command=self.toggle)
+        self.run_button.grid(row=1, column=2, sticky="n", padx=(10, 0))
+        self.status = tk.StringVar(value=config.STATUS_READY)
+        ttk.Label(selection, textvariable=self.status, anchor=tk.W).grid(
+            row=2, column=0, columnspan=3, sticky="ew", pady=(5, 5))
+
+        self.pane_frame = ttk.Frame(frame)
+        self.pane_frame.grid(row=1, column=0, sticky="nsew")
+
+        ui.register(UIEvent.FANOUT, self.render, coalesce=True)
+
+    def show(self, models, transforms, model, transform):
+        """Show the window, offering the given models and transformations"""
+        if self.fanout is None or self.fanout.finished:
+            self._fill(self.model_list, models, model)
+            self._fill(self.transform_list, transforms, transform)
+        self.window.deiconify()
+        self.window.lift()
+
+    @staticmethod
+    def _fill(listbox, values, default):
+        """Replace the values of a list, keeping the selected ones or selecting default"""
+        selected = {listbox.get(index) for index in listbox.curselection()} or {default}
+        listbox.delete(0, tk.END)
+        for index, value in enumerate(values):
+            listbox.insert(tk.END, value)
+            if value in selected:
+                listbox.selection_set(index)
+
+    def toggle(self):
+        """Run the selected combinations, or stop the running ones"""
+        if self.fanout is not None and not self.fanout.finished:
+            self.stop()
+        else:
+            self.run()
+
+    def run(self):
+        """Start a fan-out over the selected models and transformations"""
+        models = [self.model_list.get(index) for index in self.model_list.curselection()]
+        transforms = [self.transform_list.get(index) for index in self.transform_list.curselection()]
+        if not models or not transforms:
+            self.status.set(config.STATUS_FANOUT_EMPTY)
+            return
+        fanout = self.start(combinations(models, transforms), lambda: self.ui.post(UIEvent.FANOUT))
+        if fanout is None:
+            self.status.set(config.STATUS_NO_TEXT)
+            return
+        self.fanout = fanout
+        self._finish_reported = False
+
+        for pane in self.panes:
+            pane.frame.destroy()
+        columns = min(len(fanout.streams), config.FANOUT_COLUMNS)
+        self.panes = []
+        for index, stream in enumerate(fanout.streams):
+            pane = FanOutPane(self.pane_frame, stream, self.on_pick)
+            row, column = divmod(index, columns)
+            pane.frame.grid(row=row, column=column, sticky="nsew", padx=2, pady=2)
+            self.pane_frame.rowconfigure(row, weight=1)
+            self.pane_frame.columnconfigure(column, weight=1, uniform="pane")
+            self.panes.append(pane)
+        self.run_button.configure(text="Stop")
+        self.render()
+
+    def render(self, _=None):
+        """Draw the text streamed since the last frame into every pane"""
+        if self.fanout is None:
+            return
+        for pane in self.panes:
+            pane.render()
+        done = sum(stream.finished for stream in self.fanout.streams)
+        total = len(self.fanout.streams)
+        if self.fanout.finished:
+            self.status.set(config.STATUS_FANOUT_DONE.format(done, total))
+            self.run_button.configure(text="Run")
+            if not self._finish_reported:
+                self._finish_reported = True
+                if self.on_finish is not None:
+                    self.on_finish(self.fanout)
+        else:
+            self.status.set(config.STATUS_FANOUT_RUNNING.format(done, total))
+
+    def stop(self):
+        """Stop the running fan-out, the panes keep the text received so far"""
+        if self.fanout is not None and not self.fanout.finished:
+            self.fanout.cancel()
+            self.render()
+
+    def close(self):
+        """Stop the running fan-out and hide the window"""
+        self.stop()
+        self.window.withdraw()
@@ -0,0 +1,125 @@
+import tkinter as tk
+from tkinter import ttk
+import time
+from src.core import config
+from src.core.error_handler import ErrorHandler
+
+class HistoryPanel:
+    """
+    Window listing past transformations, newest first, with a search box.
+
+    Rows are loaded a page at a time: the next page is only read from the
+    store when the list is scrolled near its end, so opening and searching
+    cost the same with ten or fifty thousand entries. Double-click or Enter
+    passes the full entry of the selected row to on_open.
+    """
+
+    COLUMNS = (("time", "Time", 120), ("transform", "Transformation", 130), ("model", "Model", 130),
+               ("input", "Input", 300))
+
+    def __init__(self, root, store, on_open):
+        self.root = root
+        self.store = store
+        self.on_open = on_open
+        self.last_id = None
+        self.exhausted = False
+        self._search_job = None
+        self._load_pending = False
+
+        self.window = tk.Toplevel(root)
+        self.window.title(config.HISTORY_WINDOW_TITLE)
+        self.window.geometry(config.HISTORY_WINDOW_SIZE)
+        self.window.protocol("WM_DELETE_WINDOW", self.window.withdraw)
+        self.window.bind('<Escape>', lambda event: self.window.withdraw())
+
+        frame = ttk.Frame(self.window, padding=config.WINDOW_PADDING)
+        frame.pack(fill=tk.BOTH, expand=True)
+        frame.columnconfigure(0, weight=1)
+        frame.rowconfigure(1, weight=1)
+
+        self.search = tk.StringVar()
+        self.search.trace_add("write", lambda *args: self.schedule_search())
+        self.entry = ttk.Entry(frame, textvariable=self.search)
+        self.entry.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 5))
+        self.entry.bind('<Down>', lambda event: self.focus_list())
+
+        self.tree = ttk.Treeview(frame, columns=[c[0] for c in self.COLUMNS], show="headings",
+                                 selectmode="browse")
+        for name, heading, width in self.COLUMNS:
+            self.tree.heading(name, text=heading, anchor=tk.W)
+            self.tree.column(name, width=width, stretch=name == "input")
+        self.scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.handle_scroll)
+        self.tree.grid(row=1, column=0, sticky="nsew")
+        self.scrollbar.grid(row=1, column=1, sticky="ns")
+        self.tree.bind('<Double-1>', lambda event: self.open_selected())
+        self.tree.bind('<Return>', lambda event: self.open_selected())
+
+    def show(self):
+        """Show the window with the newest entries"""
+        self.window.deiconify()
+        self.window.lift()
+        self.entry.focus_set()
+        self.reload()
+
+    def schedule_search(self):
+        """Search once the user pauses typing"""
+        if self._search_job is not None:
+            self.window.after_cancel(self._search_job)
+        self._search_job = self.window.after(int(config.HISTORY_SEARCH_DELAY * 1000), self.reload)
+
+    def reload(self):
+        """Show the first page for the current search"""
+        self._search_job = None
+        self.tree.delete(*self.tree.get_children())
+        self.last_id = None
+        self.exhausted = False
+        self.load_page()
+
+    def load_page(self):
+        """Append the next page of entries to the list"""
+        self._load_pending = False
+        if self.exhausted:
+            return
+        try:
+            rows = self.store.page(self.search.get(), self.last_id, config.HISTORY_PAGE_SIZE)
+        except Exception as e:
+            ErrorHandler.handle_error(e, "History Error", show_message_box=False)
+            rows = []
+        for entry_id, created, model, transform, preview, completed in rows:
+            preview = " ".join(preview.split())
+            if not completed:
+                preview = "(stopped) " + preview
+            self.tree.insert("", tk.END, iid=str(entry_id), values=(
+                time.strftime("%Y-%m-%d %H:%M", time.localtime(created)), transform, model, preview))
+        if rows:
+            self.last_id = rows[-1][0]
+        self.exhausted = len(rows) < config.HISTORY_PAGE_SIZE
+
+    def handle_scroll(self, first, last):
+        """Load the next page when the end of the list comes into view"""
+        self.scrollbar.set(first, last)
+        if float(last) > 0.9 and not self.exhausted and not self._load_pending:
+            self._load_pending = True
+            self.window.after_idle(self.load_page)
+
+    def focus_list(self):
+        """Move from the search box to the first row"""
+        children = self.tree.get_children()
+        if children:
+            self.tree.focus_set()
+            self.tree.selection_set(children[0])
+            self.tree.focus(children[0])
+
+    def open_selected(self):
+        """Pass the full selected entry to on_open"""
+        selection = self.tree.selection()
+        if not selection:
+            return
+        try:
+            entry = self.store.get(int(selection[0]))
+        except Exception as e:
+            ErrorHandler.handle_error(e, "History Error", show_message_box=False)
+            return
+        if entry is not None:
+            self.on_open(entry)
@@ -0,0 +1,69 @@
+"""
+Batch mode against the mock Ollama: every item gets a result line, items
+that cannot be sent included, and the pooled connection is reused.
+"""
+import io
+import json
+import pytest
+from urllib3.connectionpool import HTTPConnectionPool
+from benchmarks.mock_ollama import MockOllama
+from src import batch
+from src.core import config
+from src.core.llm_client import LLMClient
+
+@pytest.fixture(scope="module")
+def server():
+    mock = MockOllama(tokens=5, token_delay=0.0)
+    url, config.OLLAMA_URL = config.OLLAMA_URL, mock.start_in_thread()
+    yield mock
+    LLMClient.close_session()
+    mock.stop_in_thread()
+    config.OLLAMA_URL = url
+
+@pytest.fixture
+def prompts(monkeypatch):
+    monkeypatch.setattr(config, "TRANSFORMATION_PROMPTS", {"Echo": "{}", "Quote": "> {}"})
+
+def run(argv, records):
+    """Run a batch over stdin records and return its failure count and result records"""
+    stdin = io.StringIO("".join(json.dumps(record) + "\n" for record in records))
+    stdout = io.StringIO()
+    failures = batch.run_batch(batch.parse_args(argv + ["-"]), stdin=stdin, stdout=stdout)
+    return failures, {record["id"]: record for record in map(json.loads, stdout.getvalue().splitlines())}
+
+def test_records_without_a_known_transformation_fail_alone(server, prompts):
+    failures, results = run(["-j", "2"], [
+        {"id": "a", "text": "one", "transform": "Echo"},
+        {"id": "b", "text": "two", "transform": "Missing"},
+        {"id": "c", "text": "three"},
+        {"id": "d", "text": "four", "transform": "Quote"},
+    ])
+    assert failures == 2
+    assert sorted(results) == ["a", "b", "c", "d"]
+    assert results["a"]["ok"] and results["a"]["response"] == server.response_text()
+    assert results["d"]["ok"] and results["d"]["transform"] == "Quote"
+    assert not results["b"]["ok"] and results["b"]["error"] == "Unknown transformation: Missing"
+    assert not results["c"]["ok"] and "No transformation for c" in results["c"]["error"]
+
+def test_unknown_default_transformation_is_an_argument_error(server, prompts):
+    with pytest.raises(ValueError):
+        run(["-t", "Missing"], [{"id": "a", "text": "one"}])
+
+def test_streams_are_read_to_the_end(server, prompts, monkeypatch):
+    # Stopping at the done line would close the connection instead of returning it to the pool
+    stream = LLMClient.stream
+    ended = []
+
+    def read_through(model, prompt, cancel_token=None):
+        yield from stream(model, prompt, cancel_token)
+        ended.append(prompt)
+
+    monkeypatch.setattr(LLMClient, "stream", read_through)
+    connections = []
+    new_conn = HTTPConnectionPool._new_conn
+    monkeypatch.setattr(HTTPConnectionPool, "_new_conn", lambda pool: connections.append(1) or new_conn(pool))
+    LLMClient.close_session()
+    failures, results = run(["-t", "Echo", "-j", "1"], [{"id": str(index), "text": "text"} for index in range(5)])
+    assert failures == 0 and len(results) == 5
+    assert len(ended) == 5
+    assert len(connections) == 1
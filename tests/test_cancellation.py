@@ -0,0 +1,176 @@
+"""
+Stopped and superseded generations must stop on the server: after a
+cancellation the mock Ollama may not have any active stream left once
+DEADLINE has passed.
+"""
+import asyncio
+import threading
+import time
+import pytest
+from benchmarks.mock_ollama import MockOllama
+from src.core import config
+from src.core.async_llm_client import AsyncLLMClient
+from src.core.cancellation import CancelToken, GenerationCancelled
+from src.core.chunking import ChunkedTransform
+from src.core.llm_client import LLMClient
+
+MODEL = "mock-small:latest"
+DEADLINE = 2.0
+
+@pytest.fixture(scope="module")
+def loop():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name="test-loop", daemon=True)
+    thread.start()
+    yield loop
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+@pytest.fixture(scope="module")
+def server():
+    mock = MockOllama(tokens=100000, token_delay=0.005)
+    url, config.OLLAMA_URL = config.OLLAMA_URL, mock.start_in_thread()
+    yield mock
+    LLMClient.close_session()
+    mock.stop_in_thread()
+    config.OLLAMA_URL = url
+
+@pytest.fixture
+def mock(server):
+    server.latency = 0.0
+    assert wait_idle(server), "a previous test left a generation running"
+    yield server
+    server.latency = 0.0
+
+@pytest.fixture(scope="module")
+def client(loop, server):
+    client = AsyncLLMClient()
+    yield client
+    asyncio.run_coroutine_threadsafe(client.close(), loop).result(5)
+
+def wait_idle(mock, deadline=DEADLINE):
+    """Whether the mock has no active stream within deadline seconds"""
+    end = time.perf_counter() + deadline
+    while mock.stats["active"]:
+        if time.perf_counter() > end:
+            return False
+        time.sleep(0.001)
+    return True
+
+def run(loop, coro):
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(30)
+
+async def read_tokens(stream, count, started=None):
+    """Read count tokens of a stream, then keep reading until cancelled"""
+    received = 0
+    async for data in stream:
+        if data.get("response"):
+            received += 1
+            if received == count and started is not None:
+                started.set()
+
+async def stop_after(make_stream, tokens=10):
+    """Start a stream and cancel its token and task once it produced some tokens"""
+    token = CancelToken()
+    started = asyncio.Event()
+    task = asyncio.ensure_future(read_tokens(make_stream(token), tokens, started))
+    await asyncio.wait_for(started.wait(), 10)
+    token.cancel()
+    task.cancel()
+
+def test_async_stop(loop, mock, client):
+    run(loop, stop_after(lambda token: client.generate_stream(MODEL, "stop", cancel_token=token)))
+    assert wait_idle(mock)
+
+def test_async_supersede(loop, mock, client):
+    async def sends():
+        previous = None
+        for index in range(20):
+            token = CancelToken()
+            started = asyncio.Event()
+            task = asyncio.ensure_future(read_tokens(
+                client.generate_stream(MODEL, f"send {index}", cancel_token=token), 3, started))
+            if previous is not None:
+                previous[0].cancel()
+                previous[1].cancel()
+            previous = (token, task)
+            await asyncio.wait_for(started.wait(), 10)
+            assert mock.stats["active"] <= 2  # The superseded stream is on its way out
+        previous[0].cancel()
+        previous[1].cancel()
+
+    requests = mock.stats["requests"]
+    run(loop, sends())
+    assert wait_idle(mock)
+    assert mock.stats["requests"] - requests == 20
+
+def test_identical_request_takes_over(loop, mock, client):
+    async def sends():
+        first = asyncio.ensure_future(read_tokens(client.generate_stream(MODEL, "same"), 0))
+        await asyncio.sleep(mock.token_delay * 10)
+        first.cancel()  # Superseded without cancelling its token, like an identical Send
+        token = CancelToken()
+        started = asyncio.Event()
+        task = asyncio.ensure_future(read_tokens(client.generate_stream(MODEL, "same", cancel_token=token), 1,
+                                                 started))
+        await asyncio.wait_for(started.wait(), 10)
+        token.cancel()
+        task.cancel()
+
+    requests = mock.stats["requests"]
+    run(loop, sends())
+    assert mock.stats["requests"] - requests == 1  # The second request joined the first generation
+    assert wait_idle(mock)
+
+def test_chunked_stop(loop, mock, client):
+    text = "\n\n".join(f"Paragraph {index}. " + "word " * 200 for index in range(8))
+
+    def make_stream(token):
+        return ChunkedTransform(client, MODEL, "{}", max_tokens=300, concurrency=3, cancel_token=token).stream(text)
+
+    run(loop, stop_after(make_stream))
+    assert wait_idle(mock)
+
+def sync_stop(mock, tokens):
+    """Stop a worker thread reading LLMClient.stream once it received tokens; returns how it ended"""
+    token = CancelToken()
+    progress = threading.Event()
+    result = {}
+
+    def worker():
+        received = 0
+        try:
+            for data in LLMClient.stream(MODEL, "sync stop", token):
+                if data.get("response"):
+                    received += 1
+                    if received == tokens:
+                        progress.set()
+            result["ended"] = "finished"
+        except GenerationCancelled:
+            result["ended"] = "cancelled"
+        except Exception as e:
+            result["ended"] = repr(e)
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    if tokens:
+        assert progress.wait(10)
+    else:
+        time.sleep(mock.latency / 2)  # The worker is waiting for the response headers
+        assert mock.stats["active"] == 0
+    token.cancel()
+    thread.join(DEADLINE)
+    assert not thread.is_alive(), "the worker thread did not stop"
+    return result.get("ended")
+
+def test_sync_stop(mock):
+    assert sync_stop(mock, 10) == "cancelled"
+    assert wait_idle(mock)
+
+def test_sync_stop_before_first_byte(mock):
+    mock.latency = 0.3
+    requests = mock.stats["requests"]
+    assert sync_stop(mock, 0) == "cancelled"
+    assert wait_idle(mock)
+    assert mock.stats["requests"] - requests == 1
@@ -0,0 +1,136 @@
+"""
+Chat sessions: earlier turns are resent byte for byte, turns are dropped
+in blocks down to the trim target, dropped turns are summarized into a
+system message, and a turn is only kept once its answer is complete.
+"""
+import asyncio
+import json
+import pytest
+from src.core import config
+from src.core.chat import ChatSession
+
+class FakeClient:
+    """Answers every chat turn with a fixed-size text and every summary request with a summary"""
+
+    def __init__(self, answer_chars=40, fail_at=None):
+        self.answer_chars = answer_chars
+        self.fail_at = fail_at
+        self.sent = []
+        self.summary_prompts = []
+
+    async def chat_stream(self, model, messages, cancel_token=None):
+        self.sent.append(json.loads(json.dumps(messages)))  # A copy as sent on the wire
+        answer = f"answer {len(self.sent)} ".ljust(self.answer_chars, "a")
+        for index in range(0, len(answer), 8):
+            if index == self.fail_at:
+                raise RuntimeError("stream failed")
+            yield {"model": model, "message": {"role": "assistant", "content": answer[index:index + 8]},
+                   "done": False}
+        yield {"model": model, "message": {"role": "assistant", "content": ""}, "done": True, "eval_count": 5}
+
+    async def generate_stream(self, model, prompt, cancel_token=None):
+        self.summary_prompts.append(prompt)
+        yield {"response": f" summary {len(self.summary_prompts)} ", "done": False}
+        yield {"response": "", "done": True}
+
+def run(coro):
+    return asyncio.new_event_loop().run_until_complete(coro)
+
+async def send(chat, client, text, stop_after=None, **kwargs):
+    """Send a turn and return the answer, reading only stop_after chunks if given"""
+    parts = []
+    stream = chat.stream(client, "m", text, **kwargs)
+    async for data in stream:
+        parts.append(data["response"])
+        if stop_after is not None and len(parts) == stop_after:
+            await stream.aclose()
+            break
+    return "".join(parts)
+
+def question(index):
+    return f"question {index} ".ljust(40, "q")  # 10 tokens, as many as an answer
+
+def client_answer(index):
+    """The answer FakeClient gives to the question of turn index"""
+    return f"answer {index + 1} ".ljust(40, "a")
+
+def test_earlier_turns_are_resent_unchanged():
+    chat, client = ChatSession(max_tokens=10000, summarize=False), FakeClient()
+    answers = [run(send(chat, client, question(index))) for index in range(4)]
+    for previous, current in zip(client.sent, client.sent[1:]):
+        # The previous request is a prefix of the next one, so Ollama finds it in its prompt cache
+        assert current[:len(previous)] == previous
+        assert json.dumps(current).startswith(json.dumps(previous)[:-1])
+    assert client.sent[-1][-1] == {"role": "user", "content": question(3)}
+    assert chat.turns == [(question(index), answers[index]) for index in range(4)]
+    assert len(chat) == 4
+
+def test_turns_are_dropped_in_blocks_to_the_trim_target():
+    chat, client = ChatSession(max_tokens=100, keep_tokens=50, summarize=False), FakeClient()
+    trims = []
+    for index in range(20):
+        before = list(chat.turns)
+        run(send(chat, client, question(index)))
+        sent_turns = (len(client.sent[-1]) - 1) // 2
+        assert chat.tokens() <= 100 + 10  # The sent conversation fitted, plus the new answer
+        if sent_turns < len(before):
+            trims.append(index)
+            assert chat.tokens("", chat.turns[:-1]) + 10 <= 50  # Trimmed down to the target
+            assert chat.turns[:-1] == before[len(before) - sent_turns:]  # The oldest ones went
+    # Each turn is 20 tokens: 5 turns and a question exceed 100, and 2 turns and a question fit in 50
+    assert trims == [5, 8, 11, 14, 17]
+    assert client.summary_prompts == []
+    assert all(message["role"] != "system" for messages in client.sent for message in messages)
+
+def test_dropped_turns_are_summarized():
+    chat, client = ChatSession(max_tokens=100, keep_tokens=50, summarize=True), FakeClient()
+    notified = []
+    for index in range(9):
+        run(send(chat, client, question(index), on_summarize=lambda: notified.append(index)))
+    assert notified == [5, 8]
+    first, second = client.summary_prompts
+    assert first == config.CHAT_SUMMARY_PROMPT.format("\n".join(
+        line for user, answer in [(question(i), client_answer(i)) for i in range(3)]
+        for line in (f"User: {user}", f"Assistant: {answer}")))
+    assert (config.CHAT_SUMMARY_INTRO + "summary 1") in second  # Folded into the next summary
+    assert chat.summary == "summary 2"
+    system = {"role": "system", "content": config.CHAT_SUMMARY_INTRO + "summary 2"}
+    assert client.sent[-1][0] == system
+    # Sent after the first summary and before the second trim, the system message stays put
+    assert client.sent[6][0] == client.sent[7][0] == {"role": "system",
+                                                      "content": config.CHAT_SUMMARY_INTRO + "summary 1"}
+
+@pytest.mark.parametrize("stop", ["closed", "failed"])
+def test_turn_is_kept_only_once_complete(stop):
+    chat = ChatSession(max_tokens=100, keep_tokens=50, summarize=True)
+    client = FakeClient()
+    for index in range(5):
+        run(send(chat, client, question(index)))
+    turns, summary = list(chat.turns), chat.summary
+    if stop == "closed":
+        assert run(send(chat, client, question(5), stop_after=2)) == client_answer(5)[:16]
+    else:
+        client.fail_at = 16
+        with pytest.raises(RuntimeError):
+            run(send(chat, client, question(5)))
+    assert len(client.summary_prompts) == 1  # The turn was trimmed and summarized before it stopped
+    assert chat.turns == turns and chat.summary == summary
+    client.fail_at = None
+    run(send(chat, client, question(5)))
+    assert len(chat) == 3 and chat.summary == "summary 2"
+
+def test_reset():
+    chat, client = ChatSession(max_tokens=100, keep_tokens=50, summarize=True), FakeClient()
+    for index in range(6):
+        run(send(chat, client, question(index)))
+    chat.reset()
+    assert len(chat) == 0 and chat.summary == ""
+    run(send(chat, client, "hello"))
+    assert client.sent[-1] == [{"role": "user", "content": "hello"}]
+
+def test_defaults_follow_the_config(monkeypatch):
+    monkeypatch.setattr(config, "CHAT_CONTEXT_TOKENS", 1000)
+    monkeypatch.setattr(config, "CHAT_TRIM_TARGET", 0.25)
+    monkeypatch.setattr(config, "CHAT_SUMMARIZE", False)
+    chat = ChatSession()
+    assert (chat.max_tokens, chat.keep_tokens, chat.summarize) == (1000, 250, False)
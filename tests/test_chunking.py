@@ -0,0 +1,154 @@
+"""
+Splitting of long texts and the chunked transforms built on it, run against
+the mock Ollama: chunks are cut at the largest boundary that fits, never
+exceed their budget, come back in order and are reduced until they fit.
+"""
+import asyncio
+import random
+import threading
+import pytest
+from benchmarks.mock_ollama import MockOllama
+from src.core import config
+from src.core.async_llm_client import AsyncLLMClient
+from src.core.chunking import CHUNK_SEPARATOR, ChunkedTransform, estimate_tokens, split_text
+
+MODEL = "mock-small:latest"
+# Answer of the mock to every request that is not echoed
+ANSWER = "A summary of one part, always sixty characters long, roughly."[:59] + "."
+
+@pytest.fixture(scope="module")
+def loop():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name="test-loop", daemon=True)
+    thread.start()
+    yield loop
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+@pytest.fixture(scope="module")
+def server():
+    mock = MockOllama(token_delay=0.0, text=ANSWER, token_chars=8)
+    url, config.OLLAMA_URL = config.OLLAMA_URL, mock.start_in_thread()
+    yield mock
+    mock.stop_in_thread()
+    config.OLLAMA_URL = url
+
+@pytest.fixture
+def mock(server):
+    server.stats["peak_active"] = 0
+    yield server
+    server.echo = False
+    server.jitter = 0.0
+    server.token_delay = 0.0
+
+@pytest.fixture(scope="module")
+def client(loop, server):
+    client = AsyncLLMClient()
+    yield client
+    asyncio.run_coroutine_threadsafe(client.close(), loop).result(5)
+
+def run(loop, coro):
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(30)
+
+async def read(stream):
+    """The text of a stream, checking that only its last chunk is done"""
+    parts = []
+    done = False
+    async for data in stream:
+        assert not done
+        parts.append(data.get("response", ""))
+        done = data.get("done", False)
+    assert done
+    return "".join(parts)
+
+def sentence(rng, words):
+    return " ".join("".join(rng.choice("abcdefgh") for _ in range(rng.randint(1, 9)))
+                    for _ in range(words)).capitalize() + "."
+
+def test_short_text_is_one_chunk():
+    assert split_text("  Short text.  ", 100) == ["  Short text.  "]
+    assert split_text(" \n\n ", 100) == []
+
+def test_cut_between_paragraphs():
+    paragraphs = [f"Paragraph {index}. " + "word " * 20 + "end." for index in range(6)]
+    chunks = split_text("\n\n".join(paragraphs), 60)  # 240 characters, two paragraphs each
+    assert chunks == ["\n\n".join(paragraphs[index:index + 2]) for index in range(0, 6, 2)]
+
+def test_long_paragraph_cut_between_sentences():
+    sentences = [f"Sentence number {index} has a few words in it." for index in range(10)]
+    chunks = split_text(" ".join(sentences), 30)  # 120 characters, two sentences each
+    assert chunks == [" ".join(sentences[index:index + 2]) for index in range(0, 10, 2)]
+    assert all(chunk.endswith(".") for chunk in chunks)
+
+def test_long_sentence_cut_between_words():
+    words = [f"word{index:02}" for index in range(40)]  # 6 characters each
+    chunks = split_text(" ".join(words), 10)  # 40 characters, five words each
+    assert chunks == [" ".join(words[index:index + 5]) for index in range(0, 40, 5)]
+
+def test_only_a_word_longer_than_the_budget_is_cut():
+    chunks = split_text("short " + "x" * 30 + " tail", 3)  # 12 characters
+    assert chunks == ["short", "x" * 12, "x" * 12, "x" * 6 + " tail"]
+
+@pytest.mark.parametrize("seed", range(20))
+def test_no_chunk_exceeds_the_budget(seed):
+    rng = random.Random(seed)
+    max_tokens = rng.choice([5, 20, 100, config.CHUNK_MAX_TOKENS])
+    paragraphs = ["\n".join(sentence(rng, rng.randint(1, 60)) for _ in range(rng.randint(1, 30)))
+                  for _ in range(rng.randint(1, 20))]
+    text = "\n\n".join(paragraphs)
+    chunks = split_text(text, max_tokens)
+    assert chunks
+    for chunk in chunks:
+        assert estimate_tokens(chunk) <= max_tokens
+        assert chunk == chunk.strip()
+    if max_tokens * config.CHARS_PER_TOKEN > 9:  # No word was cut, every one is kept in order
+        assert " ".join(chunks).split() == text.split()
+
+def test_text_that_fits_is_one_request(loop, mock, client):
+    requests = mock.stats["requests"]
+    transform = ChunkedTransform(client, MODEL, "Rephrase: {}", reduce_template="Combine: {}")
+    assert run(loop, read(transform.stream("Short text."))) == ANSWER
+    assert mock.stats["requests"] - requests == 1
+
+def test_chunks_stay_in_order(loop, mock, client):
+    mock.echo = True
+    mock.token_delay = 0.001
+    mock.jitter = 0.005  # Later chunks often finish first
+    rng = random.Random(1)
+    text = "\n\n".join(sentence(rng, 30) for _ in range(12))
+    progress = []
+    transform = ChunkedTransform(client, MODEL, "{}", max_tokens=100, concurrency=4,
+                                 on_progress=lambda *args: progress.append(args))
+    chunks = transform.split(text)
+    assert len(chunks) > 4
+    assert run(loop, read(transform.stream(text))) == CHUNK_SEPARATOR.join(chunks)
+    assert mock.stats["peak_active"] == 4
+    assert progress == [("map", index + 1, len(chunks)) for index in range(len(chunks))]
+
+def test_reduced_until_it_fits(loop, mock, client):
+    # 16 paragraphs of 150 characters are mapped to 16 answers of 60, which need 6 chunks of
+    # 196 characters, whose 6 answers need 2 chunks, whose 2 answers fit in the final request
+    text = "\n\n".join(f"Paragraph {index:02}. " + "x" * 136 for index in range(16))
+    progress = []
+    transform = ChunkedTransform(client, MODEL, "{}", reduce_template="S:{}", max_tokens=50, concurrency=3,
+                                 on_progress=lambda *args: progress.append(args))
+    assert run(loop, read(transform.stream(text))) == ANSWER
+    rounds = [(phase, total) for phase, done, total in progress if done == total]
+    assert rounds == [("map", 16), ("reduce", 6), ("reduce", 2)]
+    assert progress[-1] == ("reduce", 0, 1)  # The final combine step
+    final_prompt = mock.prompt_cache[MODEL][:-len(ANSWER)]
+    assert final_prompt == "S:" + CHUNK_SEPARATOR.join([ANSWER] * 2)
+
+def test_reduction_stops_when_it_does_not_shorten(loop, mock, client):
+    mock.echo = True  # Every answer is as long as its chunk
+    text = "\n\n".join(f"Paragraph {index}. " + "word " * 30 for index in range(6))
+    progress = []
+    transform = ChunkedTransform(client, MODEL, "{}", reduce_template="{}", max_tokens=50,
+                                 on_progress=lambda *args: progress.append(args))
+    chunks = transform.split(text)
+    result = run(loop, read(transform.stream(text)))
+    assert result == CHUNK_SEPARATOR.join(chunk.strip() for chunk in chunks)
+    rounds = [(phase, total) for phase, done, total in progress if done == total]
+    assert rounds == [("map", len(chunks))]
+    assert progress[-1] == ("reduce", 0, 1)
@@ -0,0 +1,109 @@
+import threading
+import pytest
+from src.core import config
+from src.core.clipboard_watcher import ClipboardWatcher, FakeClipboardBackend, create_backend, fingerprint
+
+class PollingBackend(FakeClipboardBackend):
+    """The fake clipboard without change notification or counter, like plain pyperclip polling"""
+
+    def change_count(self):
+        return None
+
+    def wait_for_change(self, timeout):
+        return None
+
+class CounterBackend(FakeClipboardBackend):
+    """The fake clipboard with only a change counter, like the Windows and macOS backends"""
+
+    def wait_for_change(self, timeout):
+        return None
+
+class ScriptedStop:
+    """
+    Stands in for the stop event of the watcher thread: records the interval of
+    every wait, runs the action scheduled for it and stops after the last one.
+    """
+
+    def __init__(self, waits, actions=None):
+        self.waits = waits
+        self.actions = actions or {}
+        self.intervals = []
+
+    def is_set(self):
+        return len(self.intervals) >= self.waits
+
+    def wait(self, interval):
+        self.intervals.append(interval)
+        action = self.actions.get(len(self.intervals))
+        if action is not None:
+            action()
+        return False
+
+def run_watcher(backend, stop, changes, **kwargs):
+    watcher = ClipboardWatcher(backend, changes.append, **kwargs)
+    watcher._last = fingerprint(backend.read())
+    backend.reads = 0
+    watcher._run(stop)
+    return watcher
+
+def test_polling_backs_off_and_resets_on_change():
+    backend = PollingBackend("initial")
+    stop = ScriptedStop(12, {9: lambda: backend.write("changed")})
+    changes = []
+    run_watcher(backend, stop, changes, min_interval=0.5, max_interval=5.0, backoff=1.5)
+    assert stop.intervals[:8] == pytest.approx([0.5, 0.75, 1.125, 1.6875, 2.53125, 3.796875, 5.0, 5.0])
+    assert stop.intervals[8:] == pytest.approx([5.0, 0.5, 0.75, 1.125])  # Reset after the change
+    assert changes == ["changed"]
+    assert backend.reads == 12  # Polling reads on every check
+
+def test_polling_uses_config_defaults(monkeypatch):
+    monkeypatch.setattr(config, "CLIPBOARD_POLL_MIN", 0.2)
+    monkeypatch.setattr(config, "CLIPBOARD_POLL_MAX", 0.5)
+    monkeypatch.setattr(config, "CLIPBOARD_POLL_BACKOFF", 2.0)
+    backend = PollingBackend("initial")
+    stop = ScriptedStop(4)
+    run_watcher(backend, stop, [])
+    assert stop.intervals == pytest.approx([0.2, 0.4, 0.5, 0.5])
+
+def test_change_counter_reads_only_after_a_change():
+    backend = CounterBackend("initial")
+    actions = {3: lambda: backend.write("first"), 6: lambda: backend.write("second"),
+               7: lambda: backend.write("second")}
+    stop = ScriptedStop(10, actions)
+    changes = []
+    run_watcher(backend, stop, changes, min_interval=0.5, max_interval=5.0, backoff=1.5)
+    assert changes == ["first", "second"]  # Writing the same text again is not a change
+    assert backend.reads == 3  # Once per counter move, never while it stands still
+    assert stop.intervals == [0.5] * 10  # No backoff needed, checks are cheap
+
+def test_own_responses_are_ignored():
+    backend = CounterBackend("initial")
+    changes = []
+    watcher = ClipboardWatcher(backend, changes.append)
+    watcher.ignore("our response")
+    actions = {1: lambda: backend.write("our response"), 2: lambda: backend.write("user text"),
+               3: lambda: backend.write(""), 4: lambda: backend.write("our response")}
+    watcher._last = fingerprint("initial")
+    watcher._run(ScriptedStop(5, actions))
+    # Ignored by fingerprint even after other texts, empty clipboards are never reported
+    assert changes == ["user text"]
+
+def test_event_driven_watcher_thread():
+    backend = create_backend("fake")
+    received = []
+    arrived = threading.Event()
+
+    def on_change(text):
+        received.append(text)
+        arrived.set()
+
+    watcher = ClipboardWatcher(backend, on_change, min_interval=0.01, max_interval=0.05)
+    watcher.start("initial")
+    try:
+        watcher.ignore("our response")
+        backend.write("our response")
+        backend.write("copied by the user")
+        assert arrived.wait(5)
+        assert received == ["copied by the user"]
+    finally:
+        watcher.stop()
@@ -0,0 +1,93 @@
+"""
+History store: keyset paging by id, FTS5 search and its LIKE fallback,
+pruning beyond max_entries, and a writer that cannot open its database.
+"""
+import threading
+import pytest
+from src.core.history import HistoryStore
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / "history" / "history.sqlite3"))
+    yield store
+    store.close()
+
+def add(store, count, start=0, **fields):
+    for index in range(start, start + count):
+        store.add(fields.get("model", "m"), fields.get("transform", "t"), "{}",
+                  fields.get("input", f"input {index}"), fields.get("output", f"output {index}"))
+    assert store.flush(5)
+
+def ids(rows):
+    return [row[0] for row in rows]
+
+def test_entries_are_read_back(store):
+    store.add("m", "Summarize", "S: {}", "x" * 500, "short", completed=False, metrics={"ttft_ms": 12.5})
+    assert store.flush(5)
+    assert store.count() == 1
+    (row,) = store.page()
+    assert row[2:4] == ("m", "Summarize") and row[4] == "x" * 200 and row[5] == 0
+    entry = store.get(row[0])
+    assert entry["input"] == "x" * 500 and entry["output"] == "short" and entry["prompt"] == "S: {}"
+    assert entry["completed"] is False and entry["metrics"] == {"ttft_ms": 12.5}
+    assert store.get(row[0] + 1) is None
+
+def test_keyset_paging(store):
+    add(store, 25)
+    first = store.page(limit=10)
+    assert ids(first) == sorted(ids(first), reverse=True)
+    add(store, 5, start=25)  # New entries do not shift the following pages
+    second = store.page(before_id=first[-1][0], limit=10)
+    third = store.page(before_id=second[-1][0], limit=10)
+    assert ids(first + second + third) == list(range(25, 0, -1))
+    assert store.page(before_id=third[-1][0], limit=10) == []
+    assert ids(store.page(limit=3)) == [30, 29, 28]
+
+def test_full_text_search(store):
+    add(store, 1, input="The quick brown fox", output="Le renard brun")
+    add(store, 1, input="Lazy dogs sleep", output="quickly answered")
+    add(store, 1, input="Nothing here", output="at all")
+    if not store.fts:
+        pytest.skip("SQLite was built without FTS5")
+    assert ids(store.page("quick")) == [2, 1]  # Prefix match, in the input or the output
+    assert ids(store.page("quick fox")) == [1]  # Every word must match
+    assert ids(store.page("renard")) == [1]
+    assert ids(store.page("quick", before_id=2)) == [1]
+    assert store.page("missing") == []
+    assert store.page('"unbalanced') == []
+
+def test_like_search_without_fts(store):
+    add(store, 1, input="100% done", output="a_b")
+    add(store, 1, input="1000 done", output="axb")
+    store.fts = False
+    assert ids(store.page("done")) == [2, 1]
+    assert ids(store.page("100%")) == [1]  # Wildcards are matched literally
+    assert ids(store.page("a_b")) == [1]
+    assert ids(store.page("DONE")) == [2, 1]
+
+def test_entries_beyond_max_entries_are_pruned(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.sqlite3"), max_entries=50)
+    try:
+        for start in range(0, 200, 10):
+            add(store, 10, start)
+        # The last batch crossed 200 writes, which prunes down to the newest 50
+        assert store.count() == 50
+        assert ids(store.page(limit=100)) == list(range(200, 150, -1))
+    finally:
+        store.close()
+
+def test_writer_that_cannot_open_the_database(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("not a directory")
+    store = HistoryStore(str(blocker / "history.sqlite3"))
+    results = []
+    thread = threading.Thread(target=lambda: results.append(
+        (store.add("m", "t", "{}", "input", "output"), store.flush())), daemon=True)
+    thread.start()
+    thread.join(5)
+    assert not thread.is_alive(), "flush() waited for a writer that stopped"
+    assert results == [(None, False)]
+    assert isinstance(store.error, OSError)
+    store.add("m", "t", "{}", "dropped", "dropped")
+    assert store.flush() is False
+    store.close()
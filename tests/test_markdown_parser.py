@@ -0,0 +1,121 @@
+import pytest
+from src.core.markdown_parser import CustomMarkdownParser, IncrementalMarkdown
+
+DOCUMENT = """# Release notes
+Use `a` and **b** then *c* or [d](http://x)
+
+## Changes **now**
+- one
+* two with **bold *and italic* text**
+3. three `x * y`
+4) four [link](https://example.com/a)
+
+```python
+x = *1*  # [not](a link)
+```
+Run `**x** [y](z) *w*` now, ***both*** end"""
+
+def parse(text):
+    return CustomMarkdownParser().parse(text)
+
+def test_inline_spans_on_one_line():
+    plain, tags = parse("Use `a` and **b** then *c* or [d](http://x)")
+    assert plain == "Use a and b then c or d"
+    assert tags == [('code', 4, 5), ('bold', 10, 11), ('italic', 17, 18), ('link', 22, 23)]
+
+def test_nested_bold_and_italic():
+    plain, tags = parse("**bold *it* end** and ***both***")
+    assert plain == "bold it end and both"
+    assert tags == [('bold', 0, 11), ('italic', 5, 7), ('bold_italic', 16, 20)]
+
+def test_inline_code_keeps_markdown_characters():
+    plain, tags = parse("run `**x** [y](z) *w*` now ``a`b``")
+    assert plain == "run **x** [y](z) *w* now a`b"
+    assert tags == [('code', 4, 20), ('code', 25, 28)]
+
+def test_fenced_code_block():
+    plain, tags = parse("```python\nx = *1*\n~~~\n**after**")
+    # Fences become empty lines, the content is kept verbatim
+    assert plain == "\nx = *1*\n\nafter"
+    assert tags == [('code_block', 1, 8), ('bold', 10, 15)]
+
+def test_headers():
+    plain, tags = parse("# Title\n### Sub **b**\n####### not a header")
+    assert plain == "Title\nSub b\n####### not a header"
+    assert tags == [('heading1', 0, 5), ('heading3', 6, 11), ('bold', 10, 11)]
+
+def test_bulleted_and_numbered_lists():
+    plain, tags = parse("- one\n* two **b**\n3. three\n4) four")
+    assert plain == "• one\n• two b\n3. three\n4. four"
+    assert tags == [('bullet', 0, 5), ('bullet', 6, 13), ('bold', 12, 13), ('numbered', 14, 22),
+                    ('numbered', 23, 30)]
+
+def test_links():
+    plain, tags = parse("see [docs](https://e.com/a) and [x y](u), not [no](has space)")
+    assert plain == "see docs and x y, not [no](has space)"
+    assert tags == [('link', 4, 8), ('link', 13, 16)]
+
+def test_span_ends_at_the_next_marker_of_its_kind():
+    # An opener without a closer before the next marker of its kind is left as text
+    assert parse("**a **b**") == ("**a b", [('bold', 4, 5)])
+    assert parse("[a [b](c)") == ("[a b", [('link', 3, 4)])
+    assert parse("`a`` and ``b``") == ("`a and b``", [('code', 2, 7)])  # Closers need the same run length
+
+def test_unmatched_markers_on_a_long_line():
+    for unit in ("**a ", "*a *", "[a ", "***a ", "`` a "):
+        line = unit * 2000
+        plain, _ = parse(line + "**end**")
+        assert plain.endswith("end")
+
+def test_unclosed_markers_are_kept():
+    assert parse("2 * 3 and `open and **open") == ("2 * 3 and `open and **open", [])
+
+def test_parse_indexed_matches_parse():
+    parser = CustomMarkdownParser()
+    plain, tags = parser.parse(DOCUMENT)
+    indexed_plain, ranges, in_code_block = parser.parse_indexed(DOCUMENT)
+    assert indexed_plain == plain and not in_code_block
+    line_starts = [0]
+    for line in plain.split('\n'):
+        line_starts.append(line_starts[-1] + len(line) + 1)
+    expected = {}
+    for name, start, end in tags:
+        line = max(number for number, offset in enumerate(line_starts) if offset <= start)
+        expected.setdefault(name, []).extend(
+            [f"{line + 1}.{start - line_starts[line]}", f"{line + 1}.{end - line_starts[line]}"])
+    assert ranges == expected
+
+def feed_all(pieces):
+    """Feed the pieces to IncrementalMarkdown and rebuild the text and tags parse() would return"""
+    incremental = IncrementalMarkdown()
+    lines = {}
+    for piece in pieces:
+        for line_number, plain_line, tags, is_new in incremental.feed(piece):
+            assert is_new == (line_number not in lines)
+            lines[line_number] = (plain_line, tags)
+    plain_lines, all_tags, position = [], [], 0
+    for line_number in sorted(lines):
+        plain_line, tags = lines[line_number]
+        plain_lines.append(plain_line)
+        all_tags.extend((name, position + start, position + end) for name, start, end in tags)
+        position += len(plain_line) + 1
+    assert sorted(lines) == list(range(len(lines)))
+    return '\n'.join(plain_lines), all_tags
+
+@pytest.mark.parametrize("size", [1, 3, 7, len(DOCUMENT)])
+def test_incremental_matches_parse(size):
+    pieces = [DOCUMENT[index:index + size] for index in range(0, len(DOCUMENT), size)]
+    assert feed_all(pieces) == parse(DOCUMENT)
+
+def test_incremental_continues_after_render():
+    split = DOCUMENT.index("```python") + 5  # Inside the opening fence
+    incremental = IncrementalMarkdown()
+    plain, _ = incremental.render(DOCUMENT[:split])
+    updates = incremental.feed(DOCUMENT[split:])
+    lines = plain.split('\n')
+    for line_number, plain_line, _, is_new in updates:
+        if is_new:
+            lines.append(plain_line)
+        else:
+            lines[line_number] = plain_line
+    assert '\n'.join(lines) == parse(DOCUMENT)[0]
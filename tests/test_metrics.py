@@ -0,0 +1,100 @@
+"""
+Generation metrics: percentile and aggregate maths, and rotation of the
+metrics log once it reaches its size limit.
+"""
+import os
+from src.core.metrics import GenerationMetrics, MetricsLog, add_timings, aggregate, percentile, report
+
+def record(model="m", transform="t", completed=True, **fields):
+    return dict({"model": model, "transform": transform, "completed": completed}, **fields)
+
+def test_percentile_is_nearest_rank():
+    values = list(range(100, 0, -1))  # 1..100, unsorted
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.95) == 95
+    assert percentile(values, 1.0) == 100
+    assert percentile(values, 0.0) == 1
+    assert percentile([1.0, 2.0, 3.0], 0.5) == 2.0
+    assert percentile([1.0, 2.0, 3.0], 0.95) == 3.0
+    assert percentile([7.5], 0.5) == percentile([7.5], 0.95) == 7.5
+    assert percentile([], 0.5) is None
+
+def test_aggregate_groups_completed_generations():
+    records = [record(ttft_ms=float(value), tokens_per_second=100.0 - value) for value in range(1, 21)]
+    records += [record(completed=False, ttft_ms=10000.0),  # Stopped generations are left out
+                record(model="other", ttft_ms=5.0, total_ms=None),
+                record(transform="u", ttft_ms=None)]
+    stats = aggregate(records)
+    assert set(stats) == {("m", "t"), ("other", "t"), ("m", "u")}
+    assert stats[("m", "t")]["count"] == 20
+    assert stats[("m", "t")]["ttft_ms"] == (10.0, 19.0)
+    assert stats[("m", "t")]["tokens_per_second"] == (89.0, 98.0)
+    assert stats[("m", "t")]["total_ms"] == (None, None)
+    assert stats[("other", "t")]["ttft_ms"] == (5.0, 5.0)
+    assert stats[("m", "u")] == {"count": 1, "ttft_ms": (None, None), "tokens_per_second": (None, None),
+                                 "total_ms": (None, None), "render_lag_max_ms": (None, None)}
+
+def test_report():
+    assert report([]) == "No completed generations recorded"
+    lines = report([record(ttft_ms=120.0, tokens_per_second=42.0)]).splitlines()
+    assert len(lines) == 2
+    assert lines[1].split()[:3] == ["m", "t", "1"]
+    assert "120.0 / 120.0" in lines[1] and "42.0 / 42.0" in lines[1] and "-" in lines[1]
+
+def test_timings_are_summed():
+    totals = add_timings({}, {"eval_count": 10, "eval_duration": 2 * 10 ** 9, "response": "", "done": True})
+    add_timings(totals, {"eval_count": 30, "eval_duration": 10 ** 9, "load_duration": 5})
+    assert totals == {"eval_count": 40, "eval_duration": 3 * 10 ** 9, "load_duration": 5}
+
+def test_generation_record():
+    metrics = GenerationMetrics("m", "t", 12)
+    metrics.token("")
+    metrics.token("ab")
+    metrics.token("cde")
+    metrics.rendered(0.002)
+    metrics.rendered(0.004)
+    metrics.finish({"done": True, "eval_count": 50, "eval_duration": 2 * 10 ** 9, "load_duration": 10 ** 8})
+    data = metrics.as_record()
+    assert data["completed"] and data["output_chars"] == 5 and data["input_chars"] == 12
+    assert data["tokens_per_second"] == 25.0  # Reported by Ollama rather than measured
+    assert data["render_lag_ms"] == 3.0 and data["render_lag_max_ms"] == 4.0
+    assert data["load_ms"] == 100.0 and data["prompt_eval_ms"] is None
+    assert data["ttft_ms"] is not None and data["total_ms"] >= data["ttft_ms"]
+
+def fill(log, count):
+    for index in range(count):
+        log.append({"index": index, "padding": "x" * 80})
+
+def test_log_rotates_at_max_bytes(tmp_path):
+    path = str(tmp_path / "logs" / "metrics.jsonl")
+    log = MetricsLog(path, max_bytes=1000, backups=2)
+    fill(log, 40)  # About 100 bytes per line, so 10 lines per file
+    sizes = [os.path.getsize(name) for name in (path, path + ".1", path + ".2")]
+    assert all(size <= 1000 + 120 for size in sizes)
+    assert not os.path.exists(path + ".3")
+    indexes = [entry["index"] for entry in log.records()]
+    assert indexes == list(range(indexes[0], 40))  # Oldest first, the first file was dropped
+    assert indexes[0] > 0
+
+def test_log_is_not_rotated_below_max_bytes(tmp_path):
+    path = str(tmp_path / "metrics.jsonl")
+    log = MetricsLog(path, max_bytes=10 ** 6)
+    fill(log, 40)
+    assert not os.path.exists(path + ".1")
+    assert [entry["index"] for entry in log.records()] == list(range(40))
+
+def test_log_without_backups_starts_over(tmp_path):
+    path = str(tmp_path / "metrics.jsonl")
+    log = MetricsLog(path, max_bytes=500, backups=0)
+    fill(log, 20)
+    assert os.listdir(str(tmp_path)) == ["metrics.jsonl"]
+    assert os.path.getsize(path) <= 500 + 120
+
+def test_unreadable_lines_are_skipped(tmp_path):
+    path = str(tmp_path / "metrics.jsonl")
+    log = MetricsLog(path)
+    log.append({"index": 0})
+    with open(path, "a", encoding="utf-8") as file:
+        file.write("{truncated\n")
+    log.append({"index": 1})
+    assert list(log.records()) == [{"index": 0}, {"index": 1}]
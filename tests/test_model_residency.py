@@ -0,0 +1,67 @@
+"""
+Lease renewal of the resident model: at most once per half keep_alive, and
+never when keep_alive leaves no lease to renew.
+"""
+import pytest
+from src.core import model_residency
+from src.core.model_residency import ModelResidency
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(model_residency.time, "monotonic", clock)
+    return clock
+
+def make_residency(keep_alive):
+    """A residency whose submitted coroutines are recorded by name and model instead of run"""
+    submitted = []
+
+    def submit(coro):
+        submitted.append((coro.cr_code.co_name, coro.cr_frame.f_locals["model"]))
+        coro.close()
+
+    return ModelResidency(None, submit, keep_alive=keep_alive, unload_previous=True), submitted
+
+def test_renewed_once_per_half_lease(clock):
+    residency, submitted = make_residency(300)
+    residency.select("small")
+    for _ in range(10):
+        clock.now += 10
+        residency.activity()
+    assert submitted == [("_load", "small")]
+    clock.now += 60  # 160 seconds after the load
+    residency.activity()
+    residency.activity()
+    assert submitted == [("_load", "small")] * 2
+
+def test_request_renews_the_lease(clock):
+    residency, submitted = make_residency(300)
+    residency.select("small")
+    clock.now += 140
+    residency.used()
+    clock.now += 140
+    residency.activity()
+    assert submitted == [("_load", "small")]
+
+def test_selecting_another_model_releases_the_previous_one(clock):
+    residency, submitted = make_residency(300)
+    residency.select("small")
+    residency.select("large")
+    assert submitted == [("_load", "small"), ("_unload", "small"), ("_load", "large")]
+
+@pytest.mark.parametrize("keep_alive", [0, -1])
+def test_no_renewal_without_a_lease(clock, keep_alive):
+    residency, submitted = make_residency(keep_alive)
+    residency.select("small")
+    for _ in range(100):
+        clock.now += 0.01
+        residency.activity()
+    loads = [model for name, model in submitted if name == "_load"]
+    assert loads == ([] if keep_alive == 0 else ["small"])
@@ -0,0 +1,102 @@
+import json
+import pytest
+import requests
+from benchmarks.mock_ollama import MockOllama
+from src.core.ndjson import NDJSONDecoder, decode_line, iter_ndjson
+
+def line(data):
+    """A line as Ollama writes it"""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def generate_line(text):
+    return line({"model": "llama3.2", "created_at": "2024-11-05T10:00:00.123456Z", "response": text, "done": False})
+
+def chat_line(text):
+    return line({"model": "llama3.2", "created_at": "2024-11-05T10:00:00.123456Z",
+                 "message": {"role": "assistant", "content": text}, "done": False})
+
+FINAL = line({"model": "llama3.2", "created_at": "2024-11-05T10:00:01Z", "response": "", "done": True,
+              "done_reason": "stop", "context": [1, 2, 3], "total_duration": 5000000000, "eval_count": 3})
+
+@pytest.mark.parametrize("text", ["token", " résumé 東京 🙂", "", "a,b:c}"])
+def test_fast_path_generate(text):
+    # The fast path only returns the text, the other fields are left out
+    assert decode_line(generate_line(text)) == {"response": text, "done": False}
+
+@pytest.mark.parametrize("text", ["token", " 東京", ""])
+def test_fast_path_chat(text):
+    assert decode_line(chat_line(text)) == {"message": {"role": "assistant", "content": text}, "done": False}
+
+@pytest.mark.parametrize("text", ['say "hi"', "line\nbreak", "back\\slash", "tab\there", "\u0001"])
+def test_escaped_tokens_use_json(text):
+    decoded = decode_line(generate_line(text))
+    assert decoded["response"] == text
+    assert decoded["model"] == "llama3.2"  # Decoded by json.loads
+    assert decode_line(chat_line(text))["message"]["content"] == text
+
+def test_unicode_escapes():
+    # Ollama escapes <, > and & as \u sequences, some servers escape all non-ASCII text
+    assert decode_line(b'{"model":"m","response":"\\u003cb\\u003e \\u0026","done":false}')["response"] == "<b> &"
+    assert decode_line(generate_line("é").replace("é".encode(), b"\\u00e9"))["response"] == "é"
+    assert decode_line(b'{"response":"\\ud83d\\ude42","done":false}')["response"] == "🙂"
+
+def test_final_chunk():
+    assert decode_line(FINAL) == json.loads(FINAL)
+    chat_final = line({"model": "m", "message": {"role": "assistant", "content": ""}, "done": True, "eval_count": 3})
+    assert decode_line(chat_final)["eval_count"] == 3
+
+def test_error_line():
+    assert decode_line(b'{"error":"model \\"x\\" not found"}') == {"error": 'model "x" not found'}
+    assert decode_line(b'{"error":"out of memory"}') == {"error": "out of memory"}
+
+def test_other_layouts_use_json():
+    # Spaced separators, other field orders or extra fields after the text are still decoded in full
+    spaced = json.dumps({"model": "m", "response": "tok", "done": False}).encode()
+    assert decode_line(spaced) == {"model": "m", "response": "tok", "done": False}
+    reordered = b'{"response":"tok","model":"m","done":false}'
+    assert decode_line(reordered) == {"response": "tok", "model": "m", "done": False}
+    embedded = b'{"model":"m","response":"a","other":"b","done":false}'
+    assert decode_line(embedded)["response"] == "a"
+
+def stream_bytes():
+    lines = [generate_line(text) for text in ["Hello", " wörld", ' "quoted"', "\n", " 東京", " 🙂"]]
+    lines += [line({"error": "stream failure"}), FINAL]
+    return b"\n".join(lines) + b"\n"
+
+def decode_whole(data):
+    return [decode_line(part) for part in data.split(b"\n") if part.strip()]
+
+def test_lines_split_across_chunks():
+    data = stream_bytes()
+    expected = decode_whole(data)
+    for split in range(1, len(data)):
+        # Including splits inside multi-byte characters and between "\r" and "\n"
+        decoder = NDJSONDecoder()
+        assert decoder.feed(data[:split]) + decoder.feed(data[split:]) + decoder.close() == expected
+    assert list(iter_ndjson(data[index:index + 1] for index in range(len(data)))) == expected
+
+def test_crlf_and_unterminated_last_line():
+    data = generate_line("a") + b"\r\n\r\n" + FINAL
+    decoder = NDJSONDecoder()
+    assert decoder.feed(data) == [{"response": "a", "done": False}]
+    assert decoder.close() == [json.loads(FINAL)]
+    assert decoder.close() == []
+
+@pytest.fixture
+def mock():
+    server = MockOllama(tokens=20, token_delay=0.0, text="plain tokens, then ü and 東京 ", token_chars=3)
+    url = server.start_in_thread()
+    yield server, url
+    server.stop_in_thread()
+
+@pytest.mark.parametrize("endpoint,body", [
+    ("generate", {"prompt": "hello"}),
+    ("chat", {"messages": [{"role": "user", "content": "hello"}]}),
+])
+def test_mock_streams_take_the_fast_path(mock, endpoint, body):
+    _, url = mock
+    response = requests.post(url + endpoint, json=dict(body, model="mock-small:latest"), timeout=10)
+    lines = [part for part in response.content.split(b"\n") if part]
+    decoded = [decode_line(part) for part in lines]
+    assert all(set(data) == {"response" if endpoint == "generate" else "message", "done"} for data in decoded[:-1])
+    assert decoded[-1]["done"] and decoded[-1]["model"] == "mock-small:latest"
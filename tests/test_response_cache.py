@@ -0,0 +1,86 @@
+import itertools
+import pytest
+from src.core import response_cache
+from src.core.response_cache import ResponseCache
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    """A clock that advances on every read, so access order never ties"""
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(response_cache.time, "time", lambda: float(next(ticks)))
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "cache" / "cache.sqlite3")
+
+def stored_keys(cache):
+    return {row[0] for row in cache._connect().execute("SELECT key FROM responses")}
+
+def test_make_key_separates_model_template_and_input():
+    keys = {
+        ResponseCache.make_key("m1", "Rephrase: {}", "text"),
+        ResponseCache.make_key("m2", "Rephrase: {}", "text"),
+        ResponseCache.make_key("m1", "Summarize: {}", "text"),
+        ResponseCache.make_key("m1", "Rephrase: {}", "other text"),
+        # Moving characters between the parts must not produce the same key
+        ResponseCache.make_key("m1R", "ephrase: {}", "text"),
+        ResponseCache.make_key("m1", "Rephrase: {}t", "ext"),
+    }
+    assert len(keys) == 6
+    assert ResponseCache.make_key("m1", "Rephrase: {}", "text") in keys
+
+def test_memory_hit_and_disk_fallback(path):
+    cache = ResponseCache(path, 1024 * 1024, memory_entries=2)
+    for name in "abc":
+        cache.put(name, "m", f"response {name}")
+    assert list(cache._memory) == ["b", "c"]  # "a" dropped from memory, still on disk
+    assert stored_keys(cache) == {"a", "b", "c"}
+    assert cache.get("a") == "response a"
+    assert list(cache._memory) == ["c", "a"]  # Promoted back into memory, "b" dropped
+    assert cache.get("b") == "response b"
+    assert cache.get("missing") is None
+    cache.close()
+
+def test_entries_survive_reopening(path):
+    cache = ResponseCache(path, 1024 * 1024, memory_entries=8)
+    cache.put("key", "m", "persisted é")
+    cache.close()
+    reopened = ResponseCache(path, 1024 * 1024, memory_entries=8)
+    assert reopened._memory == {}
+    assert reopened.get("key") == "persisted é"
+    reopened.close()
+
+def test_eviction_of_least_recently_used_rows(path):
+    cache = ResponseCache(path, max_bytes=300, memory_entries=10)
+    for name in "abc":
+        cache.put(name, "m", name * 100)
+    cache.get("a")  # "b" is now the least recently used
+    cache.put("d", "m", "d" * 100)
+    assert stored_keys(cache) == {"a", "c", "d"}
+    assert "b" not in cache._memory
+    assert cache.get("b") is None
+    total = cache._connect().execute("SELECT SUM(size) FROM responses").fetchone()[0]
+    assert total <= 300
+    cache.close()
+
+def test_eviction_counts_encoded_bytes(path):
+    cache = ResponseCache(path, max_bytes=300, memory_entries=10)
+    cache.put("ascii", "m", "x" * 100)
+    cache.put("wide", "m", "東" * 100)  # 300 bytes in UTF-8
+    assert stored_keys(cache) == {"wide"}
+    cache.close()
+
+def test_oversized_response_is_not_stored(path):
+    cache = ResponseCache(path, max_bytes=10, memory_entries=10)
+    cache.put("big", "m", "x" * 11)
+    assert cache.get("big") is None
+
+def test_replace_and_clear(path):
+    cache = ResponseCache(path, 1024, memory_entries=1)
+    cache.put("k", "m", "old")
+    cache.put("k", "m", "new")
+    cache._memory.clear()
+    assert cache.get("k") == "new"
+    cache.clear()
+    assert cache.get("k") is None and stored_keys(cache) == set()
+    cache.close()
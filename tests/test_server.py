@@ -0,0 +1,71 @@
+"""
+Requests to the transformation server against the mock Ollama: malformed
+bodies are answered with 400 before anything is generated.
+"""
+import asyncio
+import threading
+import pytest
+import requests
+from aiohttp import web
+from benchmarks.mock_ollama import MockOllama
+from src.core import config
+from src.server import TransformServer
+
+@pytest.fixture(scope="module")
+def ollama():
+    mock = MockOllama(tokens=5, token_delay=0.0)
+    url, config.OLLAMA_URL = config.OLLAMA_URL, mock.start_in_thread()
+    yield mock
+    mock.stop_in_thread()
+    config.OLLAMA_URL = url
+
+@pytest.fixture(scope="module")
+def server(ollama):
+    prompts, config.TRANSFORMATION_PROMPTS = config.TRANSFORMATION_PROMPTS, {"Echo": "{}"}
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name="test-server", daemon=True)
+    thread.start()
+
+    async def start():
+        runner = web.AppRunner(TransformServer().app())
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        return runner, site._server.sockets[0].getsockname()[1]
+
+    runner, port = asyncio.run_coroutine_threadsafe(start(), loop).result(5)
+    yield f"http://127.0.0.1:{port}/"
+    asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    config.TRANSFORMATION_PROMPTS = prompts
+
+def post(server, body):
+    return requests.post(server + "transform", json=body, timeout=10)
+
+def test_transform(server, ollama):
+    response = post(server, {"text": "hello", "transform": "Echo", "model": "mock-small:latest", "stream": False})
+    assert response.status_code == 200
+    assert response.json()["response"] == ollama.response_text()
+
+@pytest.mark.parametrize("body", [
+    [],
+    "text",
+    {"txt": "hello"},
+    {"text": None},
+    {"text": 42},
+    {"text": ["hello"]},
+    {"text": "hello", "transform": ["Echo"]},
+    {"text": "hello", "transform": {"name": "Echo"}},
+    {"text": "hello", "model": 3},
+])
+def test_malformed_body(server, ollama, body):
+    requests_before = ollama.stats["requests"]
+    response = post(server, body)
+    assert response.status_code == 400
+    assert "error" in response.json()
+    assert ollama.stats["requests"] == requests_before
+
+def test_unknown_transformation(server):
+    response = post(server, {"text": "hello", "transform": "Missing"})
+    assert response.status_code == 404
@@ -0,0 +1,159 @@
+"""
+Sharing of identical in-flight streams: late subscribers replay what was
+already produced, the upstream outlives its last subscriber by the grace
+period only, errors reach everyone, and only identical requests share.
+"""
+import asyncio
+import pytest
+from benchmarks.mock_ollama import MockOllama
+from src.core import config
+from src.core.async_llm_client import AsyncLLMClient
+from src.core.cancellation import CancelToken
+from src.core.single_flight import SingleFlight
+
+class Upstream:
+    """Stream whose items are released by the test, recording how it ended"""
+
+    def __init__(self):
+        self.queue = asyncio.Queue()
+        self.started = 0
+        self.ended = None
+
+    def factory(self):
+        self.started += 1
+        return self.stream()
+
+    async def stream(self):
+        try:
+            while True:
+                item = await self.queue.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+            self.ended = "finished"
+        except asyncio.CancelledError:
+            self.ended = "cancelled"
+            raise
+
+    async def send(self, *items):
+        for item in items:
+            self.queue.put_nowait(item)
+        await settle()
+
+async def settle():
+    """Let the pump and the subscribers process what was sent"""
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+async def take(stream, count):
+    return [await stream.__anext__() for _ in range(count)]
+
+def run(coro):
+    return asyncio.new_event_loop().run_until_complete(coro)
+
+def test_late_subscriber_replays_then_follows():
+    async def scenario():
+        flights, upstream = SingleFlight(), Upstream()
+        first = flights.subscribe("key", upstream.factory)
+        await upstream.send("a")
+        assert await take(first, 1) == ["a"]
+        await upstream.send("b")
+        second = flights.subscribe("key", upstream.factory)
+        assert await take(second, 2) == ["a", "b"]  # Replayed
+        assert flights.subscribers("key") == 2
+        await upstream.send("c", None)
+        assert [item async for item in first] == ["b", "c"]
+        assert [item async for item in second] == ["c"]
+        assert upstream.started == 1 and upstream.ended == "finished"
+        assert len(flights) == 0
+
+    run(scenario())
+
+def test_upstream_survives_its_last_subscriber_for_the_grace_period():
+    async def scenario():
+        flights, upstream = SingleFlight(grace=0.2), Upstream()
+        first = flights.subscribe("key", upstream.factory)
+        await upstream.send("a")
+        await take(first, 1)
+        await first.aclose()
+        assert flights.subscribers("key") == 0
+        await asyncio.sleep(0.05)
+        assert upstream.ended is None  # Still within the grace period, taken over below
+        second = flights.subscribe("key", upstream.factory)
+        await upstream.send("b")
+        assert await take(second, 2) == ["a", "b"]
+        await asyncio.sleep(0.3)
+        assert upstream.ended is None  # The takeover cancelled the pending abandon
+        await second.aclose()
+        await asyncio.sleep(0.05)
+        assert upstream.ended is None and len(flights) == 1
+        await asyncio.sleep(0.3)
+        assert upstream.ended == "cancelled" and len(flights) == 0
+        assert upstream.started == 1
+
+    run(scenario())
+
+def test_cancelled_subscriber_does_not_wait_for_the_grace_period():
+    async def scenario():
+        flights, upstream = SingleFlight(grace=10.0), Upstream()
+        token = CancelToken()
+        stream = flights.subscribe("key", upstream.factory, token)
+        await upstream.send("a")
+        await take(stream, 1)
+        token.cancel()
+        await stream.aclose()
+        await settle()
+        assert upstream.ended == "cancelled" and len(flights) == 0
+
+    run(scenario())
+
+def test_upstream_error_reaches_every_subscriber():
+    async def scenario():
+        flights, upstream = SingleFlight(), Upstream()
+        streams = [flights.subscribe("key", upstream.factory) for _ in range(2)]
+        await upstream.send("a")
+        for stream in streams:
+            assert await take(stream, 1) == ["a"]
+        late = flights.subscribe("key", upstream.factory)
+        assert await take(late, 1) == ["a"]
+        await upstream.send(RuntimeError("upstream failed"))
+        for stream in streams + [late]:
+            with pytest.raises(RuntimeError, match="upstream failed"):
+                await stream.__anext__()
+        assert upstream.started == 1 and len(flights) == 0
+
+    run(scenario())
+
+def test_only_identical_requests_share_a_stream():
+    mock = MockOllama(tokens=20, token_delay=0.005)
+    url, config.OLLAMA_URL = config.OLLAMA_URL, mock.start_in_thread()
+
+    async def read(stream):
+        return [data async for data in stream]
+
+    async def scenario():
+        client = AsyncLLMClient()
+        try:
+            return await asyncio.gather(
+                read(client.generate_stream("mock-small:latest", "prompt")),
+                read(client.generate_stream("mock-small:latest", "prompt")),
+                read(client.generate_stream("mock-large:latest", "prompt")),
+                read(client.generate_stream("mock-small:latest", "other prompt")),
+                read(client.generate_stream("mock-small:latest", "prompt", options={"temperature": 0})),
+                read(client.chat_stream("mock-small:latest", [{"role": "user", "content": "prompt"}])),
+            )
+        finally:
+            await client.close()
+
+    try:
+        results = run(scenario())
+    finally:
+        mock.stop_in_thread()
+        config.OLLAMA_URL = url
+    assert mock.stats["requests"] == 5  # Only the identical second request joined the first
+    assert results[0] == results[1]
+    assert [result[-1]["model"] for result in results[:3]] == ["mock-small:latest"] * 2 + ["mock-large:latest"]
+    assert all("message" in data for data in results[5])
+    assert all(data["done"] == (index == 20) for result in results for index, data in enumerate(result))
@@ -0,0 +1,95 @@
+"""
+Claiming speculations on Send: finished ones are hits, running ones are
+joined only when identical requests can share a generation, and anything
+else is cancelled.
+"""
+import asyncio
+from src.core.speculation import Speculator
+
+class Generation:
+    """Stream factory producing tokens until it is released, recording its cancel token"""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.tokens = []
+
+    async def stream(self, cancel_token):
+        self.tokens.append(cancel_token)
+        yield {"response": "partial", "done": False}
+        await self.release.wait()
+        yield {"response": " result", "done": True}
+
+async def settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+def run(coro):
+    return asyncio.new_event_loop().run_until_complete(coro)
+
+def test_finished_speculation_is_a_hit():
+    async def scenario():
+        completed = []
+        speculator = Speculator(asyncio.ensure_future)
+        generation = Generation()
+        generation.release.set()
+        speculator.start("key", generation.stream, completed.append)
+        await settle()
+        speculation = speculator.claim("key", attach=False)
+        assert speculation is not None and speculation.completed
+        assert speculation.buffer.text() == "partial result"
+        assert completed == [speculation]
+        assert speculator.stats["hits"] == 1 and speculator.hit_rate() == 1.0
+
+    run(scenario())
+
+def test_running_speculation_is_attached():
+    async def scenario():
+        speculator = Speculator(asyncio.ensure_future)
+        generation = Generation()
+        speculator.start("key", generation.stream)
+        await settle()
+        speculation = speculator.claim("key")
+        assert speculation is not None and not speculation.completed
+        # The consumer leaves without cancelling the token, the identical request takes the generation over
+        assert not generation.tokens[0].cancelled
+        assert speculator.stats["attached"] == 1 and speculator.current is None
+
+    run(scenario())
+
+def test_running_speculation_is_cancelled_without_attach():
+    async def scenario():
+        speculator = Speculator(asyncio.ensure_future)
+        generation = Generation()
+        speculator.start("key", generation.stream)
+        await settle()
+        future = speculator.current.future
+        assert speculator.claim("key", attach=False) is None
+        await settle()
+        assert generation.tokens[0].cancelled and future.cancelled()
+        assert speculator.stats["misses"] == 1 and speculator.stats["cancelled"] == 1
+        assert speculator.current is None
+
+    run(scenario())
+
+def test_other_request_cancels_the_speculation():
+    async def scenario():
+        speculator = Speculator(asyncio.ensure_future)
+        generation = Generation()
+        speculator.start("key", generation.stream)
+        await settle()
+        assert speculator.claim("other key") is None
+        assert generation.tokens[0].cancelled
+        assert speculator.stats["misses"] == 1
+
+    run(scenario())
+
+def test_speculation_still_waiting_for_its_delay_is_not_used():
+    async def scenario():
+        speculator = Speculator(asyncio.ensure_future, delay=10.0)
+        generation = Generation()
+        speculator.start("key", generation.stream)
+        await settle()
+        assert speculator.claim("key") is None
+        assert generation.tokens == []  # Nothing was sent
+
+    run(scenario())